@@ -19,7 +19,9 @@ from promise import Promise
 from silvaengine_dynamodb_base.models import GraphqlSchemaModel
 from silvaengine_utility import Debugger, Graphql, Invoker, Serializer
 
+from ..utils.spans import TRACE_CONTEXT_PARAMETER, get_trace_context, start_span
 from .config import Config
+from .embedded_runtime import get_embedded_runtime
 
 
 def execute_graphql_query(
@@ -91,6 +93,96 @@ def get_action_function(
         raise e
 
 
+def get_embedded_parameters(
+    info: ResolveInfo, parameters: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Add the caller's partition and connection to an embedded invocation.
+
+    A Lambda payload carries them in its context. Without them, the engine
+    would fall back to the partition of its own setting.
+    """
+    context = {
+        key: info.context[key]
+        for key in ["endpoint_id", "part_id", "partition_key"]
+        if info.context.get(key)
+    }
+    parameters = dict(
+        {key: value for key, value in context.items() if key != "partition_key"},
+        **parameters,
+    )
+    parameters["context"] = dict(context, **(parameters.get("context") or {}))
+    if info.context.get("connection_id") and "connection_id" not in parameters:
+        parameters["connection_id"] = info.context["connection_id"]
+    return parameters
+
+
+def invoke_async_function(
+    info: ResolveInfo,
+    engine_function: str,
+    parameters: Dict[str, Any],
+    delay_seconds: float = 0,
+    **invoker_kwargs: Any,
+) -> bool:
+    """
+    Invoke the AICoordinationEngine event method `engine_function` asynchronously.
+
+    The current trace context is added to the parameters, so the invoked
+    function continues this invocation's trace. With the embedded runtime
+    running, the function is queued on it. Otherwise it goes to the context's
+    Lambda invoker, and extra keyword arguments (such as `function_name`/
+    `invocation_type` of the target Lambda) go to the invoker.
+
+    `delay_seconds` defers the invocation. The embedded runtime holds it in
+    its delay queue; with the Lambda invoker, this invocation sleeps first.
+
+    Returns:
+        bool: False when there is neither an embedded runtime nor an invoker
+        in the context, and nothing was invoked
+    """
+    runtime = get_embedded_runtime()
+    invoker = info.context.get("aws_lambda_invoker")
+    if runtime is None and not callable(invoker):
+        return False
+
+    if runtime is None and delay_seconds:
+        with start_span(
+            "invoke_delay",
+            logger=info.context.get("logger"),
+            trace_context=info.context.get(TRACE_CONTEXT_PARAMETER),
+            engine_function=engine_function,
+            seconds=delay_seconds,
+        ):
+            time.sleep(delay_seconds)
+
+    with start_span(
+        f"invoke.{engine_function}",
+        logger=info.context.get("logger"),
+        trace_context=info.context.get(TRACE_CONTEXT_PARAMETER),
+        session_uuid=parameters.get("session_uuid"),
+    ):
+        parameters = dict(parameters, **{TRACE_CONTEXT_PARAMETER: get_trace_context()})
+        if runtime is not None:
+            runtime.submit(
+                engine_function,
+                get_embedded_parameters(info, parameters),
+                delay_seconds=delay_seconds,
+            )
+            return True
+
+        invoker(
+            payload=Invoker.build_invoker_payload(
+                context=info.context,
+                module_name="ai_coordination_engine",
+                class_name="AICoordinationEngine",
+                function_name=engine_function,
+                parameters=parameters,
+            ),
+            **invoker_kwargs,
+        )
+    return True
+
+
 def invoke_ask_model(
     context: Dict[str, Any],
     **variables: Dict[str, Any],
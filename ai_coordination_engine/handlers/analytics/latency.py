@@ -0,0 +1,568 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+LLM latency percentiles over session runs.
+
+A run's latency is `completed_at - created_at`. Runs are streamed from the
+`ace-session_runs` table (a partition_key/updated_at GSI query for one
+partition, or a parallel Segment/TotalSegments scan) or from the session
+archive files. They are collected into dictionary-encoded columns and then
+grouped by agent, coordination and/or hour. Percentiles and histograms are
+computed with NumPy when it is installed (`pip install .[analytics]`), and
+with an equivalent pure-Python path otherwise.
+
+Usage:
+    python -m ai_coordination_engine.handlers.analytics.latency \\
+        --source archive --archive-dir /data/ace --group-by agent hour \\
+        --start 2026-01-01 --end 2026-02-01 --histogram
+"""
+
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import argparse
+import gzip
+import json
+import logging
+import math
+import queue
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import pendulum
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; the pure-Python path gives the same results
+    np = None
+
+GROUP_BY_DIMENSIONS = ["agent", "coordination", "hour"]
+DEFAULT_PERCENTILES = (50, 95, 99)
+# Limits of the agentLatencyStats query; bulk analysis runs through the CLI
+MAX_WINDOW_HOURS = 24
+DEFAULT_MAX_RUNS = 10000
+DEFAULT_TOTAL_SEGMENTS = 8
+# Upper bounds (ms) of the histogram buckets; a last bucket catches the rest
+HISTOGRAM_BUCKETS_MS = [
+    250,
+    500,
+    1000,
+    2000,
+    5000,
+    10000,
+    20000,
+    30000,
+    60000,
+    120000,
+    300000,
+]
+
+
+def _to_datetime(value: Any) -> Optional[pendulum.DateTime]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        return pendulum.parse(value)
+    return pendulum.instance(value)
+
+
+class LatencySamples(object):
+    """
+    Columnar buffer of run latencies.
+
+    Agent and coordination uuids are dictionary-encoded to integer codes,
+    and every column is a typed `array`, so millions of runs take a few
+    bytes each. NumPy reads the columns without copying them.
+    """
+
+    def __init__(self, max_runs: Optional[int] = None):
+        self.max_runs = max_runs
+        self.truncated = False
+        self.agents: Dict[str, int] = {}
+        self.coordinations: Dict[str, int] = {}
+        self.agent_codes = array("q")
+        self.coordination_codes = array("q")
+        self.hours = array("q")  # Epoch hour of the run's start
+        self.latencies_ms = array("d")
+        self._decoded: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.latencies_ms)
+
+    def add(self, run: Dict[str, Any]) -> bool:
+        """
+        Add one run (a dict with the SessionRunModel attributes).
+
+        Runs that have not completed are skipped. Returns False once
+        `max_runs` is reached.
+        """
+        if self.max_runs is not None and len(self) >= self.max_runs:
+            self.truncated = True
+            return False
+
+        created_at = _to_datetime(run.get("created_at"))
+        completed_at = _to_datetime(run.get("completed_at"))
+        if created_at is None or completed_at is None or completed_at < created_at:
+            return True
+
+        agent_uuid = run.get("agent_uuid") or ""
+        coordination_uuid = run.get("coordination_uuid") or ""
+        self.agent_codes.append(self.agents.setdefault(agent_uuid, len(self.agents)))
+        self.coordination_codes.append(
+            self.coordinations.setdefault(coordination_uuid, len(self.coordinations))
+        )
+        self.hours.append(int(created_at.timestamp()) // 3600)
+        self.latencies_ms.append((completed_at - created_at).total_seconds() * 1000)
+        return True
+
+    def extend(self, runs: Iterable[Dict[str, Any]]) -> "LatencySamples":
+        for run in runs:
+            if not self.add(run):
+                break
+        return self
+
+    def get_group_value(self, dimension: str, code: int) -> Any:
+        if dimension == "hour":
+            return pendulum.from_timestamp(code * 3600).to_iso8601_string()
+
+        codes = self.agents if dimension == "agent" else self.coordinations
+        decoded = self._decoded.get(dimension)
+        if decoded is None or len(decoded) != len(codes):
+            decoded = [""] * len(codes)
+            for value, i in codes.items():
+                decoded[i] = value
+            self._decoded[dimension] = decoded
+        return decoded[code]
+
+    def get_codes(self, dimension: str) -> Any:
+        return {
+            "agent": self.agent_codes,
+            "coordination": self.coordination_codes,
+            "hour": self.hours,
+        }[dimension]
+
+
+def _percentile_key(percentile: float) -> str:
+    return f"p{percentile:g}_ms"
+
+
+def _grouped_stats_numpy(
+    samples: LatencySamples,
+    group_by: Sequence[str],
+    percentiles: Sequence[float],
+    histogram: bool,
+) -> List[Dict[str, Any]]:
+    values = np.frombuffer(samples.latencies_ms, dtype=np.float64)
+
+    # Mixed-radix group id over the dense codes of each dimension
+    group_ids = np.zeros(len(values), dtype=np.int64)
+    for dimension in group_by:
+        unique_codes, dense = np.unique(
+            np.frombuffer(samples.get_codes(dimension), dtype=np.int64),
+            return_inverse=True,
+        )
+        group_ids = group_ids * len(unique_codes) + dense
+    groups, first_index, group_ids = np.unique(
+        group_ids, return_index=True, return_inverse=True
+    )
+    group_ids = group_ids.reshape(-1)
+
+    # Sort by group, then by latency, so each group is a sorted slice
+    order = np.lexsort((values, group_ids))
+    sorted_values = values[order]
+    counts = np.bincount(group_ids, minlength=len(groups))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    means = np.bincount(group_ids, weights=values, minlength=len(groups)) / counts
+    maxes = sorted_values[starts + counts - 1]
+
+    # Linear interpolation between the closest ranks, as numpy.percentile does
+    stats = {}
+    for percentile in percentiles:
+        position = starts + (counts - 1) * (percentile / 100.0)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        stats[percentile] = sorted_values[lower] + (
+            sorted_values[upper] - sorted_values[lower]
+        ) * (position - lower)
+
+    if histogram:
+        edges = np.asarray(HISTOGRAM_BUCKETS_MS, dtype=np.float64)
+        buckets = np.searchsorted(edges, values, side="left")
+        bucket_count = len(edges) + 1
+        histograms = np.bincount(
+            group_ids * bucket_count + buckets, minlength=len(groups) * bucket_count
+        ).reshape(len(groups), bucket_count)
+
+    rows = []
+    for i in range(len(groups)):
+        index = first_index[i]
+        row = {
+            "group": {
+                dimension: samples.get_group_value(
+                    dimension, int(samples.get_codes(dimension)[index])
+                )
+                for dimension in group_by
+            },
+            "count": int(counts[i]),
+            "mean_ms": round(float(means[i]), 3),
+            "max_ms": round(float(maxes[i]), 3),
+        }
+        for percentile in percentiles:
+            row[_percentile_key(percentile)] = round(float(stats[percentile][i]), 3)
+        if histogram:
+            row["histogram"] = [int(c) for c in histograms[i]]
+        rows.append(row)
+    return rows
+
+
+def _grouped_stats_python(
+    samples: LatencySamples,
+    group_by: Sequence[str],
+    percentiles: Sequence[float],
+    histogram: bool,
+) -> List[Dict[str, Any]]:
+    columns = [samples.get_codes(dimension) for dimension in group_by]
+    grouped: Dict[tuple, List[float]] = {}
+    for i, value in enumerate(samples.latencies_ms):
+        grouped.setdefault(tuple(column[i] for column in columns), []).append(value)
+
+    rows = []
+    for key in sorted(grouped):
+        values = sorted(grouped[key])
+        count = len(values)
+        row = {
+            "group": {
+                dimension: samples.get_group_value(dimension, code)
+                for dimension, code in zip(group_by, key)
+            },
+            "count": count,
+            "mean_ms": round(sum(values) / count, 3),
+            "max_ms": round(values[-1], 3),
+        }
+        for percentile in percentiles:
+            position = (count - 1) * (percentile / 100.0)
+            lower, upper = int(math.floor(position)), int(math.ceil(position))
+            row[_percentile_key(percentile)] = round(
+                values[lower] + (values[upper] - values[lower]) * (position - lower), 3
+            )
+        if histogram:
+            counts = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+            for value in values:
+                bucket = 0
+                while (
+                    bucket < len(HISTOGRAM_BUCKETS_MS)
+                    and value > HISTOGRAM_BUCKETS_MS[bucket]
+                ):
+                    bucket += 1
+                counts[bucket] += 1
+            row["histogram"] = counts
+        rows.append(row)
+    return rows
+
+
+def get_grouped_latency_stats(
+    samples: LatencySamples,
+    group_by: Optional[Sequence[str]] = None,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    histogram: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Count, mean, max, percentiles (`p50_ms`, ...) and optionally a histogram per group.
+
+    `group_by` takes any of "agent", "coordination" and "hour" (default
+    ["agent"]). Histogram counts line up with HISTOGRAM_BUCKETS_MS plus a
+    last overflow bucket.
+    """
+    group_by = list(group_by or ["agent"])
+    for dimension in group_by:
+        if dimension not in GROUP_BY_DIMENSIONS:
+            raise Exception(
+                f"Unsupported group_by {dimension}; use {GROUP_BY_DIMENSIONS}."
+            )
+    if len(samples) == 0:
+        return []
+    if np is not None:
+        return _grouped_stats_numpy(samples, group_by, percentiles, histogram)
+    return _grouped_stats_python(samples, group_by, percentiles, histogram)
+
+
+def _get_filter_condition(
+    coordination_uuid: Optional[str] = None,
+    agent_uuid: Optional[str] = None,
+    start: Optional[pendulum.DateTime] = None,
+    end: Optional[pendulum.DateTime] = None,
+) -> Any:
+    from ...models.session_run import SessionRunModel
+
+    condition = SessionRunModel.completed_at.exists()
+    if coordination_uuid:
+        condition &= SessionRunModel.coordination_uuid == coordination_uuid
+    if agent_uuid:
+        condition &= SessionRunModel.agent_uuid == agent_uuid
+    if start is not None:
+        condition &= SessionRunModel.created_at >= start
+    if end is not None:
+        condition &= SessionRunModel.created_at < end
+    return condition
+
+
+def _run_attributes(session_run: Any) -> Dict[str, Any]:
+    return {
+        "agent_uuid": session_run.agent_uuid,
+        "coordination_uuid": session_run.coordination_uuid,
+        "created_at": session_run.created_at,
+        "completed_at": session_run.completed_at,
+    }
+
+
+def query_partition_session_runs(
+    partition_key: str,
+    start: pendulum.DateTime,
+    end: pendulum.DateTime,
+    **filters: Any,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Completed runs of one partition from the partition_key/updated_at GSI.
+
+    A run's last update is its completion, so the range is read on
+    `updated_at` (with an hour of slack for runs finishing after `end`), and
+    `created_at` is then filtered to the window.
+    """
+    from ...models.session_run import SessionRunModel
+    from ...models.utils import is_index_active
+
+    if not is_index_active(SessionRunModel.partition_key_index):
+        # A full-table scan per request is what the index replaced; use the
+        # CLI (scan_session_runs) until the index has been backfilled.
+        raise Exception(
+            "Latency stats are unavailable until the partition_key-updated_at-index "
+            "on the session run table is ACTIVE."
+        )
+
+    for session_run in SessionRunModel.partition_key_index.query(
+        partition_key,
+        SessionRunModel.updated_at.between(start, end.add(hours=1)),
+        filter_condition=_get_filter_condition(start=start, end=end, **filters),
+    ):
+        yield _run_attributes(session_run)
+
+
+def scan_session_runs(
+    total_segments: int = DEFAULT_TOTAL_SEGMENTS,
+    start: Optional[pendulum.DateTime] = None,
+    end: Optional[pendulum.DateTime] = None,
+    **filters: Any,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Completed runs from a parallel scan of the whole table.
+
+    Each segment is scanned on its own thread, and the runs are yielded as
+    they arrive. Stopping the iteration early stops the scan.
+    """
+    from ...models.session_run import SessionRunModel
+
+    filter_condition = _get_filter_condition(start=start, end=end, **filters)
+    runs: "queue.Queue" = queue.Queue(maxsize=10000)
+    stopped = threading.Event()
+    done = object()
+
+    def scan_segment(segment: int) -> None:
+        try:
+            for session_run in SessionRunModel.scan(
+                filter_condition,
+                segment=segment,
+                total_segments=total_segments,
+            ):
+                if stopped.is_set():
+                    return
+                runs.put(_run_attributes(session_run))
+        finally:
+            runs.put(done)
+
+    executor = ThreadPoolExecutor(max_workers=total_segments)
+    futures = [executor.submit(scan_segment, s) for s in range(total_segments)]
+    try:
+        remaining = total_segments
+        while remaining:
+            run = runs.get()
+            if run is done:
+                remaining -= 1
+                continue
+            yield run
+        for future in futures:
+            future.result()  # Re-raise scan errors
+    finally:
+        stopped.set()
+        # Unblock segments waiting on a full queue
+        while any(not f.done() for f in futures):
+            try:
+                runs.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        executor.shutdown(wait=True)
+
+
+def iter_archived_session_runs(
+    bucket_name: Optional[str] = None,
+    local_dir: Optional[str] = None,
+    key_prefix: Optional[str] = None,
+    start: Optional[pendulum.DateTime] = None,
+    end: Optional[pendulum.DateTime] = None,
+    coordination_uuid: Optional[str] = None,
+    agent_uuid: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Completed runs from the session archive files written by `archive_sessions`."""
+    from ...utils.payload_store import list_objects, read_object
+    from ..config import Config
+
+    key_prefix = key_prefix or Config.archive_key_prefix
+    for key in list_objects(key_prefix, bucket_name=bucket_name, local_dir=local_dir):
+        if not key.endswith(".ndjson.gz"):
+            continue
+        body = read_object(key, bucket_name=bucket_name, local_dir=local_dir)
+        if body is None:
+            continue
+        for line in gzip.decompress(body).decode("utf-8").splitlines():
+            record = json.loads(line)
+            if record["type"] != "session_run":
+                continue
+            run = record["data"]
+            if not run.get("completed_at"):
+                continue
+            if coordination_uuid and run.get("coordination_uuid") != coordination_uuid:
+                continue
+            if agent_uuid and run.get("agent_uuid") != agent_uuid:
+                continue
+            created_at = _to_datetime(run.get("created_at"))
+            if start is not None and (created_at is None or created_at < start):
+                continue
+            if end is not None and (created_at is None or created_at >= end):
+                continue
+            yield run
+
+
+def get_agent_latency_stats(
+    partition_key: Optional[str],
+    group_by: Optional[Sequence[str]] = None,
+    start: Any = None,
+    end: Any = None,
+    histogram: bool = False,
+    max_runs: int = DEFAULT_MAX_RUNS,
+    **filters: Any,
+) -> Dict[str, Any]:
+    """
+    Latency stats of one partition's completed runs in a time window.
+
+    Reads the partition through its GSI; the window must be at most
+    MAX_WINDOW_HOURS long. At most `max_runs` runs are read, and `truncated`
+    tells when that limit cut the window short. Table scans and archives are
+    left to the CLI.
+    """
+    if not partition_key:
+        raise Exception("Latency stats need a partition_key.")
+    start = _to_datetime(start)
+    end = _to_datetime(end)
+    if start is None or end is None or end <= start:
+        raise Exception("Latency stats need a start_time before the end_time.")
+    if end - start > pendulum.duration(hours=MAX_WINDOW_HOURS):
+        raise Exception(
+            f"Latency stats cover at most {MAX_WINDOW_HOURS} hours; use the CLI for longer windows."
+        )
+    runs = query_partition_session_runs(partition_key, start, end, **filters)
+    samples = LatencySamples(max_runs=max_runs).extend(runs)
+    return {
+        "group_by": list(group_by or ["agent"]),
+        "start_time": start,
+        "end_time": end,
+        "runs": len(samples),
+        "truncated": samples.truncated,
+        "histogram_buckets_ms": HISTOGRAM_BUCKETS_MS if histogram else None,
+        "groups": get_grouped_latency_stats(
+            samples, group_by=group_by, histogram=histogram
+        ),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(
+        description="LLM latency percentiles of ai_coordination_engine session runs."
+    )
+    parser.add_argument("--source", choices=["archive", "scan"], default="archive")
+    parser.add_argument("--archive-bucket", default=None)
+    parser.add_argument("--archive-dir", default=None)
+    parser.add_argument("--archive-prefix", default=None)
+    parser.add_argument("--region", default=None)
+    parser.add_argument("--segments", type=int, default=DEFAULT_TOTAL_SEGMENTS)
+    parser.add_argument(
+        "--group-by", nargs="+", choices=GROUP_BY_DIMENSIONS, default=["agent"]
+    )
+    parser.add_argument(
+        "--percentiles",
+        nargs="+",
+        type=float,
+        default=list(DEFAULT_PERCENTILES),
+    )
+    parser.add_argument("--start", default=None, help="ISO-8601 date or time")
+    parser.add_argument("--end", default=None, help="ISO-8601 date or time")
+    parser.add_argument("--coordination-uuid", default=None)
+    parser.add_argument("--agent-uuid", default=None)
+    parser.add_argument("--max-runs", type=int, default=None)
+    parser.add_argument("--histogram", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    start = _to_datetime(args.start)
+    end = _to_datetime(args.end)
+    filters = {
+        "coordination_uuid": args.coordination_uuid,
+        "agent_uuid": args.agent_uuid,
+    }
+    if args.source == "archive":
+        if not (args.archive_bucket or args.archive_dir):
+            parser.error("--source archive needs --archive-bucket or --archive-dir")
+        if args.archive_bucket:
+            import boto3
+
+            from ..config import Config
+
+            Config.aws_s3 = boto3.client("s3", region_name=args.region)
+        runs = iter_archived_session_runs(
+            bucket_name=args.archive_bucket,
+            local_dir=args.archive_dir,
+            key_prefix=args.archive_prefix,
+            start=start,
+            end=end,
+            **filters,
+        )
+    else:
+        from ...models.session_run import SessionRunModel
+
+        if args.region:
+            SessionRunModel.Meta.region = args.region
+        runs = scan_session_runs(
+            total_segments=args.segments, start=start, end=end, **filters
+        )
+
+    samples = LatencySamples(max_runs=args.max_runs).extend(runs)
+    report = {
+        "source": args.source,
+        "runs": len(samples),
+        "truncated": samples.truncated,
+        "engine": "numpy" if np is not None else "python",
+        "histogram_buckets_ms": HISTOGRAM_BUCKETS_MS if args.histogram else None,
+        "groups": get_grouped_latency_stats(
+            samples,
+            group_by=args.group_by,
+            percentiles=args.percentiles,
+            histogram=args.histogram,
+        ),
+    }
+    print(json.dumps(report, indent=2, default=str))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+from typing import Any, Dict, List, Optional
+
+import pendulum
+from pynamodb.exceptions import DoesNotExist
+
+from ...models.session import SessionModel
+from ...models.session_agent import SessionAgentModel
+from ...models.session_run import SessionRunModel
+
+FINISHED_STATES = ["completed", "failed"]
+
+
+def _ms(start: Any, end: Any) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    return round((end - start).total_seconds() * 1000, 3)
+
+
+def _last_transition_at(
+    transitions: List[Dict[str, Any]],
+    states: List[str],
+    before: Any = None,
+    after: Any = None,
+) -> Any:
+    """Time of the last transition into one of `states`, within the bounds."""
+    found = None
+    for transition in transitions:
+        if transition["state"] not in states:
+            continue
+        if before is not None and transition["at"] > before:
+            continue
+        if after is not None and transition["at"] < after:
+            continue
+        found = transition["at"]
+    return found
+
+
+def get_agent_timeline(
+    session_agent: SessionAgentModel, session_run: Optional[SessionRunModel]
+) -> Dict[str, Any]:
+    """
+    Split one session agent's execution into its stages.
+
+    - queue: last "ready" (entered the ready queue) → "executing"
+    - llm: session run created → run completed (its async task finished)
+    - post_processing: run completed → "completed"/"failed", which covers the
+      action function and, for user-in-the-loop agents, the wait for input
+
+    Stages whose timestamps are missing (rows written before transitions were
+    recorded, agents still running) are None.
+    """
+    transitions = sorted(
+        (
+            {"state": t["state"], "at": pendulum.parse(t["at"])}
+            for t in session_agent.state_transitions or []
+        ),
+        key=lambda t: t["at"],
+    )
+    started_at = _last_transition_at(transitions, ["executing"])
+    ready_at = _last_transition_at(transitions, ["ready"], before=started_at)
+    finished_at = _last_transition_at(transitions, FINISHED_STATES, after=started_at)
+    llm_started_at = session_run.created_at if session_run else None
+    llm_completed_at = session_run.completed_at if session_run else None
+    agent_action = session_agent.agent_action or {}
+
+    return {
+        "session_agent_uuid": session_agent.session_agent_uuid,
+        "agent_uuid": session_agent.agent_uuid,
+        "state": session_agent.state,
+        "primary_path": agent_action.get("primary_path"),
+        "predecessors": agent_action.get("predecessors") or [],
+        "run_uuid": session_run.run_uuid if session_run else None,
+        "created_at": session_agent.created_at,
+        "ready_at": ready_at,
+        "started_at": started_at,
+        "llm_started_at": llm_started_at,
+        "llm_completed_at": llm_completed_at,
+        "finished_at": finished_at,
+        "queue_ms": _ms(ready_at, started_at),
+        "llm_ms": _ms(llm_started_at, llm_completed_at),
+        "post_processing_ms": _ms(llm_completed_at, finished_at),
+        "total_ms": _ms(ready_at or session_agent.created_at, finished_at),
+        "on_critical_path": False,
+        "state_transitions": [
+            {"state": t["state"], "at": t["at"].to_iso8601_string()}
+            for t in transitions
+        ],
+    }
+
+
+def get_critical_path(agents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    The chain of agents that determined when the session finished.
+
+    Starting from the agent that finished last, each step goes to the
+    predecessor that finished last, i.e. the one its successor waited on.
+    """
+    by_agent_uuid = {
+        agent["agent_uuid"]: agent for agent in agents if agent["finished_at"]
+    }
+    if not by_agent_uuid:
+        return []
+
+    path, seen = [], set()
+    agent = max(by_agent_uuid.values(), key=lambda a: a["finished_at"])
+    while agent is not None and agent["agent_uuid"] not in seen:
+        path.append(agent)
+        seen.add(agent["agent_uuid"])
+        predecessors = [
+            by_agent_uuid[agent_uuid]
+            for agent_uuid in agent["predecessors"]
+            if agent_uuid in by_agent_uuid
+        ]
+        agent = (
+            max(predecessors, key=lambda a: a["finished_at"]) if predecessors else None
+        )
+    return list(reversed(path))
+
+
+def get_session_timeline(
+    coordination_uuid: str, session_uuid: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Latency breakdown of a session from its session, session agent and run rows.
+
+    Returns None when the session does not exist (or has been archived).
+    """
+    try:
+        session = SessionModel.get(coordination_uuid, session_uuid)
+    except DoesNotExist:
+        return None
+
+    # The latest run of each session agent is the one that produced its output
+    session_runs = {}
+    for session_run in SessionRunModel.query(session_uuid):
+        if not session_run.session_agent_uuid:
+            continue
+        latest = session_runs.get(session_run.session_agent_uuid)
+        if latest is None or session_run.created_at > latest.created_at:
+            session_runs[session_run.session_agent_uuid] = session_run
+
+    agents = sorted(
+        (
+            get_agent_timeline(
+                session_agent, session_runs.get(session_agent.session_agent_uuid)
+            )
+            for session_agent in SessionAgentModel.query(session_uuid)
+        ),
+        key=lambda a: a["started_at"] or a["created_at"],
+    )
+
+    critical_path = get_critical_path(agents)
+    for agent in critical_path:
+        agent["on_critical_path"] = True
+
+    critical_path_ms = (
+        _ms(
+            critical_path[0]["ready_at"] or critical_path[0]["created_at"],
+            critical_path[-1]["finished_at"],
+        )
+        if critical_path
+        else None
+    )
+    stages = {
+        stage: round(sum(agent[stage] or 0 for agent in critical_path), 3)
+        for stage in ["queue_ms", "llm_ms", "post_processing_ms"]
+    }
+
+    return {
+        "coordination_uuid": session.coordination_uuid,
+        "session_uuid": session.session_uuid,
+        "status": session.status,
+        "created_at": session.created_at,
+        "updated_at": session.updated_at,
+        "duration_ms": _ms(session.created_at, session.updated_at),
+        "agents": agents,
+        "critical_path": [agent["agent_uuid"] for agent in critical_path],
+        "critical_path_ms": critical_path_ms,
+        "critical_path_queue_ms": stages["queue_ms"],
+        "critical_path_llm_ms": stages["llm_ms"],
+        "critical_path_post_processing_ms": stages["post_processing_ms"],
+        # Critical path time outside the three stages: preparing model calls
+        # and waiting for the orchestrator to pick up a finished predecessor
+        # (polls, iteration backoff)
+        "critical_path_overhead_ms": (
+            round(critical_path_ms - sum(stages.values()), 3)
+            if critical_path_ms is not None
+            else None
+        ),
+    }
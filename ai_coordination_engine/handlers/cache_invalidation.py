@@ -0,0 +1,179 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import importlib
+import json
+import logging
+import traceback
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from boto3.dynamodb.types import TypeDeserializer
+
+from ..models.cache import TAG_FIELDS, purge_entity_cascading_cache
+from .config import Config
+
+_deserializer = TypeDeserializer()
+
+# The entity_keys each model's purge_cache decorator sends, so a stream purge
+# matches a purge made by the writing container.
+ENTITY_PURGE_KEYS = {
+    "coordination": ["coordination_uuid", "partition_key"],
+    "session": ["coordination_uuid", "session_uuid"],
+    "session_agent": ["session_uuid", "session_agent_uuid"],
+    "session_run": ["run_uuid", "session_uuid"],
+    "task": ["task_uuid", "coordination_uuid"],
+    "task_schedule": ["schedule_uuid", "task_uuid"],
+}
+
+
+@lru_cache(maxsize=1)
+def get_table_entity_types() -> Dict[str, str]:
+    """Map each cached model's DynamoDB table name to its CACHE_ENTITY_CONFIG entity type."""
+    table_entity_types = {}
+    for entity_type, entity_config in Config.get_cache_entity_config().items():
+        model_class = getattr(
+            importlib.import_module(entity_config["module"]),
+            entity_config["model_class"],
+        )
+        table_entity_types[model_class.Meta.table_name] = entity_type
+    return table_entity_types
+
+
+def _get_table_name(record: Dict[str, Any]) -> Optional[str]:
+    # arn:aws:dynamodb:<region>:<account>:table/<table_name>/stream/<label>
+    arn = record.get("eventSourceARN") or ""
+    parts = arn.split("/")
+    if len(parts) >= 2 and parts[0].endswith(":table"):
+        return parts[1]
+    return record.get("tableName")
+
+
+def _deserialize(image: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {k: _deserializer.deserialize(v) for k, v in (image or {}).items()}
+
+
+def get_record_purge(
+    record: Dict[str, Any],
+) -> Optional[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+    """
+    Translate one stream record into (entity_type, entity_keys, context_keys).
+
+    Keys come from the record's Keys plus the parent keys found in the new or
+    old image, so cascading purges reach the entity's lists and children.
+    Records from tables without a cache entry return None.
+    """
+    entity_type = get_table_entity_types().get(_get_table_name(record))
+    if entity_type is None:
+        return None
+
+    dynamodb = record.get("dynamodb", {})
+    item = _deserialize(dynamodb.get("OldImage"))
+    item.update(_deserialize(dynamodb.get("NewImage")))
+    item.update(_deserialize(dynamodb.get("Keys")))
+
+    key_fields = ENTITY_PURGE_KEYS.get(entity_type) or [
+        k for k in item if k in TAG_FIELDS
+    ]
+    entity_keys = {k: str(item[k]) for k in key_fields if item.get(k) is not None}
+    context_keys = {
+        k: item[k] for k in ["partition_key", "endpoint_id", "part_id"] if item.get(k)
+    }
+    return entity_type, entity_keys, context_keys
+
+
+def handle_stream_records(
+    logger: logging.Logger, records: Iterable[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Purge caches for the items changed in a batch of DynamoDB Streams records.
+
+    Each changed item becomes one purge_entity_cascading_cache call, so the
+    CACHE_ENTITY_CONFIG keys and CACHE_RELATIONSHIPS cascade apply exactly as
+    they do for writes made in this process. Repeated changes to the same
+    item within a batch are purged once. A failed purge is logged and does
+    not fail the batch, since the entry still expires by TTL.
+    """
+    summary = {"records": 0, "purged": 0, "skipped": 0, "errors": 0}
+    seen = set()
+    for record in records:
+        summary["records"] += 1
+        purge = get_record_purge(record)
+        if purge is None:
+            summary["skipped"] += 1
+            continue
+
+        entity_type, entity_keys, context_keys = purge
+        dedupe_key = (entity_type, tuple(sorted(entity_keys.items())))
+        if dedupe_key in seen:
+            continue
+        seen.add(dedupe_key)
+
+        try:
+            purge_entity_cascading_cache(
+                logger,
+                entity_type=entity_type,
+                context_keys=context_keys or None,
+                entity_keys=entity_keys,
+                cascade_depth=3,
+            )
+            summary["purged"] += 1
+        except Exception:
+            logger.error(traceback.format_exc())
+            summary["errors"] += 1
+
+    logger.info(f"Cache invalidation from stream: {json.dumps(summary)}.")
+    return summary
+
+
+def invalidate_cache_from_stream(
+    logger: logging.Logger, setting: Dict[str, Any], **kwargs: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Entry point for a DynamoDB Streams event source mapping (`Records` in the event)."""
+    _ = setting
+    return handle_stream_records(logger, kwargs.get("Records") or [])
+
+
+def to_stream_record(
+    model: Any, event_name: str = "MODIFY", old_model: Any = None
+) -> Dict[str, Any]:
+    """
+    Build a NEW_AND_OLD_IMAGES style stream record from a PynamoDB model.
+
+    Used to record changes locally, where no stream exists, for replay with
+    replay_stream_records().
+    """
+    image = model.serialize()
+    keys = {
+        name: image[name]
+        for name in [model._hash_keyname, model._range_keyname]
+        if name and name in image
+    }
+    dynamodb = {"Keys": keys}
+    if event_name != "REMOVE":
+        dynamodb["NewImage"] = image
+    if old_model is not None or event_name == "REMOVE":
+        dynamodb["OldImage"] = (old_model or model).serialize()
+    return {
+        "eventName": event_name,
+        "tableName": model.Meta.table_name,
+        "dynamodb": dynamodb,
+    }
+
+
+def replay_stream_records(logger: logging.Logger, path: str) -> Dict[str, Any]:
+    """
+    Local stand-in for the stream trigger: replay NDJSON stream records.
+
+    Each line is one record in DynamoDB Streams format; `tableName` may be
+    used instead of `eventSourceARN`.
+    """
+    records: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+    return handle_stream_records(logger, records)
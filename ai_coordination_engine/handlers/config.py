@@ -30,10 +30,125 @@ class Config:
     funct_zip_path = None
     funct_extract_path = None
 
+    # Large-payload offload (agent_input/agent_output/subtask_queries)
+    payload_offload_threshold = 32768  # bytes
+    payload_bucket_name = None
+    payload_local_dir = None
+    payload_key_prefix = "ace-payloads"
+
+    # Cold-storage archive for terminal sessions
+    archive_bucket_name = None
+    archive_local_dir = None
+    archive_key_prefix = "ace-archive"
+
     # Cache Configuration
     CACHE_TTL = 1800  # 30 minutes default TTL
     CACHE_ENABLED = True
 
+    # In-process L1 in front of HybridCacheEngine. Purges only reach this
+    # container, so TTLs stay short for the entities that change often.
+    LOCAL_CACHE_ENABLED = True
+    local_cache_max_entries = 2048
+    LOCAL_CACHE_TTLS = {
+        # Versioned entries, keyed by the version in coordination_versions
+        "coordination": 3600,
+        "coordination_models": 3600,
+        # Bounds how long a write from another container goes unseen
+        "coordination_versions": 5,
+        "task": 300,
+        "session": 30,
+        "session_agent": 15,
+        "session_run": 15,
+        "session_agents_by_session": 10,
+        "session_runs_by_session": 10,
+        "async_task": 10,
+        # Markers for keys that were not found
+        "negative": 30,
+        # Full GraphQL responses of read-only queries
+        "graphql_response": 10,
+        # Offloaded payloads are content addressed and never change
+        "payloads": 3600,
+    }
+    # Byte budgets for the L1 caches that hold large values
+    LOCAL_CACHE_MAX_BYTES = {
+        "payloads": 33554432,  # 32 MiB
+    }
+    LOCAL_CACHE_DEFAULT_TTL = 30
+    # Seconds between structured cache_stats log lines (0 disables them)
+    cache_stats_log_interval = 300
+
+    # Per-request DynamoDB/GraphQL call accounting (utils/instrumentation.py)
+    REQUEST_USAGE_ENABLED = True
+
+    # Log spans of invocations, poll loops and model calls (utils/spans.py).
+    # Trace ids are propagated between invocations either way.
+    SPANS_ENABLED = False
+
+    # Run the async self-invocations on an in-process worker pool instead of
+    # Lambda (handlers/embedded_runtime.py)
+    EMBEDDED_RUNTIME_ENABLED = False
+    embedded_runtime_workers = 32
+    # Seconds between procedure iterations while session agents are pending
+    iteration_backoff_seconds = 10
+
+    # Opt-in Apollo-style resolver tracing (utils/tracing.py)
+    TRACING_ENABLED = False
+    tracing_max_resolvers = 2000
+
+    # Static GraphQL query cost limits, in estimated reads (handlers/query_cost.py)
+    QUERY_COST_ENABLED = True
+    query_cost_max = 5000  # Per request
+    query_cost_budget = 50000  # Per partition_key per window, per container
+    query_cost_window = 60  # Seconds
+    query_cost_mode = "degrade"  # "degrade" (shrink page sizes) or "reject"
+    QUERY_COST_WEIGHTS = {
+        # Single-entity reads, as root or nested fields
+        "coordination": 1,
+        "task": 1,
+        "taskSchedule": 1,
+        "session": 1,
+        "sessionAgent": 1,
+        "sessionRun": 1,
+        # One query per page of a root list
+        "coordinationList": 1,
+        "taskList": 1,
+        "taskScheduleList": 1,
+        "sessionList": 1,
+        "sessionAgentList": 1,
+        "sessionRunList": 1,
+        "sessionEventList": 1,
+        # Reads the session, its session agents and its runs
+        "sessionTimeline": 3,
+        # Reads up to 10,000 of a partition's session runs from one day
+        "agentLatencyStats": 500,
+        # Count of every matching row
+        "withTotal": 20,
+        # Nested one-to-many reads per parent item
+        "sessionAgents": 2,
+        "sessionRuns": 2,
+        "logs": 2,
+        # ai_agent_core calls
+        "asyncTask": 10,
+        "askOperationHub": 50,
+    }
+    # Expected children per parent of nested one-to-many fields; their
+    # selections are costed once per child
+    QUERY_COST_FAN_OUT = {
+        "sessionAgents": 10,
+        "sessionRuns": 10,
+    }
+
+    # Root query fields whose full responses may be cached
+    RESPONSE_CACHE_ENABLED = True
+    RESPONSE_CACHE_FIELDS = [
+        "coordination",
+        "coordinationList",
+        "task",
+        "taskList",
+        "taskSchedule",
+        "taskScheduleList",
+    ]
+
     # Cache name patterns for different modules
     CACHE_NAMES = {
         "models": "ai_coordination_engine.models",
@@ -167,9 +282,76 @@ class Config:
         """
         cls.source_email = setting.get("source_email")
 
+        # Payloads go to S3 when a bucket is set, otherwise to a local directory
+        cls.payload_bucket_name = setting.get("payload_bucket_name")
+        cls.payload_local_dir = setting.get("payload_local_dir")
+        if setting.get("payload_offload_threshold") is not None:
+            cls.payload_offload_threshold = int(setting["payload_offload_threshold"])
+        if setting.get("payload_key_prefix"):
+            cls.payload_key_prefix = setting["payload_key_prefix"]
+
+        # Archived sessions go to S3 when a bucket is set, otherwise to a local directory
+        cls.archive_bucket_name = setting.get("archive_bucket_name")
+        cls.archive_local_dir = setting.get("archive_local_dir")
+        if setting.get("archive_key_prefix"):
+            cls.archive_key_prefix = setting["archive_key_prefix"]
+
         # Set cache enabled flag (defaults to True if not specified)
         if "cache_enabled" in setting:
             cls.CACHE_ENABLED = setting.get("cache_enabled", True)
+        if "local_cache_enabled" in setting:
+            cls.LOCAL_CACHE_ENABLED = setting.get("local_cache_enabled", True)
+        if setting.get("local_cache_max_entries") is not None:
+            cls.local_cache_max_entries = int(setting["local_cache_max_entries"])
+        if setting.get("cache_stats_log_interval") is not None:
+            cls.cache_stats_log_interval = int(setting["cache_stats_log_interval"])
+        if "request_usage_enabled" in setting:
+            cls.REQUEST_USAGE_ENABLED = setting.get("request_usage_enabled", True)
+        if "spans_enabled" in setting:
+            cls.SPANS_ENABLED = setting.get("spans_enabled", False)
+        if "embedded_runtime_enabled" in setting:
+            cls.EMBEDDED_RUNTIME_ENABLED = setting.get(
+                "embedded_runtime_enabled", False
+            )
+        if setting.get("embedded_runtime_workers") is not None:
+            cls.embedded_runtime_workers = int(setting["embedded_runtime_workers"])
+        if setting.get("iteration_backoff_seconds") is not None:
+            cls.iteration_backoff_seconds = float(setting["iteration_backoff_seconds"])
+        if "tracing_enabled" in setting:
+            cls.TRACING_ENABLED = setting.get("tracing_enabled", False)
+        if setting.get("tracing_max_resolvers") is not None:
+            cls.tracing_max_resolvers = int(setting["tracing_max_resolvers"])
+        if "query_cost_enabled" in setting:
+            cls.QUERY_COST_ENABLED = setting.get("query_cost_enabled", True)
+        for key in ["query_cost_max", "query_cost_budget", "query_cost_window"]:
+            if setting.get(key) is not None:
+                setattr(cls, key, int(setting[key]))
+        if setting.get("query_cost_mode") in ("reject", "degrade"):
+            cls.query_cost_mode = setting["query_cost_mode"]
+        if isinstance(setting.get("query_cost_weights"), dict):
+            cls.QUERY_COST_WEIGHTS = dict(
+                cls.QUERY_COST_WEIGHTS,
+                **{k: int(v) for k, v in setting["query_cost_weights"].items()},
+            )
+        if isinstance(setting.get("query_cost_fan_out"), dict):
+            cls.QUERY_COST_FAN_OUT = dict(
+                cls.QUERY_COST_FAN_OUT,
+                **{k: int(v) for k, v in setting["query_cost_fan_out"].items()},
+            )
+        if "response_cache_enabled" in setting:
+            cls.RESPONSE_CACHE_ENABLED = setting.get("response_cache_enabled", True)
+        if isinstance(setting.get("response_cache_fields"), list):
+            cls.RESPONSE_CACHE_FIELDS = setting["response_cache_fields"]
+        if isinstance(setting.get("local_cache_ttls"), dict):
+            cls.LOCAL_CACHE_TTLS = dict(
+                cls.LOCAL_CACHE_TTLS,
+                **{k: int(v) for k, v in setting["local_cache_ttls"].items()},
+            )
+        if isinstance(setting.get("local_cache_max_bytes"), dict):
+            cls.LOCAL_CACHE_MAX_BYTES = dict(
+                cls.LOCAL_CACHE_MAX_BYTES,
+                **{k: int(v) for k, v in setting["local_cache_max_bytes"].items()},
+            )
 
     @classmethod
     def _setup_function_paths(cls, setting: Dict[str, Any]) -> None:
@@ -250,6 +432,21 @@ class Config:
         """Check if caching is enabled."""
         return cls.CACHE_ENABLED
 
+    @classmethod
+    def is_local_cache_enabled(cls) -> bool:
+        """Check if the in-process L1 cache is enabled."""
+        return cls.CACHE_ENABLED and cls.LOCAL_CACHE_ENABLED
+
+    @classmethod
+    def is_response_cache_enabled(cls) -> bool:
+        """Check if full GraphQL responses of read-only queries are cached."""
+        return cls.is_local_cache_enabled() and cls.RESPONSE_CACHE_ENABLED
+
+    @classmethod
+    def get_local_cache_ttl(cls, name: str) -> int:
+        """Get the L1 TTL for a loader cache name."""
+        return cls.LOCAL_CACHE_TTLS.get(name, cls.LOCAL_CACHE_DEFAULT_TTL)
+
     @classmethod
     def get_cache_relationships(cls) -> Dict[str, List[Dict[str, str]]]:
         """Get entity cache dependency relationships."""
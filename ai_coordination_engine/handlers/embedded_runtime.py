@@ -0,0 +1,196 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+# Event methods of AICoordinationEngine that invoke_async_function queues
+SUPPORTED_FUNCTIONS = [
+    "async_insert_update_session",
+    "async_execute_procedure_task_session",
+    "async_update_session_agent",
+    "async_orchestrate_task_query",
+]
+
+
+class EmbeddedRuntime(object):
+    """
+    In-process replacement of the engine's Lambda self-invocations.
+
+    Invocations run the engine's event method on a worker pool. Delayed
+    invocations (the backoff between procedure iterations) wait in a heap
+    ordered by due time, which one scheduler thread drains onto the pool, so
+    no worker sleeps through a backoff.
+
+    Invocations are not persisted: those still queued at shutdown are dropped,
+    and their sessions are left for `sweep_stale_sessions`.
+    """
+
+    def __init__(
+        self,
+        engine: Any,
+        logger: Optional[logging.Logger] = None,
+        max_workers: int = 32,
+    ):
+        self.engine = engine
+        self.logger = logger or logging.getLogger(__name__)
+        self.submitted = Counter()
+        self.completed = Counter()
+        self.failed = Counter()
+        self._delayed: List = []
+        self._sequence = itertools.count()
+        self._pending = 0
+        self._stopped = False
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="ace-runtime"
+        )
+        self._scheduler = threading.Thread(
+            target=self._schedule, name="ace-runtime-scheduler", daemon=True
+        )
+        self._scheduler.start()
+
+    def submit(
+        self,
+        function_name: str,
+        parameters: Dict[str, Any],
+        delay_seconds: float = 0,
+    ) -> None:
+        """Queue an engine event method, to run after `delay_seconds`."""
+        if function_name not in SUPPORTED_FUNCTIONS:
+            raise Exception(
+                f"The embedded runtime does not support function {function_name}."
+            )
+
+        # A Lambda gets its own copy of the payload; keep callers from sharing
+        # the top-level parameters and request context with the invocation.
+        parameters = dict(parameters)
+        if isinstance(parameters.get("context"), dict):
+            parameters["context"] = dict(parameters["context"])
+
+        with self._condition:
+            if self._stopped:
+                raise Exception("The embedded runtime has been shut down.")
+            if delay_seconds and delay_seconds > 0:
+                heapq.heappush(
+                    self._delayed,
+                    (
+                        time.monotonic() + delay_seconds,
+                        next(self._sequence),
+                        function_name,
+                        parameters,
+                    ),
+                )
+                self._condition.notify_all()
+            else:
+                # Under the lock, so shutdown cannot close the pool in between
+                self._executor.submit(self._run, function_name, parameters)
+            self._pending += 1
+            self.submitted[function_name] += 1
+
+    def _schedule(self) -> None:
+        with self._condition:
+            while not self._stopped:
+                if not self._delayed:
+                    self._condition.wait()
+                    continue
+                wait_seconds = self._delayed[0][0] - time.monotonic()
+                if wait_seconds > 0:
+                    self._condition.wait(wait_seconds)
+                    continue
+                _, _, function_name, parameters = heapq.heappop(self._delayed)
+                self._executor.submit(self._run, function_name, parameters)
+
+    def _run(self, function_name: str, parameters: Dict[str, Any]) -> None:
+        try:
+            getattr(self.engine, function_name)(**parameters)
+            outcome = self.completed
+        except Exception:
+            self.logger.error(
+                f"Embedded invocation of {function_name} failed: {traceback.format_exc()}"
+            )
+            outcome = self.failed
+        with self._condition:
+            outcome[function_name] += 1
+            self._pending -= 1
+            self._condition.notify_all()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until no invocation is queued or running; False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending == 0, timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "pending": self._pending,
+                "delayed": len(self._delayed),
+                "submitted": dict(self.submitted),
+                "completed": dict(self.completed),
+                "failed": dict(self.failed),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop scheduling; with `wait`, running invocations finish first."""
+        with self._condition:
+            self._stopped = True
+            dropped = len(self._delayed)
+            self._delayed = []
+            self._pending -= dropped
+            self._condition.notify_all()
+        if dropped:
+            self.logger.warning(
+                f"Embedded runtime shut down with {dropped} delayed invocation(s) dropped."
+            )
+        self._scheduler.join()
+        self._executor.shutdown(wait=wait)
+
+
+_runtime: Optional[EmbeddedRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_embedded_runtime() -> Optional[EmbeddedRuntime]:
+    """The process-wide runtime, or None when invocations go to Lambda."""
+    return _runtime
+
+
+def start_embedded_runtime(
+    engine: Any,
+    logger: Optional[logging.Logger] = None,
+    max_workers: int = 32,
+) -> EmbeddedRuntime:
+    """
+    Run this process's async invocations on an embedded runtime bound to `engine`.
+
+    The runtime is started once per process. A later engine only rebinds
+    which engine it dispatches to; queued invocations keep running and the
+    worker pool keeps its size.
+    """
+    global _runtime
+
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = EmbeddedRuntime(engine, logger=logger, max_workers=max_workers)
+        else:
+            _runtime.engine = engine
+        return _runtime
+
+
+def stop_embedded_runtime(wait: bool = True) -> None:
+    global _runtime
+
+    with _runtime_lock:
+        runtime, _runtime = _runtime, None
+    if runtime is not None:
+        runtime.shutdown(wait=wait)
@@ -6,22 +6,23 @@ __author__ = "bibow"
 
 import time
 import traceback
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from graphene import ResolveInfo
 from silvaengine_constants import AgentType, InvocationType
 from silvaengine_utility.debugger import Debugger
-from silvaengine_utility.invoker import Invoker
 from silvaengine_utility.serializer import Serializer
 
 from ...models.coordination import resolve_coordination
-from ...models.session import insert_update_session
-from ...models.session_run import insert_update_session_run
+from ...models.session_run import insert_session_with_session_run
 from ...types.coordination import CoordinationType
 from ...types.operation_hub import AskOperationHubType
-from ...types.session import SessionType
 from ...types.session_run import SessionRunType
-from ..ai_coordination_utility import get_connection_by_email, invoke_ask_model
+from ..ai_coordination_utility import (
+    get_connection_by_email,
+    invoke_ask_model,
+    invoke_async_function,
+)
 from ..config import Config
 
 """System Instructions:
@@ -143,16 +144,13 @@ def ask_operation_hub(
 
         agents = coordination.agents
 
-        # Step 2: Create/update session
-        session = _handle_session(info, **kwargs)
-
-        # Step 3: Select and validate agent
+        # Step 2: Select and validate agent
         agent = _select_agent(agents=agents, agent_uuid=agent_uuid)
 
         if not agent:
             raise ValueError("Not found the specified agent")
 
-        # Step 4: Process query and handle routing
+        # Step 3: Process query and handle routing
         user_query = _process_query(
             info=info,
             user_query=user_query,
@@ -162,7 +160,7 @@ def ask_operation_hub(
 
         # connection_id = _handle_connection_routing(info, agent, **kwargs)
 
-        # Step 5: Execute AI model and record session run
+        # Step 4: Execute AI model
         variables = {
             "agentUuid": agent.get("agent_uuid"),
             "userQuery": user_query,
@@ -184,17 +182,16 @@ def ask_operation_hub(
 
         ask_model = invoke_ask_model(context=info.context, **variables)
 
-        session_run: SessionRunType = insert_update_session_run(
+        # Step 5: Create/update session and record session run in one transaction
+        session, session_run = _handle_session(
             info,
-            **{
-                "session_uuid": session.session_uuid,
-                "run_uuid": ask_model["current_run_uuid"],
-                "thread_uuid": ask_model["thread_uuid"],
-                "agent_uuid": agent["agent_uuid"],
-                "coordination_uuid": session.coordination_uuid,
-                "async_task_uuid": ask_model["async_task_uuid"],
-                "updated_by": "operation_hub",
-            },
+            **dict(
+                kwargs,
+                run_uuid=ask_model["current_run_uuid"],
+                thread_uuid=ask_model["thread_uuid"],
+                agent_uuid=agent["agent_uuid"],
+                async_task_uuid=ask_model["async_task_uuid"],
+            ),
         )
 
         # Step 6: Handle async updates
@@ -209,9 +206,9 @@ def ask_operation_hub(
         # Step 7: Return response
         return AskOperationHubType(
             **{
-                "coordination_uuid": session.coordination_uuid,
-                "session_uuid": session.session_uuid,
-                "partition_key": session.partition_key,
+                "coordination_uuid": session["coordination_uuid"],
+                "session_uuid": session["session_uuid"],
+                "partition_key": session["partition_key"],
                 "run_uuid": session_run.run_uuid,
                 "thread_uuid": session_run.thread_uuid,
                 "agent_uuid": session_run.agent_uuid,
@@ -230,9 +227,11 @@ def ask_operation_hub(
         raise e
 
 
-def _handle_session(info: ResolveInfo, **kwargs: Dict[str, Any]) -> SessionType | None:
+def _handle_session(
+    info: ResolveInfo, **kwargs: Dict[str, Any]
+) -> Tuple[Dict[str, Any], SessionRunType]:
     """
-    Helper function to create or update a session.
+    Helper function to create or update a session together with its session run.
 
     Args:
         info (ResolveInfo): GraphQL context and metadata
@@ -241,13 +240,18 @@ def _handle_session(info: ResolveInfo, **kwargs: Dict[str, Any]) -> SessionType
             - user_id: Optional user identifier
             - session_uuid: Optional session identifier
             - agent_uuid: Optional agent identifier
+            - run_uuid, thread_uuid, async_task_uuid: Identifiers from the ask_model call
 
     Returns:
-        SessionType: Session object with updated details
+        Tuple[Dict[str, Any], SessionRunType]: Session keys and the new session run
     """
     variables = {
         "coordination_uuid": kwargs["coordination_uuid"],
         "user_id": kwargs.get("user_id"),
+        "run_uuid": kwargs["run_uuid"],
+        "thread_uuid": kwargs["thread_uuid"],
+        "agent_uuid": kwargs["agent_uuid"],
+        "async_task_uuid": kwargs["async_task_uuid"],
         "updated_by": "operation_hub",
     }
 
@@ -259,7 +263,7 @@ def _handle_session(info: ResolveInfo, **kwargs: Dict[str, Any]) -> SessionType
     if "session_uuid" in kwargs:
         variables.update({"session_uuid": kwargs["session_uuid"]})
 
-    return insert_update_session(info, **variables)
+    return insert_session_with_session_run(info, **variables)
 
 
 def _select_agent(agents: List, agent_uuid: str) -> Dict[str, Any] | None:
@@ -403,17 +407,10 @@ def _trigger_async_update(
     ):
         params["receiver_email"] = kwargs["receiver_email"]
 
-    invoker = info.context.get("aws_lambda_invoker")
-
-    if callable(invoker):
-        invoker(
-            function_name=info.context.get("aws_lambda_arn"),
-            invocation_type=InvocationType.EVENT,
-            payload=Invoker.build_invoker_payload(
-                context=info.context,
-                module_name="ai_coordination_engine",
-                function_name="async_insert_update_session",
-                class_name="AICoordinationEngine",
-                parameters=params,
-            ),
-        )
+    invoke_async_function(
+        info,
+        "async_insert_update_session",
+        params,
+        function_name=info.context.get("aws_lambda_arn"),
+        invocation_type=InvocationType.EVENT,
+    )
@@ -9,9 +9,11 @@ from typing import Any, Dict
 
 from silvaengine_utility import Debugger, Serializer
 
-from ...models.session import insert_update_session, resolve_session
-from ...models.session_run import resolve_session_run
+from ...models.session import insert_update_session
+from ...models.session_event import append_session_event
+from ...models.session_run import complete_session_run, resolve_session_run
 from ...utils.listener import create_listener_info
+from ...utils.spans import increment_span_attribute
 from ..ai_coordination_utility import get_async_task
 
 
@@ -22,7 +24,7 @@ def async_insert_update_session(
 ) -> None:
     """
     Asynchronously inserts or updates a session based on async task status.
-    Monitors the async task execution and updates session logs if task fails.
+    Monitors the async task execution and appends the outcome to the session event log.
 
     Args:
         logger: Logger instance for logging messages
@@ -51,6 +53,7 @@ def async_insert_update_session(
     start_time = time.time()
 
     while True:
+        increment_span_attribute("polls")
         async_task = get_async_task(
             info.context,
             **{
@@ -58,27 +61,29 @@ def async_insert_update_session(
                 "asyncTaskUuid": session_run.async_task_uuid,
             },
         )
-        session = resolve_session(
-            info,
-            **{
-                "coordination_uuid": kwargs["coordination_uuid"],
-                "session_uuid": kwargs["session_uuid"],
-            },
-        )
-        logs = Serializer.json_loads(session.logs if session.logs else "[]")
+        if async_task["status"] in ["completed", "failed"]:
+            complete_session_run(
+                info,
+                kwargs["session_uuid"],
+                kwargs["run_uuid"],
+                async_task,
+                "operation_hub",
+            )
 
         if async_task["status"] == "failed" or time.time() - start_time > 60:
             # If async task failed, update session with failure details
             status = "failed" if async_task["status"] == "failed" else "timeout"
-            logs.append(
-                {
-                    "run_uuid": kwargs["run_uuid"],
-                    "log": (
-                        async_task["notes"]
-                        if status == "failed"
-                        else "The task has timed out."
-                    ),
-                }
+            append_session_event(
+                info,
+                kwargs["coordination_uuid"],
+                kwargs["session_uuid"],
+                log=(
+                    async_task["notes"]
+                    if status == "failed"
+                    else "The task has timed out."
+                ),
+                run_uuid=kwargs["run_uuid"],
+                updated_by="operation_hub",
             )
             session = insert_update_session(
                 info,
@@ -86,27 +91,19 @@ def async_insert_update_session(
                     "coordination_uuid": kwargs["coordination_uuid"],
                     "session_uuid": kwargs["session_uuid"],
                     "status": status,
-                    "logs": Serializer.json_dumps(logs),
                     "updated_by": "operation_hub",
                 },
             )
 
             break
         elif async_task["status"] == "completed":
-            logs.append(
-                {
-                    "run_uuid": kwargs["run_uuid"],
-                    "log": "Task completed successfully.",
-                }
-            )
-            session = insert_update_session(
+            append_session_event(
                 info,
-                **{
-                    "coordination_uuid": kwargs["coordination_uuid"],
-                    "session_uuid": kwargs["session_uuid"],
-                    "logs": Serializer.json_dumps(logs),
-                    "updated_by": "operation_hub",
-                },
+                kwargs["coordination_uuid"],
+                kwargs["session_uuid"],
+                log="Task completed successfully.",
+                run_uuid=kwargs["run_uuid"],
+                updated_by="operation_hub",
             )
             # TODO: Send email if receiver_email is in kwargs
             break
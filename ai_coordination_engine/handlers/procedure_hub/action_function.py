@@ -10,6 +10,7 @@ from graphene import ResolveInfo
 
 from ...models.session_agent import insert_update_session_agent
 from ...types.session_agent import SessionAgentType
+from ...utils.payload_store import resolve_payload
 from ..ai_coordination_utility import get_action_function
 from .session_agent import get_successors, handle_session_agent_completion
 
@@ -17,6 +18,7 @@ from .session_agent import get_successors, handle_session_agent_completion
 def execute_action_function(info: ResolveInfo, session_agent: SessionAgentType) -> None:
     try:
         session_agent.state = "completed"
+        session_agent.agent_output = resolve_payload(session_agent.agent_output)
 
         # TODO: Process action_function.
         action_function = get_action_function(
@@ -7,13 +7,13 @@ __author__ = "bibow"
 from typing import Any, Dict
 
 from graphene import ResolveInfo
-from silvaengine_utility.invoker import Invoker
 from silvaengine_utility.serializer import Serializer
 
 from ...models.session import insert_update_session
 from ...models.task import resolve_task
 from ...types.procedure_hub import ProcedureTaskSessionType
 from ...types.session import SessionType
+from ..ai_coordination_utility import invoke_async_function
 from ..config import Config
 from .session_agent import init_in_degree, init_session_agents
 
@@ -82,18 +82,7 @@ def execute_procedure_task_session(
 
     # Invoke async update function on AWS Lambda
     if not session.subtask_queries:
-        invoker = info.context.get("aws_lambda_invoker")
-
-        if callable(invoker):
-            invoker(
-                payload=Invoker.build_invoker_payload(
-                    context=info.context,
-                    module_name="ai_coordination_engine",
-                    class_name="AICoordinationEngine",
-                    function_name="async_orchestrate_task_query",
-                    parameters=params,
-                ),
-            )
+        invoke_async_function(info, "async_orchestrate_task_query", params)
     else:
         session: SessionType = insert_update_session(
             info,
@@ -114,18 +103,7 @@ def execute_procedure_task_session(
         )
 
     # Invoke async update function on AWS Lambda
-    invoker = info.context.get("aws_lambda_invoker")
-
-    if callable(invoker):
-        invoker(
-            payload=Invoker.build_invoker_payload(
-                context=info.context,
-                module_name="ai_coordination_engine",
-                class_name="AICoordinationEngine",
-                function_name="async_execute_procedure_task_session",
-                parameters=params,
-            ),
-        )
+    invoke_async_function(info, "async_execute_procedure_task_session", params)
 
     return ProcedureTaskSessionType(
         **{
@@ -9,21 +9,28 @@ import time
 import traceback
 from typing import Any, Dict, List
 
+import pendulum
 from graphene import ResolveInfo
-from silvaengine_utility.invoker import Invoker
 from silvaengine_utility.serializer import Serializer
 
 from ...handlers.config import Config
 from ...models.session import insert_update_session, resolve_session
-from ...models.session_agent import resolve_session_agent_list
+from ...models.session_agent import (
+    READY_STATES,
+    dequeue_ready_session_agents,
+    requeue_session_agent,
+    resolve_session_agent_list,
+)
 from ...types.session import SessionType
 from ...types.session_agent import SessionAgentListType, SessionAgentType
 from ...utils.listener import create_listener_info
+from ...utils.spans import increment_span_attribute, span_decorator
 from ..ai_coordination_utility import (
     ensure_coordination_data,
     ensure_task_data,
     get_async_task,
     invoke_ask_model,
+    invoke_async_function,
 )
 from .action_function import execute_action_function
 from .session_agent import (
@@ -33,6 +40,12 @@ from .session_agent import (
     update_session_agent,
 )
 
+READY_CLAIM_LEASE_SECONDS = 300
+# Wait before re-reading an empty ready index, which may lag a readied agent
+READY_INDEX_RETRY_SECONDS = 1
+# Iterations a procedure session may take before it is failed as a likely loop
+MAX_ITERATIONS = 10
+
 """Decompose System Instructions:
 Name: Task Decomposition and Agent Assignment Agent
 
@@ -285,6 +298,7 @@ def invoke_next_iteration(
     coordination_uuid: str,
     session_uuid: str,
     iteration_count: int = 0,
+    delay_seconds: float = 0,
 ) -> None:
     """Invoke the next iteration
     Args:
@@ -293,8 +307,12 @@ def invoke_next_iteration(
         task_uuid (str): UUID of the task
         session_uuid (str): UUID of the session
         setting (Dict): Dictionary containing settings
+        delay_seconds (float): Seconds before the next iteration runs
     Returns:
         None
+    Raises:
+        Exception: When neither the embedded runtime nor a Lambda invoker is
+            available, since the session would otherwise stall silently
     """
     insert_update_session(
         info,
@@ -309,20 +327,20 @@ def invoke_next_iteration(
     if "" in info.context:
         params.update({"connection_id": info.context[""]})
 
-    invoker = info.context.get("aws_lambda_invoker")
-
-    if callable(invoker):
-        invoker(
-            payload=Invoker.build_invoker_payload(
-                context=info.context,
-                module_name="ai_coordination_engine",
-                class_name="AICoordinationEngine",
-                function_name="async_execute_procedure_task_session",
-                parameters=params,
-            ),
+    if not invoke_async_function(
+        info,
+        "async_execute_procedure_task_session",
+        params,
+        delay_seconds=delay_seconds,
+    ):
+        raise Exception(
+            "No invoker is available to run the next iteration of session "
+            f"{session_uuid}. Enable the embedded runtime or provide "
+            "aws_lambda_invoker."
         )
 
 
+@span_decorator("poll.async_task")
 def _process_task_completion(
     info: ResolveInfo,
     async_task_uuid: str,
@@ -333,6 +351,7 @@ def _process_task_completion(
     timeout = 60
 
     while time.time() - start <= timeout:
+        increment_span_attribute("polls")
         task = get_async_task(
             info.context,
             functionName="async_execute_ask_model",
@@ -513,6 +532,7 @@ def async_orchestrate_task_query(
     return
 
 
+@span_decorator("poll.session_status")
 def _check_session_status(
     info: ResolveInfo, **kwargs: Dict[str, Any]
 ) -> SessionType | None:
@@ -540,6 +560,7 @@ def _check_session_status(
     timeout_seconds = 60
 
     while time.time() - start < timeout_seconds:
+        increment_span_attribute("polls")
         session = resolve_session(
             info,
             coordination_uuid=kwargs["coordination_uuid"],
@@ -615,6 +636,7 @@ def _handle_no_ready_agents(
         agent.state in ["initial", "pending", "executing"]
         for agent in session_agent_list.session_agent_list
     ):
+        _requeue_orphaned_agents(info, session_agent_list)
         _handle_pending_agents(info, session)
     else:
         insert_update_session(
@@ -629,6 +651,43 @@ def _handle_no_ready_agents(
     return
 
 
+def _requeue_orphaned_agents(
+    info: ResolveInfo, session_agent_list: SessionAgentListType
+) -> int:
+    """Put runnable agents whose claim was lost (no ready_key, lease expired) back on the ready queue.
+
+    A worker removes ready_key when it claims an agent; if it dies before moving the
+    agent out of its ready state, the agent would otherwise never be dequeued again.
+
+    Returns:
+        int: Number of requeued session agents
+    """
+    lease_expired_at = pendulum.now("UTC").subtract(seconds=READY_CLAIM_LEASE_SECONDS)
+    requeued = 0
+    for agent in session_agent_list.session_agent_list:
+        if (
+            agent.in_degree != 0
+            or agent.state not in READY_STATES
+            or agent.ready_key is not None
+        ):
+            continue
+
+        updated_at = (
+            pendulum.parse(agent.updated_at)
+            if isinstance(agent.updated_at, str)
+            else pendulum.instance(agent.updated_at)
+        )
+        if updated_at > lease_expired_at:
+            continue
+
+        info.context["logger"].warning(
+            f"Requeueing session_agent {agent.session_agent_uuid} after an expired claim."
+        )
+        requeue_session_agent(info, agent)
+        requeued += 1
+    return requeued
+
+
 def _handle_pending_agents(info: ResolveInfo, session: SessionType) -> None:
     """Handle pending agents and iteration logic
     Args:
@@ -644,7 +703,6 @@ def _handle_pending_agents(info: ResolveInfo, session: SessionType) -> None:
     )
 
     session.iteration_count += 1
-    MAX_ITERATIONS = 10
 
     if session.iteration_count >= MAX_ITERATIONS:
         info.context["logger"].error(
@@ -678,12 +736,12 @@ def _handle_pending_agents(info: ResolveInfo, session: SessionType) -> None:
         },
     )
 
-    time.sleep(10)
     invoke_next_iteration(
         info,
         session.coordination_uuid,
         session.session_uuid,
         iteration_count=session.iteration_count,
+        delay_seconds=Config.iteration_backoff_seconds,
     )
     return
 
@@ -736,20 +794,25 @@ def async_execute_procedure_task_session(
         if session is None:
             return
 
-        session_agent_list = resolve_session_agent_list(
-            info,
-            **{
-                "session_uuid": session.session_uuid,
-            },
+        # Claim runnable agents from the sparse ready index; the full agent
+        # list is only read when there is nothing left to run.
+        ready_session_agents = dequeue_ready_session_agents(
+            info, session.session_uuid
         )
-
-        ready_session_agents = [
-            agent
-            for agent in session_agent_list.session_agent_list
-            if agent.in_degree == 0 and agent.state in ["initial", "pending"]
-        ]
+        if not ready_session_agents:
+            # The index is eventually consistent, so one empty read is not proof
+            time.sleep(READY_INDEX_RETRY_SECONDS)
+            ready_session_agents = dequeue_ready_session_agents(
+                info, session.session_uuid
+            )
 
         if not ready_session_agents:
+            session_agent_list = resolve_session_agent_list(
+                info,
+                **{
+                    "session_uuid": session.session_uuid,
+                },
+            )
             _handle_no_ready_agents(info, session, session_agent_list)
             return
 
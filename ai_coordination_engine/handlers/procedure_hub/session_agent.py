@@ -9,7 +9,6 @@ import traceback
 from typing import Any, Dict, List, Tuple
 
 from graphene import ResolveInfo
-from silvaengine_utility.invoker import Invoker
 from silvaengine_utility.serializer import Serializer
 
 from ...models.session import insert_update_session
@@ -18,14 +17,21 @@ from ...models.session_agent import (
     resolve_session_agent,
     resolve_session_agent_list,
 )
-from ...models.session_run import insert_update_session_run, resolve_session_run_list
+from ...models.session_run import (
+    complete_session_run,
+    insert_update_session_run,
+    resolve_session_run_list,
+)
 from ...types.session import SessionType
 from ...types.session_agent import SessionAgentType
+from ...utils.payload_store import resolve_payload, resolve_subtask_queries
+from ...utils.spans import increment_span_attribute
 from ..ai_coordination_utility import (
     ensure_coordination_data,
     ensure_task_data,
     get_async_task,
     invoke_ask_model,
+    invoke_async_function,
 )
 from ..config import Config
 
@@ -67,7 +73,7 @@ def init_session_agents(
         for subtask_query in list(
             filter(
                 lambda x: x["agent_uuid"] == agent["agent_uuid"],
-                session.subtask_queries,
+                resolve_subtask_queries(session.subtask_queries),
             )
         ):
             session_agent = insert_update_session_agent(
@@ -309,6 +315,7 @@ def update_session_agent(info: ResolveInfo, **kwargs: Dict[str, Any]) -> None:
         POLL_INTERVAL = 1  # seconds
 
         while time.time() - start_time < TIMEOUT:
+            increment_span_attribute("polls")
             async_task = get_async_task(
                 info.context,
                 **{
@@ -318,6 +325,14 @@ def update_session_agent(info: ResolveInfo, **kwargs: Dict[str, Any]) -> None:
             )
 
             status = async_task["status"]
+            if status in ["completed", "failed"] and kwargs.get("run_uuid"):
+                complete_session_run(
+                    info,
+                    session_agent.session_uuid,
+                    kwargs["run_uuid"],
+                    async_task,
+                    "procedure_hub",
+                )
             if status == "completed":
                 session_agent.agent_output = async_task["result"]
                 break
@@ -363,13 +378,16 @@ def prepare_task_query(
 ) -> Tuple[str, List]:
     """Get agent input from either agent input or task session."""
     subtask_queries = getattr(session, "subtask_queries", [])
-    subtask_query = next(
-        (
-            subtask_query["subtask_query"]
-            for subtask_query in subtask_queries
-            if subtask_query["session_agent_uuid"] == session_agent.session_agent_uuid
-        ),
-        "",
+    subtask_query = resolve_payload(
+        next(
+            (
+                subtask_query["subtask_query"]
+                for subtask_query in subtask_queries
+                if subtask_query["session_agent_uuid"]
+                == session_agent.session_agent_uuid
+            ),
+            "",
+        )
     )
 
     predecessors_outputs = []
@@ -388,8 +406,10 @@ def prepare_task_query(
             continue
 
         if predecessor.agent_output and predecessor.agent_output != "":
+            # Offloaded outputs are fetched only here, when a successor needs them
+            agent_output = resolve_payload(predecessor.agent_output)
             predecessors_outputs.append(
-                f"agent_output({agent['agent_name']}): {predecessor.agent_output}"
+                f"agent_output({agent['agent_name']}): {agent_output}"
             )
         if predecessor.user_input and predecessor.user_input != "":
             predecessors_outputs.append(f"user_input: {predecessor.user_input}")
@@ -503,23 +523,13 @@ def execute_session_agent(info: ResolveInfo, session_agent: SessionAgentType) ->
             "session_uuid": session_agent.session_uuid,
             "session_agent_uuid": session_agent.session_agent_uuid,
             "async_task_uuid": ask_model["async_task_uuid"],
+            "run_uuid": ask_model["current_run_uuid"],
         }
         if "connection_id" in info.context:
             params.update({"connection_id": info.context["connection_id"]})
 
         # Invoke async update function on AWS Lambda
-        invoker = info.context.get("aws_lambda_invoker")
-
-        if callable(invoker):
-            invoker(
-                payload=Invoker.build_invoker_payload(
-                    context=info.context,
-                    module_name="ai_coordination_engine",
-                    class_name="AICoordinationEngine",
-                    function_name="async_update_session_agent",
-                    parameters=params,
-                ),
-            )
+        invoke_async_function(info, "async_update_session_agent", params)
 
         return
 
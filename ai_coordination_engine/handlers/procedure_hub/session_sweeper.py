@@ -0,0 +1,155 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import logging
+import traceback
+from typing import Any, Dict, List, Optional, Tuple
+
+import pendulum
+from graphene import ResolveInfo
+from silvaengine_utility.serializer import Serializer
+
+from ...models.session import SessionModel, insert_update_session
+from ...models.utils import is_index_active
+from ...utils.listener import create_listener_info
+from .procedure_hub_listener import MAX_ITERATIONS, invoke_next_iteration
+
+STALE_SESSION_STATUSES = ["dispatched", "in_progress"]
+DEFAULT_IDLE_SECONDS = 900
+DEFAULT_BATCH_SIZE = 25
+DEFAULT_MAX_SESSIONS = 100
+
+
+def _get_stale_sessions(
+    partition_key: str,
+    idle_before: pendulum.DateTime,
+    statuses: List[str],
+    limit: int,
+    last_evaluated_key: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[SessionModel], Optional[Dict[str, Any]]]:
+    """
+    Read one bounded batch of idle sessions from the sparse active-session index.
+
+    Returns the batch and the key to continue after it (None at the end).
+    """
+    if not is_index_active(SessionModel.active_session_index):
+        results = SessionModel.scan(
+            (SessionModel.partition_key == partition_key)
+            & (SessionModel.updated_at < idle_before)
+            & SessionModel.status.is_in(*statuses),
+            limit=limit,
+            last_evaluated_key=last_evaluated_key,
+        )
+    else:
+        results = SessionModel.active_session_index.query(
+            partition_key,
+            SessionModel.updated_at < idle_before,
+            filter_condition=SessionModel.status.is_in(*statuses),
+            limit=limit,
+            last_evaluated_key=last_evaluated_key,
+        )
+    sessions = list(results)
+    return sessions, results.last_evaluated_key
+
+
+def _fail_session(info: ResolveInfo, session: SessionModel, idle_seconds: int) -> None:
+    insert_update_session(
+        info,
+        **{
+            "coordination_uuid": session.coordination_uuid,
+            "session_uuid": session.session_uuid,
+            "status": "failed",
+            "logs": Serializer.json_dumps(
+                [
+                    {
+                        "error": f"Session was idle in '{session.status}' for more than {idle_seconds} seconds."
+                    }
+                ]
+            ),
+            "updated_by": "session_sweeper",
+        },
+    )
+
+
+def sweep_stale_sessions(
+    logger: logging.Logger, setting: Dict[str, Any], **kwargs: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Find sessions stuck in a non-terminal status and resume or fail them.
+
+    Sessions idle longer than `idle_seconds` are re-invoked through
+    `async_execute_procedure_task_session` while they are below the iteration
+    limit; otherwise, or when `action` is "fail", they are marked failed.
+    Work is done in batches of `batch_size` up to `max_sessions` per call,
+    paging through the index once, so a session that keeps failing is
+    attempted (and reported in `errors`) once per call.
+
+    Args:
+        logger: Logger instance
+        setting: Dictionary containing settings
+        kwargs: Optional idle_seconds, statuses, action ("reinvoke"/"fail"),
+            batch_size and max_sessions; partition_key comes from the context
+
+    Returns:
+        Dict summarizing the number of re-invoked and failed sessions
+    """
+    info = create_listener_info(logger, "sweep_stale_sessions", setting, **kwargs)
+    partition_key = info.context.get("partition_key")
+    if not partition_key:
+        raise ValueError("Invalid required parameter(s)")
+
+    idle_seconds = int(kwargs.get("idle_seconds") or DEFAULT_IDLE_SECONDS)
+    statuses = kwargs.get("statuses") or STALE_SESSION_STATUSES
+    action = kwargs.get("action", "reinvoke")
+    batch_size = int(kwargs.get("batch_size") or DEFAULT_BATCH_SIZE)
+    max_sessions = int(kwargs.get("max_sessions") or DEFAULT_MAX_SESSIONS)
+    idle_before = pendulum.now("UTC").subtract(seconds=idle_seconds)
+
+    summary = {"reinvoked": [], "failed": [], "errors": []}
+    processed = 0
+    # Sessions whose re-invoke or fail raised stay in the idle range, so the
+    # scan continues after the last key instead of starting over
+    last_evaluated_key = None
+    attempted = set()
+    while processed < max_sessions:
+        sessions, last_evaluated_key = _get_stale_sessions(
+            partition_key,
+            idle_before,
+            statuses,
+            min(batch_size, max_sessions - processed),
+            last_evaluated_key=last_evaluated_key,
+        )
+
+        for session in sessions:
+            if session.session_uuid in attempted:
+                continue
+            attempted.add(session.session_uuid)
+            processed += 1
+            try:
+                if action == "reinvoke" and session.iteration_count < MAX_ITERATIONS:
+                    # Bumps updated_at, which moves the session out of the idle range
+                    invoke_next_iteration(
+                        info,
+                        session.coordination_uuid,
+                        session.session_uuid,
+                        iteration_count=int(session.iteration_count) + 1,
+                    )
+                    summary["reinvoked"].append(session.session_uuid)
+                else:
+                    _fail_session(info, session, idle_seconds)
+                    summary["failed"].append(session.session_uuid)
+            except Exception:
+                logger.error(traceback.format_exc())
+                summary["errors"].append(session.session_uuid)
+
+        if last_evaluated_key is None:
+            break
+
+    logger.info(
+        f"Swept {processed} stale session(s) for {partition_key}: "
+        f"{len(summary['reinvoked'])} re-invoked, {len(summary['failed'])} failed."
+    )
+    return summary
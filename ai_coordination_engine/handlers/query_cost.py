@@ -0,0 +1,344 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from graphql import (
+    ArgumentNode,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    IntValueNode,
+    NameNode,
+    OperationDefinitionNode,
+    VariableNode,
+    parse,
+    print_ast,
+)
+
+from ..models.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from .config import Config
+
+
+class QueryCost(object):
+    """
+    Estimated cost of one operation, in DynamoDB/ai_agent_core reads.
+
+    `fixed` is the part that does not scale with page sizes. `pages` holds
+    one entry per root list field: the field node, its page size and the
+    cost of one item of the page.
+    """
+
+    def __init__(self):
+        self.fixed = 0.0
+        self.pages: List[Dict[str, Any]] = []
+
+    @property
+    def total(self) -> int:
+        return int(
+            math.ceil(self.fixed + sum(p["size"] * p["item_cost"] for p in self.pages))
+        )
+
+
+def _get_argument(
+    field: FieldNode, name: str, variables: Dict[str, Any]
+) -> Tuple[Optional[ArgumentNode], Any]:
+    for argument in field.arguments or ():
+        if argument.name.value != name:
+            continue
+        if isinstance(argument.value, VariableNode):
+            return argument, variables.get(argument.value.name.value)
+        return argument, getattr(argument.value, "value", None)
+    return None, None
+
+
+def _get_page_size(field: FieldNode, variables: Dict[str, Any]) -> int:
+    for name in ["first", "limit"]:
+        _, value = _get_argument(field, name, variables)
+        if value is not None:
+            return min(max(int(value), 1), MAX_PAGE_SIZE)
+    return DEFAULT_PAGE_SIZE
+
+
+def _selection_cost(
+    selections: Any,
+    fragments: Dict[str, FragmentDefinitionNode],
+    variables: Dict[str, Any],
+    weights: Dict[str, int],
+    item_field: Optional[str] = None,
+) -> float:
+    """Cost of resolving a selection set once."""
+    fan_out = Config.QUERY_COST_FAN_OUT
+    cost = 0.0
+    for selection in selections or ():
+        if isinstance(selection, FragmentSpreadNode):
+            fragment = fragments.get(selection.name.value)
+            if fragment is not None:
+                cost += _selection_cost(
+                    fragment.selection_set.selections,
+                    fragments,
+                    variables,
+                    weights,
+                    item_field,
+                )
+            continue
+        if isinstance(selection, InlineFragmentNode):
+            cost += _selection_cost(
+                selection.selection_set.selections,
+                fragments,
+                variables,
+                weights,
+                item_field,
+            )
+            continue
+
+        name = selection.name.value
+        children = selection.selection_set.selections if selection.selection_set else ()
+        # The item list inside a list type (sessionList { sessionList { ... } })
+        # is the page already counted by its root field
+        if name != item_field:
+            cost += weights.get(name, 0)
+        # One-to-many fields (sessionAgents) resolve their selection per child
+        cost += fan_out.get(name, 1) * _selection_cost(
+            children, fragments, variables, weights
+        )
+    return cost
+
+
+def estimate_query_cost(
+    document: Any,
+    variables: Optional[Dict[str, Any]] = None,
+    operation_name: Optional[str] = None,
+) -> QueryCost:
+    """
+    Statically estimate the cost of the selected operation of a parsed document.
+
+    Each field adds its `Config.QUERY_COST_WEIGHTS` weight once per parent
+    item. Nested fields such as `asyncTask` are weighted by the calls they
+    make. The selection of a nested one-to-many field is multiplied by its
+    `Config.QUERY_COST_FAN_OUT` (expected children per parent). A root list field adds its own weight once, and the cost of its
+    items times the page size taken from `first` or `limit` (default
+    DEFAULT_PAGE_SIZE, capped at MAX_PAGE_SIZE). A `withTotal` count adds the
+    `withTotal` weight.
+    """
+    variables = variables or {}
+    weights = Config.QUERY_COST_WEIGHTS
+    fragments = {
+        d.name.value: d
+        for d in document.definitions
+        if isinstance(d, FragmentDefinitionNode)
+    }
+    operations = [
+        d
+        for d in document.definitions
+        if isinstance(d, OperationDefinitionNode)
+        and (
+            not operation_name
+            or (d.name is not None and d.name.value == operation_name)
+        )
+    ]
+
+    cost = QueryCost()
+    if not operations:
+        return cost
+
+    for field in _get_root_fields(operations[0].selection_set.selections, fragments):
+        name = field.name.value
+        cost.fixed += weights.get(name, 0)
+        children = field.selection_set.selections if field.selection_set else ()
+        if not name.endswith("List"):
+            cost.fixed += _selection_cost(children, fragments, variables, weights)
+            continue
+
+        _, with_total = _get_argument(field, "withTotal", variables)
+        if with_total:
+            cost.fixed += weights.get("withTotal", 0)
+        cost.pages.append(
+            {
+                "field": field,
+                "size": _get_page_size(field, variables),
+                "item_cost": _selection_cost(
+                    children, fragments, variables, weights, item_field=name
+                ),
+            }
+        )
+    return cost
+
+
+def _get_root_fields(
+    selections: Any, fragments: Dict[str, FragmentDefinitionNode]
+) -> List[FieldNode]:
+    fields = []
+    for selection in selections or ():
+        if isinstance(selection, FieldNode):
+            fields.append(selection)
+        elif isinstance(selection, InlineFragmentNode):
+            fields.extend(
+                _get_root_fields(selection.selection_set.selections, fragments)
+            )
+        elif isinstance(selection, FragmentSpreadNode):
+            fragment = fragments.get(selection.name.value)
+            if fragment is not None:
+                fields.extend(
+                    _get_root_fields(fragment.selection_set.selections, fragments)
+                )
+    return fields
+
+
+def degrade_query(
+    cost: QueryCost, budget: int, variables: Dict[str, Any]
+) -> Optional[QueryCost]:
+    """
+    Shrink the page sizes of root list fields so the cost fits the budget.
+
+    The field arguments (or the variables they reference) are rewritten in
+    place. Returns None when even one item per page does not fit.
+    """
+    scalable = sum(p["size"] * p["item_cost"] for p in cost.pages)
+    if not scalable or cost.fixed + sum(p["item_cost"] for p in cost.pages) > budget:
+        return None
+
+    factor = (budget - cost.fixed) / scalable
+    for page in cost.pages:
+        size = max(1, int(page["size"] * factor))
+        if size >= page["size"]:
+            continue
+        page["size"] = size
+
+        field = page["field"]
+        # Cursor requests (first/after) ignore limit
+        name = (
+            "first"
+            if _get_argument(field, "first", variables)[1] is not None
+            or _get_argument(field, "after", variables)[1] is not None
+            else "limit"
+        )
+        argument, _ = _get_argument(field, name, variables)
+        if argument is not None and isinstance(argument.value, VariableNode):
+            variables[argument.value.name.value] = size
+            continue
+
+        value = IntValueNode(value=str(size))
+        arguments = [a for a in field.arguments or () if a is not argument]
+        arguments.append(ArgumentNode(name=NameNode(value=name), value=value))
+        field.arguments = tuple(arguments)
+    return cost if cost.total <= budget else None
+
+
+class PartitionBudget(object):
+    """
+    Token bucket of query cost per partition_key.
+
+    Each partition may spend `budget` per `window` seconds, refilled
+    continuously. The bucket is per container, like the L1 caches.
+    """
+
+    def __init__(self, budget: int, window: int):
+        self.budget = budget
+        self.window = window
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def remaining(self, partition_key: str) -> float:
+        with self._lock:
+            return self._refill(partition_key)
+
+    def spend(self, partition_key: str, cost: int) -> float:
+        with self._lock:
+            tokens = self._refill(partition_key) - cost
+            self._buckets[partition_key] = (tokens, time.monotonic())
+            return tokens
+
+    def _refill(self, partition_key: str) -> float:
+        tokens, updated_at = self._buckets.get(
+            partition_key, (float(self.budget), time.monotonic())
+        )
+        now = time.monotonic()
+        tokens = min(
+            float(self.budget),
+            tokens + (now - updated_at) * self.budget / max(self.window, 1),
+        )
+        self._buckets[partition_key] = (tokens, now)
+        return tokens
+
+
+_partition_budget: Optional[PartitionBudget] = None
+
+
+def get_partition_budget() -> PartitionBudget:
+    global _partition_budget
+    if (
+        _partition_budget is None
+        or _partition_budget.budget != Config.query_cost_budget
+        or _partition_budget.window != Config.query_cost_window
+    ):
+        _partition_budget = PartitionBudget(
+            Config.query_cost_budget, Config.query_cost_window
+        )
+    return _partition_budget
+
+
+def check_query_cost(
+    logger: logging.Logger, params: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """
+    Estimate a GraphQL request's cost and enforce the per-request and per-partition limits.
+
+    Over-limit requests raise an exception, or with `query_cost_mode`
+    "degrade" have their page sizes reduced to fit (`params` is rewritten).
+    Returns the summary for the response `extensions`, or None when the
+    estimator is disabled or the query does not parse (execution reports the
+    syntax error).
+    """
+    if not Config.QUERY_COST_ENABLED or not params.get("query"):
+        return None
+    try:
+        document = parse(params["query"])
+    except GraphQLError:
+        return None
+
+    variables = params.get("variables") or {}
+    operation_name = params.get("operation_name") or params.get("operationName")
+    cost = estimate_query_cost(document, variables, operation_name)
+    estimated = cost.total
+
+    partition_key = (params.get("context") or {}).get("partition_key") or "default"
+    budget = get_partition_budget()
+    limit = int(min(Config.query_cost_max, budget.remaining(partition_key)))
+
+    degraded = False
+    if estimated > limit:
+        if Config.query_cost_mode == "degrade" and degrade_query(
+            cost, limit, variables
+        ):
+            degraded = True
+            params["query"] = print_ast(document)
+            if variables:
+                params["variables"] = variables
+        else:
+            logger.warning(
+                f"Query cost {estimated} exceeds {limit} for partition {partition_key}."
+            )
+            raise Exception(
+                f"Query cost {estimated} exceeds the allowed {limit}. "
+                "Request fewer items per page or fewer nested fields."
+            )
+
+    charged = cost.total
+    remaining = budget.spend(partition_key, charged)
+    return {
+        "estimated": estimated,
+        "charged": charged,
+        "limit": limit,
+        "remaining": int(remaining),
+        "degraded": degraded,
+    }
@@ -0,0 +1,284 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import gzip
+import logging
+import traceback
+from typing import Any, Dict, List, Optional
+
+import pendulum
+from silvaengine_utility.serializer import Serializer
+
+from ..models.batch_loaders.base import normalize_model
+from ..models.session import (
+    ARCHIVED_SESSION_STATUS,
+    TERMINAL_SESSION_STATUSES,
+    SessionModel,
+)
+from ..models.session_agent import SessionAgentModel
+from ..models.session_event import SessionEventModel, merge_session_logs
+from ..models.session_run import SessionRunModel
+from ..models.utils import is_index_active
+from ..utils.listener import create_listener_info
+from ..utils.payload_store import read_object, write_object
+from .config import Config
+
+DEFAULT_OLDER_THAN_DAYS = 30
+DEFAULT_MAX_SESSIONS = 500
+DEFAULT_PAGE_SIZE = 50
+
+
+def is_archive_enabled() -> bool:
+    return bool(Config.archive_bucket_name or Config.archive_local_dir)
+
+
+def _write(key: str, body: bytes) -> None:
+    write_object(
+        key,
+        body,
+        bucket_name=Config.archive_bucket_name,
+        local_dir=Config.archive_local_dir,
+    )
+
+
+def _read(key: str) -> Optional[bytes]:
+    return read_object(
+        key,
+        bucket_name=Config.archive_bucket_name,
+        local_dir=Config.archive_local_dir,
+    )
+
+
+def _archive_key(session: SessionModel) -> str:
+    """Archive objects are partitioned by partition_key and by the session's last update date."""
+    return (
+        f"{Config.archive_key_prefix}/{session.partition_key}"
+        f"/dt={session.updated_at.strftime('%Y-%m-%d')}"
+        f"/{session.coordination_uuid}/{session.session_uuid}.ndjson.gz"
+    )
+
+
+def _index_key(coordination_uuid: str, session_uuid: str) -> str:
+    """Point lookup from session keys to the date-partitioned archive object."""
+    return f"{Config.archive_key_prefix}/index/{coordination_uuid}/{session_uuid}.json"
+
+
+def _query_rows(session: SessionModel) -> Dict[str, List[Any]]:
+    return {
+        "session_agent": list(SessionAgentModel.query(session.session_uuid)),
+        "session_run": list(SessionRunModel.query(session.session_uuid)),
+        "session_event": list(SessionEventModel.query(session.session_uuid)),
+    }
+
+
+def _export_session(session: SessionModel) -> Dict[str, Any]:
+    """Collect a session with its agents, runs and events as NDJSON records."""
+    rows = _query_rows(session)
+    lines = [
+        Serializer.json_dumps({"type": "session", "data": normalize_model(session)})
+    ]
+    for record_type, models in rows.items():
+        lines.extend(
+            Serializer.json_dumps(
+                {"type": record_type, "data": normalize_model(model)}
+            )
+            for model in models
+        )
+    return {
+        "body": gzip.compress("\n".join(lines).encode("utf-8")),
+        "rows": rows,
+    }
+
+
+def _delete_rows(session: SessionModel, rows: Dict[str, List[Any]]) -> None:
+    """
+    Delete the children, then replace the session row with an archived stub.
+
+    The session row goes last, so a failed run is retried by
+    `archive_session`, which then only finishes the deletes. The stub keeps
+    the keys, so resolve_session only reads the archive for sessions that
+    were archived rather than on every miss.
+    """
+    for model_class, models in [
+        (SessionAgentModel, rows["session_agent"]),
+        (SessionRunModel, rows["session_run"]),
+        (SessionEventModel, rows["session_event"]),
+    ]:
+        with model_class.batch_write() as batch:
+            for model in models:
+                batch.delete(model)
+    SessionModel(
+        session.coordination_uuid,
+        session.session_uuid,
+        task_uuid=session.task_uuid,
+        user_id=session.user_id,
+        partition_key=session.partition_key,
+        input_files=[],
+        subtask_queries=[],
+        status=ARCHIVED_SESSION_STATUS,
+        updated_by="session_archive",
+        created_at=session.created_at,
+        updated_at=session.updated_at,
+    ).save()
+
+
+def archive_session(logger: logging.Logger, session: SessionModel) -> Dict[str, int]:
+    """
+    Write one terminal session to cold storage, then remove it from the hot tables.
+
+    The index object is written after the archive object, so its presence
+    means a complete archive exists. A retry after a failed delete then only
+    finishes the deletes; re-exporting would overwrite the archive with the
+    rows that were left.
+    """
+    index_key = _index_key(session.coordination_uuid, session.session_uuid)
+    if _read(index_key) is not None:
+        logger.warning(
+            f"Session {session.session_uuid} is already archived; finishing its deletes."
+        )
+        rows = _query_rows(session)
+    else:
+        export = _export_session(session)
+        key = _archive_key(session)
+        _write(key, export["body"])
+        _write(
+            index_key,
+            Serializer.json_dumps(
+                {
+                    "key": key,
+                    "archived_at": pendulum.now("UTC").to_iso8601_string(),
+                }
+            ).encode("utf-8"),
+        )
+        rows = export["rows"]
+    _delete_rows(session, rows)
+
+    from ..models.cache import purge_entity_cascading_cache
+
+    purge_entity_cascading_cache(
+        logger,
+        entity_type="session",
+        context_keys=None,
+        entity_keys={
+            "coordination_uuid": session.coordination_uuid,
+            "session_uuid": session.session_uuid,
+        },
+        cascade_depth=3,
+    )
+    return {k: len(v) for k, v in rows.items()}
+
+
+def archive_sessions(
+    logger: logging.Logger, setting: Dict[str, Any], **kwargs: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Move terminal sessions older than `older_than_days` to cold storage.
+
+    Candidates are read from the partition_key GSI by updated_at, so only the
+    caller's partition is touched. Each session is exported with its agents,
+    runs and events as gzip NDJSON under partition_key/date, then deleted from
+    DynamoDB in batches, leaving an "archived" stub of the session row.
+
+    Args:
+        logger: Logger instance
+        setting: Dictionary containing settings
+        kwargs: Optional older_than_days, max_sessions and dry_run;
+            partition_key comes from the context
+
+    Returns:
+        Dict summarizing archived sessions and row counts
+    """
+    info = create_listener_info(logger, "archive_sessions", setting, **kwargs)
+    partition_key = info.context.get("partition_key")
+    if not partition_key:
+        raise ValueError("Invalid required parameter(s)")
+    if not is_archive_enabled():
+        raise ValueError("Neither archive_bucket_name nor archive_local_dir is set.")
+
+    older_than_days = int(kwargs.get("older_than_days") or DEFAULT_OLDER_THAN_DAYS)
+    max_sessions = int(kwargs.get("max_sessions") or DEFAULT_MAX_SESSIONS)
+    dry_run = bool(kwargs.get("dry_run", False))
+    cutoff = pendulum.now("UTC").subtract(days=older_than_days)
+
+    summary = {
+        "archived": [],
+        "errors": [],
+        "rows": {"session_agent": 0, "session_run": 0, "session_event": 0},
+        "dry_run": dry_run,
+    }
+    if is_index_active(SessionModel.partition_key_index):
+        sessions = SessionModel.partition_key_index.query(
+            partition_key,
+            SessionModel.updated_at < cutoff,
+            filter_condition=SessionModel.status.is_in(*TERMINAL_SESSION_STATUSES),
+            limit=max_sessions,
+            page_size=DEFAULT_PAGE_SIZE,
+        )
+    else:
+        sessions = SessionModel.scan(
+            (SessionModel.partition_key == partition_key)
+            & (SessionModel.updated_at < cutoff)
+            & SessionModel.status.is_in(*TERMINAL_SESSION_STATUSES),
+            limit=max_sessions,
+            page_size=DEFAULT_PAGE_SIZE,
+        )
+    for session in sessions:
+        if dry_run:
+            summary["archived"].append(session.session_uuid)
+            continue
+        try:
+            for record_type, count in archive_session(logger, session).items():
+                summary["rows"][record_type] += count
+            summary["archived"].append(session.session_uuid)
+        except Exception:
+            logger.error(traceback.format_exc())
+            summary["errors"].append(session.session_uuid)
+
+    logger.info(
+        f"Archived {len(summary['archived'])} session(s) for {partition_key} "
+        f"older than {cutoff.to_date_string()}"
+        f"{' (dry run)' if dry_run else ''}: {Serializer.json_dumps(summary['rows'])}."
+    )
+    return summary
+
+
+def load_archived_session(
+    coordination_uuid: str, session_uuid: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Read an archived session back as a read-only dict.
+
+    The session's agents and runs are embedded as lists, which the nested
+    SessionType resolvers return as is, and its event log is folded into `logs`.
+    Nothing is written back to DynamoDB.
+    """
+    if not is_archive_enabled():
+        return None
+
+    index = _read(_index_key(coordination_uuid, session_uuid))
+    if index is None:
+        return None
+    index = Serializer.json_loads(index.decode("utf-8"))
+    body = _read(index["key"])
+    if body is None:
+        return None
+
+    session = None
+    records = {"session_agent": [], "session_run": [], "session_event": []}
+    for line in gzip.decompress(body).decode("utf-8").splitlines():
+        record = Serializer.json_loads(line)
+        if record["type"] == "session":
+            session = record["data"]
+        else:
+            records[record["type"]].append(record["data"])
+    if session is None:
+        return None
+
+    session["logs"] = merge_session_logs(session.get("logs"), records["session_event"])
+    session["session_agents"] = records["session_agent"]
+    session["session_runs"] = records["session_run"]
+    session["archived_at"] = index["archived_at"]
+    return session
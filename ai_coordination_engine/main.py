@@ -7,14 +7,21 @@ __author__ = "bibow"
 import logging
 from typing import Any, Dict, List
 
-from graphene import Schema
 from silvaengine_dynamodb_base import BaseModel
 from silvaengine_utility import Debugger, Graphql
 
+from .handlers import cache_invalidation, query_cost, session_archive
 from .handlers.config import Config
+from .handlers.embedded_runtime import start_embedded_runtime
 from .handlers.operation_hub import operation_hub_listener
-from .handlers.procedure_hub import procedure_hub_listener
+from .handlers.procedure_hub import procedure_hub_listener, session_sweeper
+from .models.cache_metrics import log_cache_stats
+from .models.response_cache import execute_with_response_cache
 from .schema import Mutations, Query, type_class
+from .utils.extensions import add_response_extensions
+from .utils.instrumentation import track_request_usage, track_usage
+from .utils.spans import TRACE_CONTEXT_PARAMETER, invocation_span, start_span
+from .utils.tracing import TracingSchema, trace_request
 
 
 # Hook function applied to deployment
@@ -65,6 +72,10 @@ def deploy() -> List:
                             "action": "askOperationHub",
                             "label": "Ask Operation Hub",
                         },
+                        {
+                            "action": "cacheStats",
+                            "label": "View Cache Stats",
+                        },
                     ],
                     "mutation": [
                         {
@@ -147,6 +158,36 @@ def deploy() -> List:
                     "settings": "beta_core_ai_agent",
                     "disabled_in_resources": True,  # Ignore adding to resource list.
                 },
+                "sweep_stale_sessions": {
+                    "is_static": False,
+                    "label": "Sweep Stale Sessions",
+                    "type": "Event",
+                    "support_methods": ["POST"],
+                    "is_auth_required": False,
+                    "is_graphql": False,
+                    "settings": "beta_core_ai_agent",
+                    "disabled_in_resources": True,  # Ignore adding to resource list.
+                },
+                "archive_sessions": {
+                    "is_static": False,
+                    "label": "Archive Sessions",
+                    "type": "Event",
+                    "support_methods": ["POST"],
+                    "is_auth_required": False,
+                    "is_graphql": False,
+                    "settings": "beta_core_ai_agent",
+                    "disabled_in_resources": True,  # Ignore adding to resource list.
+                },
+                "invalidate_cache_from_stream": {
+                    "is_static": False,
+                    "label": "Invalidate Cache From Stream",
+                    "type": "Event",
+                    "support_methods": ["POST"],
+                    "is_auth_required": False,
+                    "is_graphql": False,
+                    "settings": "beta_core_ai_agent",
+                    "disabled_in_resources": True,  # Ignore adding to resource list.
+                },
             },
         }
     ]
@@ -168,6 +209,11 @@ class AICoordinationEngine(Graphql):
         # Initialize configuration via the Config class
         Config.initialize(logger, **setting)
 
+        if Config.EMBEDDED_RUNTIME_ENABLED:
+            start_embedded_runtime(
+                self, logger=logger, max_workers=Config.embedded_runtime_workers
+            )
+
     def _apply_partition_defaults(self, params: Dict[str, Any]) -> None:
         """
         Apply default partition values if not provided in params.
@@ -205,6 +251,8 @@ class AICoordinationEngine(Graphql):
             else:
                 params["context"]["partition_key"] = f"{endpoint_id}#{part_id}"
 
+    @invocation_span
+    @track_usage
     def async_insert_update_session(self, **params: Dict[str, Any]) -> Any:
         self._apply_partition_defaults(params)
 
@@ -213,6 +261,8 @@ class AICoordinationEngine(Graphql):
         )
         return
 
+    @invocation_span
+    @track_usage
     def async_execute_procedure_task_session(self, **params: Dict[str, Any]) -> Any:
         self._apply_partition_defaults(params)
 
@@ -221,6 +271,8 @@ class AICoordinationEngine(Graphql):
         )
         return
 
+    @invocation_span
+    @track_usage
     def async_update_session_agent(self, **params: Dict[str, Any]) -> Any:
         self._apply_partition_defaults(params)
 
@@ -229,6 +281,8 @@ class AICoordinationEngine(Graphql):
         )
         return
 
+    @invocation_span
+    @track_usage
     def async_orchestrate_task_query(self, **params: Dict[str, Any]) -> Any:
         self._apply_partition_defaults(params)
 
@@ -237,6 +291,29 @@ class AICoordinationEngine(Graphql):
         )
         return
 
+    @invocation_span
+    @track_usage
+    def sweep_stale_sessions(self, **params: Dict[str, Any]) -> Any:
+        self._apply_partition_defaults(params)
+
+        return session_sweeper.sweep_stale_sessions(
+            self.logger, self.setting, **params
+        )
+
+    @invocation_span
+    @track_usage
+    def archive_sessions(self, **params: Dict[str, Any]) -> Any:
+        self._apply_partition_defaults(params)
+
+        return session_archive.archive_sessions(self.logger, self.setting, **params)
+
+    @invocation_span
+    @track_usage
+    def invalidate_cache_from_stream(self, **params: Dict[str, Any]) -> Any:
+        return cache_invalidation.invalidate_cache_from_stream(
+            self.logger, self.setting, **params
+        )
+
     def ai_coordination_graphql(self, **params: Dict[str, Any]) -> Any:
         """
         Execute a GraphQL query based on the provided parameters.
@@ -249,12 +326,43 @@ class AICoordinationEngine(Graphql):
         """
 
         self._apply_partition_defaults(params)
+        cost = query_cost.check_query_cost(self.logger, params)
 
-        return self.execute(self.__class__.build_graphql_schema(), **params)
+        fields = {
+            "partition_key": params["context"].get("partition_key"),
+            "operation_name": params.get("operation_name")
+            or params.get("operationName"),
+        }
+        try:
+            with start_span(
+                "ai_coordination_graphql",
+                logger=self.logger,
+                trace_context=params.get(TRACE_CONTEXT_PARAMETER),
+                **fields,
+            ), track_request_usage(
+                self.logger, "ai_coordination_graphql", **fields
+            ) as usage, trace_request(
+                self.logger, **fields
+            ) as trace:
+                response = execute_with_response_cache(
+                    params,
+                    lambda: self.execute(
+                        self.__class__.build_graphql_schema(), **params
+                    ),
+                )
+                extensions = {"cost": cost} if cost else {}
+                if usage is not None:
+                    extensions["usage"] = usage.summary()
+                if trace is not None:
+                    trace.finish()
+                    extensions["tracing"] = trace.to_apollo()
+                return add_response_extensions(response, extensions)
+        finally:
+            log_cache_stats(self.logger)
 
     @staticmethod
-    def build_graphql_schema() -> Schema:
-        return Schema(
+    def build_graphql_schema() -> TracingSchema:
+        return TracingSchema(
             query=Query,
             mutation=Mutations,
             types=type_class(),
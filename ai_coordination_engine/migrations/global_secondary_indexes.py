@@ -0,0 +1,213 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Create the global secondary indexes declared on the models on existing tables.
+
+Adding an index to a populated table backfills it in DynamoDB, which can take
+far longer than a Lambda invocation, so this runs from a workstation or a
+deploy job rather than from `initialize_tables`. Until an index reports
+ACTIVE the resolvers keep reading through the scan path (see
+`models.utils.is_index_active`), so the deploy does not have to wait for it.
+
+DynamoDB only accepts one index creation per UpdateTable call; with `--wait`
+each index is awaited before the next one is created, otherwise a run creates
+at most one index per table and is simply re-run until nothing is missing.
+
+Usage:
+    python -m ai_coordination_engine.migrations.global_secondary_indexes \\
+        --region us-east-1 --wait
+"""
+
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import argparse
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import boto3
+from pynamodb.attributes import Attribute
+from pynamodb.indexes import GlobalSecondaryIndex
+
+# Upper bound on waiting for a new index to backfill before giving up
+INDEX_CREATION_TIMEOUT_SECONDS = 1800
+INDEX_POLL_SECONDS = 15
+
+
+def get_models() -> List[Any]:
+    from ..models.coordination import CoordinationModel
+    from ..models.session import SessionModel
+    from ..models.session_agent import SessionAgentModel
+    from ..models.session_event import SessionEventModel
+    from ..models.session_run import SessionRunModel
+    from ..models.task import TaskModel
+    from ..models.task_schedule import TaskScheduleModel
+
+    return [
+        CoordinationModel,
+        SessionModel,
+        SessionAgentModel,
+        SessionEventModel,
+        SessionRunModel,
+        TaskModel,
+        TaskScheduleModel,
+    ]
+
+
+def _get_index_statuses(description: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        index["IndexName"]: index.get("IndexStatus")
+        for index in description.get("GlobalSecondaryIndexes", [])
+    }
+
+
+def _build_create_index(
+    index: GlobalSecondaryIndex, description: Dict[str, Any]
+) -> Dict[str, Any]:
+    key_attributes = [
+        attribute
+        for attribute in vars(type(index)).values()
+        if isinstance(attribute, Attribute)
+        and (attribute.is_hash_key or attribute.is_range_key)
+    ]
+    create_index = {
+        "IndexName": index.Meta.index_name,
+        "KeySchema": [
+            {
+                "AttributeName": attribute.attr_name,
+                "KeyType": "HASH" if attribute.is_hash_key else "RANGE",
+            }
+            for attribute in sorted(key_attributes, key=lambda a: not a.is_hash_key)
+        ],
+        "Projection": {"ProjectionType": index.Meta.projection.projection_type},
+    }
+    provisioned = (
+        description.get("BillingModeSummary", {}).get("BillingMode", "PROVISIONED")
+        == "PROVISIONED"
+    )
+    if provisioned:
+        # Provisioned tables require throughput on every index; default to
+        # the table's own unless the index declares capacity units.
+        table_throughput = description["ProvisionedThroughput"]
+        create_index["ProvisionedThroughput"] = {
+            "ReadCapacityUnits": getattr(
+                index.Meta,
+                "read_capacity_units",
+                table_throughput["ReadCapacityUnits"],
+            ),
+            "WriteCapacityUnits": getattr(
+                index.Meta,
+                "write_capacity_units",
+                table_throughput["WriteCapacityUnits"],
+            ),
+        }
+    return {
+        "AttributeDefinitions": [
+            {"AttributeName": attribute.attr_name, "AttributeType": attribute.attr_type}
+            for attribute in key_attributes
+        ],
+        "GlobalSecondaryIndexUpdates": [{"Create": create_index}],
+    }
+
+
+def wait_for_index(
+    client: Any,
+    table_name: str,
+    index_name: str,
+    timeout: float = INDEX_CREATION_TIMEOUT_SECONDS,
+) -> None:
+    """Block until the index is ACTIVE; raise after `timeout` seconds."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        description = client.describe_table(TableName=table_name)["Table"]
+        if _get_index_statuses(description).get(index_name) == "ACTIVE":
+            return
+        time.sleep(INDEX_POLL_SECONDS)
+
+    raise Exception(
+        f"The {index_name} index on {table_name} is not ACTIVE after {timeout} seconds."
+    )
+
+
+def ensure_global_secondary_indexes(
+    logger: logging.Logger,
+    client: Any,
+    model: Any,
+    wait: bool = False,
+    dry_run: bool = False,
+) -> Dict[str, str]:
+    """
+    Create the indexes declared on `model` that its table does not have yet.
+
+    Returns the status of every declared index after this run: ACTIVE,
+    CREATING, MISSING (another index on the table is still being created)
+    or PLANNED for a dry run.
+    """
+    table_name = model.Meta.table_name
+    description = client.describe_table(TableName=table_name)["Table"]
+    statuses = _get_index_statuses(description)
+
+    report = {}
+    for index in model._indexes.values():
+        if not isinstance(index, GlobalSecondaryIndex):
+            continue
+        index_name = index.Meta.index_name
+        if index_name in statuses:
+            if wait and statuses[index_name] != "ACTIVE":
+                wait_for_index(client, table_name, index_name)
+                statuses[index_name] = "ACTIVE"
+            report[index_name] = statuses[index_name]
+            continue
+        if dry_run:
+            report[index_name] = "PLANNED"
+            continue
+        if any(status != "ACTIVE" for status in statuses.values()):
+            # DynamoDB rejects a second index creation while one is in progress
+            report[index_name] = "MISSING"
+            continue
+
+        client.update_table(
+            TableName=table_name, **_build_create_index(index, description)
+        )
+        logger.info(f"Creating the {index_name} index on {table_name}.")
+        statuses[index_name] = "CREATING"
+        if wait:
+            wait_for_index(client, table_name, index_name)
+            statuses[index_name] = "ACTIVE"
+            logger.info(f"The {index_name} index on {table_name} is ACTIVE.")
+        report[index_name] = statuses[index_name]
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Dict[str, str]]:
+    parser = argparse.ArgumentParser(
+        description="Create missing global secondary indexes on the ai_coordination_engine tables."
+    )
+    parser.add_argument("--region", default=None)
+    parser.add_argument(
+        "--wait",
+        action="store_true",
+        help="Wait for each index to become ACTIVE and create every missing index",
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.getLogger(__name__)
+    client = boto3.client("dynamodb", region_name=args.region)
+    report = {
+        model.Meta.table_name: ensure_global_secondary_indexes(
+            logger, client, model, wait=args.wait, dry_run=args.dry_run
+        )
+        for model in get_models()
+        if model.exists()
+    }
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
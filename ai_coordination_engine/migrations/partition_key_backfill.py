@@ -0,0 +1,552 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Parallel-segment backfill of partition_key for the ace-* tables.
+
+See docs/MIGRATION_PLAN_ENDPOINT_TO_PART.md, section 12. Each table is
+scanned with Segment/TotalSegments across a thread pool; rows without a
+partition_key get one derived from their endpoint_id (or their parent
+session) through batched, conditional TransactWriteItems. Progress is
+checkpointed per segment so an interrupted run resumes where it stopped,
+and consumed capacity is throttled to a configurable budget.
+
+Sessions in an active status also get active_partition_key, so sessions
+already in flight before the active-session index was deployed are found by
+sweep_stale_sessions. Runnable session agents written before the ready index
+get their ready_key, so the orchestrator dequeues them from the index.
+
+Usage:
+    python -m ai_coordination_engine.migrations.partition_key_backfill \\
+        --region us-east-1 --segments 8 --max-capacity 500 --dry-run
+"""
+
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+DEFAULT_TOTAL_SEGMENTS = 8
+DEFAULT_PAGE_SIZE = 500
+DEFAULT_BATCH_SIZE = 25  # Items per TransactWriteItems call
+DEFAULT_CHECKPOINT_DIR = "/tmp/ace_migrations"
+
+
+def _get_table_names() -> Dict[str, str]:
+    from ..models.coordination import CoordinationModel
+    from ..models.session import SessionModel
+    from ..models.session_agent import SessionAgentModel
+    from ..models.session_run import SessionRunModel
+    from ..models.task import TaskModel
+    from ..models.task_schedule import TaskScheduleModel
+
+    return {
+        "coordination": CoordinationModel.Meta.table_name,
+        "task": TaskModel.Meta.table_name,
+        "task_schedule": TaskScheduleModel.Meta.table_name,
+        "session": SessionModel.Meta.table_name,
+        "session_agent": SessionAgentModel.Meta.table_name,
+        "session_run": SessionRunModel.Meta.table_name,
+    }
+
+
+# Key attributes per table; session agents/runs resolve their partition via the session
+TABLE_KEYS = {
+    "coordination": ["partition_key", "coordination_uuid"],
+    "task": ["coordination_uuid", "task_uuid"],
+    "task_schedule": ["task_uuid", "schedule_uuid"],
+    "session": ["coordination_uuid", "session_uuid"],
+    "session_agent": ["session_uuid", "session_agent_uuid"],
+    "session_run": ["session_uuid", "run_uuid"],
+}
+
+
+class CapacityRateLimiter(object):
+    """
+    Shared budget of consumed capacity units per second across all workers.
+
+    Workers report what each request consumed; once the budget for the
+    current second is spent, callers sleep until the next window.
+    """
+
+    def __init__(self, max_units_per_second: Optional[float]):
+        self.max_units_per_second = max_units_per_second
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._consumed = 0.0
+
+    def consume(self, units: float) -> None:
+        if not self.max_units_per_second:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1:
+                self._window_start = now
+                self._consumed = 0.0
+            self._consumed += units
+            overdraft = self._consumed / self.max_units_per_second
+            wait = self._window_start + overdraft - now if overdraft > 1 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class SegmentCheckpoint(object):
+    """Per-table JSON checkpoint holding each segment's LastEvaluatedKey and counters."""
+
+    def __init__(self, checkpoint_dir: str, table_name: str, total_segments: int):
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        self.path = os.path.join(checkpoint_dir, f"{table_name}.json")
+        self._lock = threading.Lock()
+        self.state = {"total_segments": total_segments, "segments": {}}
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                state = json.load(f)
+            if state.get("total_segments") != total_segments:
+                raise ValueError(
+                    f"Checkpoint {self.path} was written with "
+                    f"{state.get('total_segments')} segments, not {total_segments}."
+                )
+            self.state = state
+
+    def get(self, segment: int) -> Dict[str, Any]:
+        return self.state["segments"].setdefault(
+            str(segment),
+            {
+                "last_evaluated_key": None,
+                "done": False,
+                "scanned": 0,
+                "updated": 0,
+                "skipped": 0,
+                "unresolved": 0,
+            },
+        )
+
+    def save(self) -> None:
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.state, f)
+            os.replace(tmp_path, self.path)
+
+    def totals(self) -> Dict[str, int]:
+        totals = {"scanned": 0, "updated": 0, "skipped": 0, "unresolved": 0}
+        for segment in self.state["segments"].values():
+            for k in totals:
+                totals[k] += segment.get(k, 0)
+        return totals
+
+
+class PartitionKeyBackfill(object):
+    def __init__(
+        self,
+        logger: logging.Logger,
+        client: Any = None,
+        total_segments: int = DEFAULT_TOTAL_SEGMENTS,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_capacity_per_second: Optional[float] = None,
+        checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR,
+        default_part_id: Optional[str] = None,
+        dry_run: bool = False,
+    ):
+        self.logger = logger
+        self.client = client or boto3.client("dynamodb")
+        self.total_segments = total_segments
+        self.page_size = page_size
+        self.batch_size = min(batch_size, 100)
+        self.rate_limiter = CapacityRateLimiter(max_capacity_per_second)
+        self.checkpoint_dir = checkpoint_dir
+        self.default_part_id = default_part_id
+        self.dry_run = dry_run
+        self.table_names = _get_table_names()
+        self._session_partition_keys: Dict[tuple, Optional[str]] = {}
+        self._session_lock = threading.Lock()
+
+    # ------- partition_key resolution -------
+
+    def _build_partition_key(self, endpoint_id: Optional[str], part_id=None):
+        if not endpoint_id:
+            return None
+        return f"{endpoint_id}#{part_id or self.default_part_id or endpoint_id}"
+
+    def _get_session_partition_key(self, item: Dict[str, Any]) -> Optional[str]:
+        coordination_uuid = item.get("coordination_uuid", {}).get("S")
+        session_uuid = item["session_uuid"]["S"]
+        cache_key = (coordination_uuid, session_uuid)
+        with self._session_lock:
+            if cache_key in self._session_partition_keys:
+                return self._session_partition_keys[cache_key]
+        if not coordination_uuid:
+            return None
+
+        response = self.client.get_item(
+            TableName=self.table_names["session"],
+            Key={
+                "coordination_uuid": {"S": coordination_uuid},
+                "session_uuid": {"S": session_uuid},
+            },
+            ProjectionExpression="partition_key, endpoint_id, part_id",
+            ReturnConsumedCapacity="TOTAL",
+        )
+        self._consume(response)
+        session = response.get("Item", {})
+        partition_key = session.get("partition_key", {}).get("S") or (
+            self._build_partition_key(
+                session.get("endpoint_id", {}).get("S"),
+                session.get("part_id", {}).get("S"),
+            )
+        )
+        with self._session_lock:
+            self._session_partition_keys[cache_key] = partition_key
+        return partition_key
+
+    def resolve_partition_key(
+        self, entity: str, item: Dict[str, Any]
+    ) -> Optional[str]:
+        partition_key = self._build_partition_key(
+            item.get("endpoint_id", {}).get("S"), item.get("part_id", {}).get("S")
+        )
+        if partition_key is None and entity in ["session_agent", "session_run"]:
+            partition_key = self._get_session_partition_key(item)
+        return partition_key
+
+    # ------- writes -------
+
+    def _consume(self, response: Dict[str, Any]) -> None:
+        consumed = response.get("ConsumedCapacity")
+        if isinstance(consumed, dict):
+            consumed = [consumed]
+        self.rate_limiter.consume(
+            sum(c.get("CapacityUnits", 0) for c in consumed or [])
+        )
+
+    def _build_update(
+        self,
+        table_name: str,
+        key: Dict[str, Any],
+        partition_key: Optional[str] = None,
+        active_partition_key: Optional[str] = None,
+        ready_key: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        # Conditional so rows written by the live service in the meantime are left alone
+        assignments, conditions = [], ["attribute_exists(#hash_key)"]
+        names, values = {"#hash_key": list(key)[0]}, {}
+        if partition_key:
+            assignments.append("partition_key = :partition_key")
+            conditions.append("attribute_not_exists(partition_key)")
+            values[":partition_key"] = {"S": partition_key}
+        if active_partition_key:
+            from ..models.session import ACTIVE_SESSION_STATUSES
+
+            statuses = {
+                f":status_{i}": {"S": status}
+                for i, status in enumerate(ACTIVE_SESSION_STATUSES)
+            }
+            assignments.append("active_partition_key = :active_partition_key")
+            conditions.append("attribute_not_exists(active_partition_key)")
+            conditions.append(f"#status IN ({', '.join(statuses)})")
+            names["#status"] = "status"
+            values[":active_partition_key"] = {"S": active_partition_key}
+            values.update(statuses)
+        if ready_key:
+            # Only while the agent is unchanged since the scan read it
+            assignments.append("ready_key = :ready_key")
+            conditions.append("attribute_not_exists(ready_key)")
+            conditions.append("#updated_at = :updated_at")
+            names["#updated_at"] = "updated_at"
+            values[":ready_key"] = {"S": ready_key["ready_key"]}
+            values[":updated_at"] = {"S": ready_key["updated_at"]}
+        return {
+            "TableName": table_name,
+            "Key": key,
+            "UpdateExpression": f"SET {', '.join(assignments)}",
+            "ConditionExpression": " AND ".join(conditions),
+            "ExpressionAttributeNames": names,
+            "ExpressionAttributeValues": values,
+        }
+
+    def resolve_active_partition_key(
+        self, entity: str, item: Dict[str, Any], partition_key: Optional[str]
+    ) -> Optional[str]:
+        """active_partition_key for an active session still missing one, else None."""
+        from ..models.session import get_active_partition_key
+
+        if entity != "session" or "active_partition_key" in item or not partition_key:
+            return None
+        return get_active_partition_key(
+            item.get("status", {}).get("S", "initial"), partition_key
+        )
+
+    def resolve_ready_key(
+        self, entity: str, item: Dict[str, Any]
+    ) -> Optional[Dict[str, str]]:
+        """
+        ready_key (with the updated_at it was derived from) for a runnable
+        session agent written before the ready index, else None.
+
+        Agents written since always carry state_transitions, so one without
+        ready_key has been claimed and is left alone.
+        """
+        from ..models.session_agent import SessionAgentModel, get_ready_key
+
+        if (
+            entity != "session_agent"
+            or "ready_key" in item
+            or "state_transitions" in item
+            or "updated_at" not in item
+        ):
+            return None
+        session_agent = SessionAgentModel.from_raw_data(item)
+        ready_key = get_ready_key(
+            session_agent.in_degree,
+            session_agent.state,
+            session_agent.agent_action,
+            session_agent.created_at,
+            session_agent.session_agent_uuid,
+        )
+        if ready_key is None:
+            return None
+        return {"ready_key": ready_key, "updated_at": item["updated_at"]["S"]}
+
+    def _write_batch(self, updates: List[Dict[str, Any]]) -> Dict[str, int]:
+        if not updates:
+            return {"updated": 0, "skipped": 0}
+        try:
+            response = self.client.transact_write_items(
+                TransactItems=[{"Update": update} for update in updates],
+                ReturnConsumedCapacity="TOTAL",
+            )
+            self._consume(response)
+            return {"updated": len(updates), "skipped": 0}
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "TransactionCanceledException":
+                raise
+
+        # One item failed its condition (already migrated); apply the rest one by one
+        counts = {"updated": 0, "skipped": 0}
+        for update in updates:
+            try:
+                self._consume(
+                    self.client.update_item(ReturnConsumedCapacity="TOTAL", **update)
+                )
+                counts["updated"] += 1
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+                counts["skipped"] += 1
+        return counts
+
+    # ------- scanning -------
+
+    def _scan_segment(
+        self, entity: str, segment: int, checkpoint: SegmentCheckpoint
+    ) -> None:
+        table_name = self.table_names[entity]
+        key_names = TABLE_KEYS[entity]
+        state = checkpoint.get(segment)
+        if state["done"]:
+            return
+
+        while True:
+            scan_kwargs = {
+                "TableName": table_name,
+                "Segment": segment,
+                "TotalSegments": self.total_segments,
+                "Limit": self.page_size,
+                "ReturnConsumedCapacity": "TOTAL",
+            }
+            if state["last_evaluated_key"]:
+                scan_kwargs["ExclusiveStartKey"] = state["last_evaluated_key"]
+            response = self.client.scan(**scan_kwargs)
+            self._consume(response)
+
+            updates = []
+            for item in response.get("Items", []):
+                state["scanned"] += 1
+                partition_key = None
+                if "partition_key" not in item:
+                    partition_key = self.resolve_partition_key(entity, item)
+                    if partition_key is None:
+                        state["unresolved"] += 1
+                        continue
+                active_partition_key = self.resolve_active_partition_key(
+                    entity,
+                    item,
+                    partition_key or item.get("partition_key", {}).get("S"),
+                )
+                ready_key = self.resolve_ready_key(entity, item)
+                if (
+                    partition_key is None
+                    and active_partition_key is None
+                    and ready_key is None
+                ):
+                    state["skipped"] += 1
+                    continue
+                if self.dry_run:
+                    state["updated"] += 1
+                    continue
+                updates.append(
+                    self._build_update(
+                        table_name,
+                        {k: item[k] for k in key_names},
+                        partition_key=partition_key,
+                        active_partition_key=active_partition_key,
+                        ready_key=ready_key,
+                    )
+                )
+                if len(updates) >= self.batch_size:
+                    counts = self._write_batch(updates)
+                    state["updated"] += counts["updated"]
+                    state["skipped"] += counts["skipped"]
+                    updates = []
+
+            counts = self._write_batch(updates)
+            state["updated"] += counts["updated"]
+            state["skipped"] += counts["skipped"]
+
+            state["last_evaluated_key"] = response.get("LastEvaluatedKey")
+            state["done"] = state["last_evaluated_key"] is None
+            if not self.dry_run:
+                checkpoint.save()
+            if state["done"]:
+                return
+
+    def migrate_table(self, entity: str) -> Dict[str, int]:
+        table_name = self.table_names[entity]
+        checkpoint = SegmentCheckpoint(
+            os.path.join(self.checkpoint_dir, "dry_run" if self.dry_run else ""),
+            table_name,
+            self.total_segments,
+        )
+        if self.dry_run:  # A dry run always starts from the beginning
+            checkpoint.state["segments"] = {}
+        # Create every segment's state up front so workers never resize the dict
+        for segment in range(self.total_segments):
+            checkpoint.get(segment)
+
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=self.total_segments) as executor:
+            futures = [
+                executor.submit(self._scan_segment, entity, segment, checkpoint)
+                for segment in range(self.total_segments)
+            ]
+            for future in futures:
+                future.result()
+
+        totals = checkpoint.totals()
+        self.logger.info(
+            f"{'[dry run] ' if self.dry_run else ''}{table_name}: "
+            f"{json.dumps(totals)} in {time.time() - started:.1f}s."
+        )
+        return totals
+
+    def verify_table(self, entity: str) -> Dict[str, int]:
+        """Count all rows and rows still missing partition_key with a parallel COUNT scan."""
+        table_name = self.table_names[entity]
+
+        def count_segment(segment: int) -> Dict[str, int]:
+            counts = {"total": 0, "missing_partition_key": 0}
+            last_evaluated_key = None
+            while True:
+                scan_kwargs = {
+                    "TableName": table_name,
+                    "Segment": segment,
+                    "TotalSegments": self.total_segments,
+                    "ProjectionExpression": "partition_key",
+                    "ReturnConsumedCapacity": "TOTAL",
+                }
+                if last_evaluated_key:
+                    scan_kwargs["ExclusiveStartKey"] = last_evaluated_key
+                response = self.client.scan(**scan_kwargs)
+                self._consume(response)
+                for item in response.get("Items", []):
+                    counts["total"] += 1
+                    if "partition_key" not in item:
+                        counts["missing_partition_key"] += 1
+                last_evaluated_key = response.get("LastEvaluatedKey")
+                if last_evaluated_key is None:
+                    return counts
+
+        totals = {"total": 0, "missing_partition_key": 0}
+        with ThreadPoolExecutor(max_workers=self.total_segments) as executor:
+            for counts in executor.map(count_segment, range(self.total_segments)):
+                for k in totals:
+                    totals[k] += counts[k]
+        self.logger.info(f"[verify] {table_name}: {json.dumps(totals)}.")
+        return totals
+
+    def run(
+        self, entities: Optional[List[str]] = None, verify: bool = True
+    ) -> Dict[str, Dict[str, Any]]:
+        """Backfill (or dry-run) the given tables in order, then verify them."""
+        report = {}
+        # Sessions go first so session agents/runs can inherit their partition_key
+        for entity in entities or [e for e in TABLE_KEYS if e != "coordination"]:
+            report[entity] = {"migration": self.migrate_table(entity)}
+            if verify:
+                report[entity]["verify"] = self.verify_table(entity)
+        return report
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    parser = argparse.ArgumentParser(
+        description="Backfill partition_key on the ai_coordination_engine tables."
+    )
+    parser.add_argument(
+        "--tables",
+        nargs="*",
+        choices=list(TABLE_KEYS),
+        help=(
+            "Tables to migrate (default: all except coordination, "
+            "whose hash key is already partition_key)"
+        ),
+    )
+    parser.add_argument("--region", default=None)
+    parser.add_argument("--segments", type=int, default=DEFAULT_TOTAL_SEGMENTS)
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument(
+        "--max-capacity",
+        type=float,
+        default=None,
+        help="Consumed capacity units per second across all segments",
+    )
+    parser.add_argument("--checkpoint-dir", default=DEFAULT_CHECKPOINT_DIR)
+    parser.add_argument(
+        "--part-id",
+        default=None,
+        help="part_id for rows without one (default: the row's endpoint_id)",
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--no-verify", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    backfill = PartitionKeyBackfill(
+        logging.getLogger(__name__),
+        client=boto3.client("dynamodb", region_name=args.region),
+        total_segments=args.segments,
+        page_size=args.page_size,
+        batch_size=args.batch_size,
+        max_capacity_per_second=args.max_capacity,
+        checkpoint_dir=args.checkpoint_dir,
+        default_part_id=args.part_id,
+        dry_run=args.dry_run,
+    )
+    report = backfill.run(args.tables, verify=not args.no_verify)
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import base64
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict
+
+from boto3.dynamodb.types import Binary, TypeDeserializer
+from pynamodb.attributes import Attribute
+from pynamodb.constants import BINARY, LIST, MAP
+
+FORMAT_VERSION = 1
+CODEC_ZLIB = 1
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray, Binary)):
+        return base64.b64encode(bytes(value)).decode("ascii")
+    if isinstance(value, set):
+        return sorted(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _plain(value: Any) -> Any:
+    """Convert boto3-deserialized legacy values (Decimal, Binary, sets) to JSON types."""
+    return json.loads(json.dumps(value, default=_json_default))
+
+
+def pack_json(value: Any) -> bytes:
+    """Encode a value as version byte + codec byte + zlib-compressed compact JSON."""
+    payload = json.dumps(value, separators=(",", ":"), default=_json_default)
+    return bytes([FORMAT_VERSION, CODEC_ZLIB]) + zlib.compress(
+        payload.encode("utf-8"), 6
+    )
+
+
+def unpack_json(data: bytes) -> Any:
+    if len(data) < 2 or data[0] != FORMAT_VERSION:
+        raise ValueError("Unsupported compressed attribute format.")
+    if data[1] != CODEC_ZLIB:
+        raise ValueError(f"Unsupported compressed attribute codec: {data[1]}.")
+    return json.loads(zlib.decompress(data[2:]).decode("utf-8"))
+
+
+class PackedJSON(object):
+    """
+    Undecoded value of a CompressedJSONAttribute.
+
+    Holds either the packed bytes or, for rows written before the attribute
+    was compressed, the raw DynamoDB L/M value. Decoding is deferred until the
+    attribute is first read from the model.
+    """
+
+    def __init__(self, packed: bytes = None, legacy: Dict[str, Any] = None):
+        self.packed = packed
+        self.legacy = legacy
+
+    def decode(self) -> Any:
+        if self.packed is not None:
+            return unpack_json(self.packed)
+        return _plain(TypeDeserializer().deserialize(self.legacy))
+
+
+def decode_packed_values(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode any PackedJSON values in a model's attribute_values dict."""
+    return {
+        k: (v.decode() if isinstance(v, PackedJSON) else v) for k, v in values.items()
+    }
+
+
+class CompressedJSONAttribute(Attribute):
+    """
+    Stores a JSON-compatible list/dict as a compressed binary (B) attribute.
+
+    Reads accept both the binary format and the legacy list/map format, so
+    existing rows keep working and are rewritten compressed on their next
+    save. Values are decoded lazily on first attribute access.
+    """
+
+    attr_type = BINARY
+
+    def serialize(self, value: Any) -> bytes:
+        if isinstance(value, PackedJSON):
+            if value.packed is not None:
+                return value.packed
+            value = value.decode()
+        return pack_json(value)
+
+    def get_value(self, value: Dict[str, Any]) -> Any:
+        # Keep the type tag so deserialize() can tell binary from legacy maps
+        return value
+
+    def deserialize(self, value: Any) -> PackedJSON:
+        if BINARY in value:
+            packed = value[BINARY]
+            if isinstance(packed, str):
+                packed = base64.b64decode(packed)
+            return PackedJSON(packed=bytes(packed))
+        if LIST in value or MAP in value:
+            return PackedJSON(legacy=value)
+        raise ValueError(f"Unsupported attribute value: {list(value)}.")
+
+    def __get__(self, instance: Any, owner: Any) -> Any:
+        value = super(CompressedJSONAttribute, self).__get__(instance, owner)
+        if instance is not None and isinstance(value, PackedJSON):
+            value = value.decode()
+            instance.attribute_values[self.attr_name] = value
+        return value
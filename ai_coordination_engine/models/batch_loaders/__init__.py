@@ -7,10 +7,12 @@ __author__ = "bibow"
 from typing import Any, Dict
 
 from ...handlers.config import Config
+from ..cache import invalidate_local_cache
 from .async_task_loader import AsyncTaskLoader
 from .coordination_loader import CoordinationLoader
 from .session_agent_loader import SessionAgentLoader
 from .session_agents_by_session_loader import SessionAgentsBySessionLoader
+from .session_events_by_session_loader import SessionEventsBySessionLoader
 from .session_loader import SessionLoader
 from .session_run_loader import SessionRunLoader
 from .session_runs_by_session_loader import SessionRunsBySessionLoader
@@ -28,6 +30,7 @@ __all__ = [
     "SessionRunLoader",
     "SessionAgentsBySessionLoader",
     "SessionRunsBySessionLoader",
+    "SessionEventsBySessionLoader",
 ]
 
 
@@ -71,6 +74,9 @@ class RequestLoaders:
         self.session_runs_by_session_loader = SessionRunsBySessionLoader(
             logger=logger, cache_enabled=cache_enabled
         )
+        self.session_events_by_session_loader = SessionEventsBySessionLoader(
+            logger=logger, cache_enabled=cache_enabled
+        )
         
         # Async task loader
         self.async_task_loader = AsyncTaskLoader(
@@ -92,32 +98,29 @@ class RequestLoaders:
             return
 
         if entity_type == "coordination" and "coordination_uuid" in entity_keys:
-            cache_key = (
-                f"{entity_keys.get('endpoint_id')}:{entity_keys['coordination_uuid']}"
-            )
-            if hasattr(self.coordination_loader, "cache"):
-                self.coordination_loader.cache.delete(cache_key)
+            # Coordination entries are keyed by version, so only the L1 needs dropping
+            invalidate_local_cache("coordination", entity_keys)
 
         elif entity_type == "task" and "task_uuid" in entity_keys:
             cache_key = (
                 f"{entity_keys.get('coordination_uuid')}:{entity_keys['task_uuid']}"
             )
             if hasattr(self.task_loader, "cache"):
-                self.task_loader.cache.delete(cache_key)
+                self.task_loader._cache_delete(cache_key)
 
         elif entity_type == "session" and "session_uuid" in entity_keys:
             cache_key = (
                 f"{entity_keys.get('coordination_uuid')}:{entity_keys['session_uuid']}"
             )
             if hasattr(self.session_loader, "cache"):
-                self.session_loader.cache.delete(cache_key)
+                self.session_loader._cache_delete(cache_key)
             # Also invalidate child loaders
             if hasattr(self.session_agents_by_session_loader, "cache"):
-                self.session_agents_by_session_loader.cache.delete(
+                self.session_agents_by_session_loader._cache_delete(
                     entity_keys["session_uuid"]
                 )
             if hasattr(self.session_runs_by_session_loader, "cache"):
-                self.session_runs_by_session_loader.cache.delete(
+                self.session_runs_by_session_loader._cache_delete(
                     entity_keys["session_uuid"]
                 )
 
@@ -126,26 +129,26 @@ class RequestLoaders:
                 f"{entity_keys.get('session_uuid')}:{entity_keys['session_agent_uuid']}"
             )
             if hasattr(self.session_agent_loader, "cache"):
-                self.session_agent_loader.cache.delete(cache_key)
+                self.session_agent_loader._cache_delete(cache_key)
             # Also invalidate parent session's agent list
             if hasattr(self.session_agents_by_session_loader, "cache"):
-                self.session_agents_by_session_loader.cache.delete(
+                self.session_agents_by_session_loader._cache_delete(
                     entity_keys.get("session_uuid")
                 )
 
         elif entity_type == "session_run" and "run_uuid" in entity_keys:
             cache_key = f"{entity_keys.get('session_uuid')}:{entity_keys['run_uuid']}"
             if hasattr(self.session_run_loader, "cache"):
-                self.session_run_loader.cache.delete(cache_key)
+                self.session_run_loader._cache_delete(cache_key)
             # Also invalidate parent session's run list
             if hasattr(self.session_runs_by_session_loader, "cache"):
-                self.session_runs_by_session_loader.cache.delete(
+                self.session_runs_by_session_loader._cache_delete(
                     entity_keys.get("session_uuid")
                 )
         
         elif entity_type == "async_task" and "async_task_uuid" in entity_keys:
             if hasattr(self.async_task_loader, "cache"):
-                self.async_task_loader.cache.delete(entity_keys["async_task_uuid"])
+                self.async_task_loader._cache_delete(entity_keys["async_task_uuid"])
 
 
 def get_loaders(context: Dict[str, Any]) -> RequestLoaders:
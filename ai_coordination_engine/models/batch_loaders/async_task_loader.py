@@ -4,12 +4,13 @@ from __future__ import print_function
 
 __author__ = "bibow"
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Set
 
 from promise import Promise
 from silvaengine_utility.cache import HybridCacheEngine
 
 from ...handlers.config import Config
+from ..cache import make_tag
 from .base import SafeDataLoader
 
 
@@ -21,6 +22,9 @@ class AsyncTaskLoader(SafeDataLoader):
     to minimize external API calls or database queries.
     """
 
+    cache_name = "async_task"
+    key_fields = ("async_task_uuid",)
+
     def __init__(self, logger=None, cache_enabled=True, context=None, **kwargs):
         """
         Initialize AsyncTaskLoader.
@@ -40,6 +44,9 @@ class AsyncTaskLoader(SafeDataLoader):
                 Config.get_cache_name("models", "async_task")
             )
 
+    def _cache_tags(self, cache_key: str, value: Any) -> Set[str]:
+        return {make_tag("async_task_uuid", cache_key)}
+
     def batch_load_fn(self, async_task_uuids: List[str]) -> Promise:
         """
         Batch load async tasks by their UUIDs.
@@ -58,10 +65,10 @@ class AsyncTaskLoader(SafeDataLoader):
         # Check cache first if enabled
         if self.cache_enabled:
             for uuid in unique_uuids:
-                cached_item = self.cache.get(uuid)
+                cached_item = self._cache_get(uuid)
                 if cached_item:
                     task_map[uuid] = cached_item
-                else:
+                elif not self._is_negative_cached(uuid):
                     uncached_uuids.append(uuid)
         else:
             uncached_uuids = unique_uuids
@@ -71,15 +78,17 @@ class AsyncTaskLoader(SafeDataLoader):
             try:
                 for uuid in uncached_uuids:
                     try:
-                        async_task = self._resolve_async_task(uuid)
+                        async_task = self._fetch_once(
+                            uuid, lambda: self._resolve_async_task(uuid)
+                        )
                         if async_task:
                             task_map[uuid] = async_task
 
                             # Cache the result if enabled
                             if self.cache_enabled:
-                                self.cache.set(
-                                    uuid, async_task, ttl=Config.get_cache_ttl()
-                                )
+                                self._cache_set(uuid, async_task)
+                        else:
+                            self._set_negative_cache(uuid)
                     except Exception as exc:
                         if self.logger:
                             self.logger.warning(f"Failed to resolve async task {uuid}: {exc}")
@@ -102,20 +111,16 @@ class AsyncTaskLoader(SafeDataLoader):
         Returns:
             Dict containing async task data or None if not found
         """
-        try:
-            from ...handlers.ai_coordination_utility import get_async_task
-            
-            # Use the context passed during initialization, with fallback
-            context = self.context.copy() if self.context else {}
-            if "logger" not in context:
-                context["logger"] = self.logger
-            
-            return get_async_task(
-                context,
-                functionName="async_execute_ask_model",
-                asyncTaskUuid=async_task_uuid,
-            )
-        except Exception as exc:
-            if self.logger:
-                self.logger.warning(f"Failed to resolve async task {async_task_uuid}: {exc}")
-            return None
\ No newline at end of file
+        from ...handlers.ai_coordination_utility import get_async_task
+
+        # Use the context passed during initialization, with fallback
+        context = self.context.copy() if self.context else {}
+        if "logger" not in context:
+            context["logger"] = self.logger
+
+        # Errors propagate so that only a clean miss is negatively cached
+        return get_async_task(
+            context,
+            functionName="async_execute_ask_model",
+            asyncTaskUuid=async_task_uuid,
+        )
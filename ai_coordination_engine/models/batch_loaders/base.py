@@ -4,12 +4,23 @@ from __future__ import print_function
 
 __author__ = "bibow"
 
-from typing import Any, Dict
+import time
+from typing import Any, Callable, Dict, Optional, Set, Tuple, Union
 
 from promise.dataloader import DataLoader
 
 from ...handlers.config import Config
 from ...utils.normalization import normalize_to_json
+from ...utils.tracing import get_current_trace, record_loader_batch
+from ..cache import (
+    get_local_cache,
+    get_value_tags,
+    is_negative_cached,
+    make_tag,
+    record_response_tags,
+    set_negative_cache,
+)
+from ..cache_metrics import get_cache_entity_type, get_cache_metrics
 
 
 def normalize_model(model: Any) -> Dict[str, Any]:
@@ -34,8 +45,17 @@ class SafeDataLoader(DataLoader):
 
     All batch loaders should inherit from this class to ensure consistent
     error handling and caching behavior.
+
+    Subclasses set `cache_name` and read/write through `_cache_get` and
+    `_cache_set`, which put a process-level L1 in front of `self.cache`.
+    One-to-one loaders also set `key_fields` so keys that were not found can
+    be negatively cached. Source reads go through `_fetch_once`, so concurrent
+    misses for the same key in this process share one read.
     """
 
+    cache_name: Optional[str] = None
+    key_fields: Tuple[str, ...] = ()
+
     def __init__(self, logger=None, cache_enabled=True, **kwargs):
         """
         Initialize SafeDataLoader.
@@ -48,6 +68,105 @@ class SafeDataLoader(DataLoader):
         super(SafeDataLoader, self).__init__(**kwargs)
         self.logger = logger
         self.cache_enabled = cache_enabled and Config.is_cache_enabled()
+        self.local_cache = (
+            get_local_cache(self.cache_name)
+            if self.cache_enabled and self.cache_name
+            else None
+        )
+        # Load time per key, recorded by _fetch_once for early refresh
+        self._fetch_deltas: Dict[str, float] = {}
+        self.metrics = (
+            get_cache_metrics(
+                Config.get_cache_name("models", self.cache_name),
+                get_cache_entity_type(self.cache_name),
+                "hybrid",
+            )
+            if self.cache_enabled and self.cache_name
+            else None
+        )
+        # Loaders are built per request, so only traced requests pay for this
+        if get_current_trace() is not None:
+            batch_load_fn = self.batch_load_fn
+            loader_name = self.cache_name or self.__class__.__name__
+
+            def traced_batch_load_fn(keys):
+                record_loader_batch(loader_name, len(keys))
+                return batch_load_fn(keys)
+
+            self.batch_load_fn = traced_batch_load_fn
+
+    def _cache_tags(self, cache_key: str, value: Any) -> Set[str]:
+        """Invalidation tags for an L1 entry; list loaders override this."""
+        return get_value_tags(value)
+
+    def _cache_get(self, cache_key: str) -> Any:
+        """Read from the L1, then from the hybrid cache, promoting hits to the L1."""
+        if self.local_cache is not None:
+            value, early_refresh = self.local_cache.lookup(cache_key)
+            if value:
+                record_response_tags(self._cache_tags(cache_key, value))
+                # Entries are shared across requests, so hand out a copy
+                return list(value) if isinstance(value, list) else dict(value)
+            if early_refresh:
+                # The hybrid cache holds the same data; reload from the source
+                return None
+
+        start = time.perf_counter()
+        value = self.cache.get(cache_key)
+        if self.metrics is not None:
+            self.metrics.record_lookup(bool(value), time.perf_counter() - start)
+        if value:
+            tags = self._cache_tags(cache_key, value)
+            record_response_tags(tags)
+            if self.local_cache is not None:
+                self.local_cache.set(cache_key, value, tags=tags)
+        return value
+
+    def _cache_set(self, cache_key: str, value: Any) -> None:
+        """Store a value read from the source; its tags also go to the cached response."""
+        tags = self._cache_tags(cache_key, value)
+        record_response_tags(tags)
+        self.cache.set(cache_key, value, ttl=Config.get_cache_ttl())
+        if self.metrics is not None:
+            self.metrics.record_set(value)
+        if self.local_cache is not None:
+            self.local_cache.set(
+                cache_key,
+                value,
+                tags=tags,
+                delta=self._fetch_deltas.pop(cache_key, 0),
+            )
+
+    def _fetch_once(self, cache_key: str, fetch_fn: Callable[[], Any]) -> Any:
+        """Read a missed key from its source, sharing the read with concurrent misses."""
+        if self.local_cache is None:
+            return fetch_fn()
+        start = time.monotonic()
+        value = self.local_cache.single_flight(cache_key, fetch_fn)
+        self._fetch_deltas[cache_key] = time.monotonic() - start
+        return value
+
+    def _is_negative_cached(self, key: Union[str, Tuple[str, ...]]) -> bool:
+        if self.local_cache is None:
+            return False
+        values = key if isinstance(key, tuple) else (key,)
+        return is_negative_cached(self.cache_name, ":".join(values))
+
+    def _set_negative_cache(self, key: Union[str, Tuple[str, ...]]) -> None:
+        """Mark a key as missing until its entity is created or the short TTL expires."""
+        if self.local_cache is None:
+            return
+        values = key if isinstance(key, tuple) else (key,)
+        set_negative_cache(
+            self.cache_name,
+            ":".join(values),
+            tags={make_tag(f, v) for f, v in zip(self.key_fields, values)},
+        )
+
+    def _cache_delete(self, cache_key: str) -> None:
+        self.cache.delete(cache_key)
+        if self.local_cache is not None:
+            self.local_cache.delete(cache_key)
 
     def dispatch(self):
         """
@@ -10,7 +10,12 @@ from promise import Promise
 from silvaengine_utility.cache import HybridCacheEngine
 
 from ...handlers.config import Config
-from ..coordination import CoordinationModel
+from ..cache import record_response_version
+from ..coordination import (
+    CoordinationModel,
+    get_cached_coordination,
+    get_coordination_versions,
+)
 from .base import SafeDataLoader, normalize_model
 
 Key = Tuple[str, str]  # (partition_key, coordination_uuid)
@@ -21,9 +26,13 @@ class CoordinationLoader(SafeDataLoader):
     Batch loader for CoordinationModel keyed by (partition_key, coordination_uuid).
 
     This loader fetches coordination entities in batches and caches the results
-    to minimize database queries.
+    to minimize database queries. Cache entries are keyed by the coordination's
+    version from the short-lived `coordination_versions` L1, whose misses are
+    read for the whole batch with one BatchGetItem.
     """
 
+    cache_name = "coordination"
+
     def __init__(self, logger=None, cache_enabled=True, **kwargs):
         """
         Initialize CoordinationLoader.
@@ -55,14 +64,24 @@ class CoordinationLoader(SafeDataLoader):
         unique_keys = list(dict.fromkeys(keys))
         key_map: Dict[Key, Dict[str, Any]] = {}
         uncached_keys = []
+        versions: Dict[Key, int] = {}
 
-        # Check cache first if enabled
+        # Check cache first if enabled; entries are keyed by the current version
         if self.cache_enabled:
+            try:
+                versions = get_coordination_versions(unique_keys)
+            except Exception as exc:
+                if self.logger:
+                    self.logger.exception(exc)
             for key in unique_keys:
-                cache_key = f"{key[0]}:{key[1]}"  # partition_key:coordination_uuid
-                cached_item = self.cache.get(cache_key)
+                if key not in versions:
+                    # Missing, or the batch read failed
+                    continue
+                # partition_key:coordination_uuid:version
+                cached_item = self._cache_get(f"{key[0]}:{key[1]}:{versions[key]}")
                 if cached_item:
                     key_map[key] = cached_item
+                    record_response_version(key[0], key[1], versions[key])
                 else:
                     uncached_keys.append(key)
         else:
@@ -73,17 +92,29 @@ class CoordinationLoader(SafeDataLoader):
             try:
                 for partition_key, coordination_uuid in uncached_keys:
                     try:
-                        coordination = CoordinationModel.get(
-                            partition_key, coordination_uuid
+                        version = versions.get((partition_key, coordination_uuid))
+                        coordination = self._fetch_once(
+                            f"{partition_key}:{coordination_uuid}:{version}",
+                            # Served from coordination_models after the batch read
+                            lambda: get_cached_coordination(
+                                partition_key, coordination_uuid
+                            ),
                         )
                         normalized = normalize_model(coordination)
                         key_map[(partition_key, coordination_uuid)] = normalized
+                        record_response_version(
+                            partition_key,
+                            coordination_uuid,
+                            int(coordination.version or 0),
+                        )
 
-                        # Cache the result if enabled
-                        if self.cache_enabled:
-                            cache_key = f"{partition_key}:{coordination_uuid}"
-                            self.cache.set(
-                                cache_key, normalized, ttl=Config.get_cache_ttl()
+                        # Cache the result if enabled and unchanged since the probe
+                        if self.cache_enabled and version == int(
+                            coordination.version or 0
+                        ):
+                            self._cache_set(
+                                f"{partition_key}:{coordination_uuid}:{version}",
+                                normalized,
                             )
                     except CoordinationModel.DoesNotExist:
                         # Coordination not found, leave as None
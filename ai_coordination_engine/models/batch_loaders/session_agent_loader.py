@@ -21,6 +21,9 @@ class SessionAgentLoader(SafeDataLoader):
     Batch loader for SessionAgentModel keyed by (session_uuid, session_agent_uuid).
     """
 
+    cache_name = "session_agent"
+    key_fields = ("session_uuid", "session_agent_uuid")
+
     def __init__(self, logger=None, cache_enabled=True, **kwargs):
         super(SessionAgentLoader, self).__init__(
             logger=logger, cache_enabled=cache_enabled, **kwargs
@@ -48,10 +51,10 @@ class SessionAgentLoader(SafeDataLoader):
         if self.cache_enabled:
             for key in unique_keys:
                 cache_key = f"{key[0]}:{key[1]}"  # session_uuid:session_agent_uuid
-                cached_item = self.cache.get(cache_key)
+                cached_item = self._cache_get(cache_key)
                 if cached_item:
                     key_map[key] = cached_item
-                else:
+                elif not self._is_negative_cached(key):
                     uncached_keys.append(key)
         else:
             uncached_keys = unique_keys
@@ -61,8 +64,11 @@ class SessionAgentLoader(SafeDataLoader):
             try:
                 for session_uuid, session_agent_uuid in uncached_keys:
                     try:
-                        session_agent = SessionAgentModel.get(
-                            session_uuid, session_agent_uuid
+                        session_agent = self._fetch_once(
+                            f"{session_uuid}:{session_agent_uuid}",
+                            lambda: SessionAgentModel.get(
+                                session_uuid, session_agent_uuid
+                            ),
                         )
                         normalized = normalize_model(session_agent)
                         key_map[(session_uuid, session_agent_uuid)] = normalized
@@ -70,11 +76,9 @@ class SessionAgentLoader(SafeDataLoader):
                         # Cache the result if enabled
                         if self.cache_enabled:
                             cache_key = f"{session_uuid}:{session_agent_uuid}"
-                            self.cache.set(
-                                cache_key, normalized, ttl=Config.get_cache_ttl()
-                            )
+                            self._cache_set(cache_key, normalized)
                     except SessionAgentModel.DoesNotExist:
-                        pass
+                        self._set_negative_cache((session_uuid, session_agent_uuid))
 
             except Exception as exc:
                 if self.logger:
@@ -0,0 +1,46 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+from typing import Any, Dict, List
+
+from promise import Promise
+
+from ..session_event import iter_session_events
+from .base import SafeDataLoader, normalize_model
+
+
+class SessionEventsBySessionLoader(SafeDataLoader):
+    """
+    Batch loader for fetching the event log of sessions by session_uuid (one-to-many).
+
+    Events are streamed page by page from the append-only event table. Results
+    are only memoized per request; the log changes with every append, so it is
+    not kept in the shared cache.
+    """
+
+    def batch_load_fn(self, keys: List[str]) -> Promise:
+        """
+        Load the events for multiple session_uuids.
+
+        Args:
+            keys: List of session_uuids (strings)
+
+        Returns:
+            Promise resolving to list of lists of session event dicts
+        """
+        key_map: Dict[str, List[Dict[str, Any]]] = {}
+        try:
+            for session_uuid in dict.fromkeys(keys):
+                key_map[session_uuid] = [
+                    normalize_model(event)
+                    for event in iter_session_events(session_uuid)
+                ]
+        except Exception as exc:
+            if self.logger:
+                self.logger.exception(exc)
+
+        # Return results in same order as input keys, default to empty list
+        return Promise.resolve([key_map.get(key, []) for key in keys])
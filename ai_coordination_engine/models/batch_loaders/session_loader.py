@@ -21,6 +21,9 @@ class SessionLoader(SafeDataLoader):
     Batch loader for SessionModel keyed by (coordination_uuid, session_uuid).
     """
 
+    cache_name = "session"
+    key_fields = ("coordination_uuid", "session_uuid")
+
     def __init__(self, logger=None, cache_enabled=True, **kwargs):
         super(SessionLoader, self).__init__(
             logger=logger, cache_enabled=cache_enabled, **kwargs
@@ -46,10 +49,10 @@ class SessionLoader(SafeDataLoader):
         if self.cache_enabled:
             for key in unique_keys:
                 cache_key = f"{key[0]}:{key[1]}"  # coordination_uuid:session_uuid
-                cached_item = self.cache.get(cache_key)
+                cached_item = self._cache_get(cache_key)
                 if cached_item:
                     key_map[key] = cached_item
-                else:
+                elif not self._is_negative_cached(key):
                     uncached_keys.append(key)
         else:
             uncached_keys = unique_keys
@@ -59,18 +62,19 @@ class SessionLoader(SafeDataLoader):
             try:
                 for coordination_uuid, session_uuid in uncached_keys:
                     try:
-                        session = SessionModel.get(coordination_uuid, session_uuid)
+                        session = self._fetch_once(
+                            f"{coordination_uuid}:{session_uuid}",
+                            lambda: SessionModel.get(coordination_uuid, session_uuid),
+                        )
                         normalized = normalize_model(session)
                         key_map[(coordination_uuid, session_uuid)] = normalized
 
                         # Cache the result if enabled
                         if self.cache_enabled:
                             cache_key = f"{coordination_uuid}:{session_uuid}"
-                            self.cache.set(
-                                cache_key, normalized, ttl=Config.get_cache_ttl()
-                            )
+                            self._cache_set(cache_key, normalized)
                     except SessionModel.DoesNotExist:
-                        pass
+                        self._set_negative_cache((coordination_uuid, session_uuid))
 
             except Exception as exc:
                 if self.logger:
@@ -21,6 +21,9 @@ class SessionRunLoader(SafeDataLoader):
     Batch loader for SessionRunModel keyed by (session_uuid, run_uuid).
     """
 
+    cache_name = "session_run"
+    key_fields = ("session_uuid", "run_uuid")
+
     def __init__(self, logger=None, cache_enabled=True, **kwargs):
         super(SessionRunLoader, self).__init__(
             logger=logger, cache_enabled=cache_enabled, **kwargs
@@ -48,10 +51,10 @@ class SessionRunLoader(SafeDataLoader):
         if self.cache_enabled:
             for key in unique_keys:
                 cache_key = f"{key[0]}:{key[1]}"  # session_uuid:run_uuid
-                cached_item = self.cache.get(cache_key)
+                cached_item = self._cache_get(cache_key)
                 if cached_item:
                     key_map[key] = cached_item
-                else:
+                elif not self._is_negative_cached(key):
                     uncached_keys.append(key)
         else:
             uncached_keys = unique_keys
@@ -61,18 +64,19 @@ class SessionRunLoader(SafeDataLoader):
             try:
                 for session_uuid, run_uuid in uncached_keys:
                     try:
-                        session_run = SessionRunModel.get(session_uuid, run_uuid)
+                        session_run = self._fetch_once(
+                            f"{session_uuid}:{run_uuid}",
+                            lambda: SessionRunModel.get(session_uuid, run_uuid),
+                        )
                         normalized = normalize_model(session_run)
                         key_map[(session_uuid, run_uuid)] = normalized
 
                         # Cache the result if enabled
                         if self.cache_enabled:
                             cache_key = f"{session_uuid}:{run_uuid}"
-                            self.cache.set(
-                                cache_key, normalized, ttl=Config.get_cache_ttl()
-                            )
+                            self._cache_set(cache_key, normalized)
                     except SessionRunModel.DoesNotExist:
-                        pass
+                        self._set_negative_cache((session_uuid, run_uuid))
 
             except Exception as exc:
                 if self.logger:
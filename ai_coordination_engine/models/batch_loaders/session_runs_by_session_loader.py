@@ -4,12 +4,13 @@ from __future__ import print_function
 
 __author__ = "bibow"
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Set
 
 from promise import Promise
 from silvaengine_utility.cache import HybridCacheEngine
 
 from ...handlers.config import Config
+from ..cache import make_list_tag, make_tag
 from ..session_run import SessionRunModel
 from .base import SafeDataLoader, normalize_model
 
@@ -22,6 +23,8 @@ class SessionRunsBySessionLoader(SafeDataLoader):
     and returns them as lists.
     """
 
+    cache_name = "session_runs_by_session"
+
     def __init__(self, logger=None, cache_enabled=True, **kwargs):
         super(SessionRunsBySessionLoader, self).__init__(
             logger=logger, cache_enabled=cache_enabled, **kwargs
@@ -31,6 +34,12 @@ class SessionRunsBySessionLoader(SafeDataLoader):
                 Config.get_cache_name("models", "session_runs_by_session")
             )
 
+    def _cache_tags(self, cache_key: str, value: Any) -> Set[str]:
+        return {
+            make_tag("session_uuid", cache_key),
+            make_list_tag("session_run", "session_uuid", cache_key),
+        }
+
     def batch_load_fn(self, keys: List[str]) -> Promise:
         """
         Load all session runs for multiple session_uuids.
@@ -49,7 +58,7 @@ class SessionRunsBySessionLoader(SafeDataLoader):
         if self.cache_enabled:
             for key in unique_keys:
                 cache_key = key  # session_uuid
-                cached_item = self.cache.get(cache_key)
+                cached_item = self._cache_get(cache_key)
                 if cached_item:
                     key_map[key] = cached_item
                 else:
@@ -62,11 +71,9 @@ class SessionRunsBySessionLoader(SafeDataLoader):
             try:
                 for session_uuid in uncached_keys:
                     # Query all session runs for this session
-                    session_runs = list(
-                        SessionRunModel.query(
-                            session_uuid,
-                            # Could add filters here if needed
-                        )
+                    session_runs = self._fetch_once(
+                        session_uuid,
+                        lambda: list(SessionRunModel.query(session_uuid)),
                     )
 
                     # Normalize all session runs
@@ -76,9 +83,7 @@ class SessionRunsBySessionLoader(SafeDataLoader):
 
                     # Cache the result if enabled
                     if self.cache_enabled:
-                        self.cache.set(
-                            session_uuid, normalized_runs, ttl=Config.get_cache_ttl()
-                        )
+                        self._cache_set(session_uuid, normalized_runs)
 
             except Exception as exc:
                 if self.logger:
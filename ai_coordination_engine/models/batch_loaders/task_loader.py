@@ -21,6 +21,9 @@ class TaskLoader(SafeDataLoader):
     Batch loader for TaskModel keyed by (coordination_uuid, task_uuid).
     """
 
+    cache_name = "task"
+    key_fields = ("coordination_uuid", "task_uuid")
+
     def __init__(self, logger=None, cache_enabled=True, **kwargs):
         super(TaskLoader, self).__init__(
             logger=logger, cache_enabled=cache_enabled, **kwargs
@@ -46,10 +49,10 @@ class TaskLoader(SafeDataLoader):
         if self.cache_enabled:
             for key in unique_keys:
                 cache_key = f"{key[0]}:{key[1]}"  # coordination_uuid:task_uuid
-                cached_item = self.cache.get(cache_key)
+                cached_item = self._cache_get(cache_key)
                 if cached_item:
                     key_map[key] = cached_item
-                else:
+                elif not self._is_negative_cached(key):
                     uncached_keys.append(key)
         else:
             uncached_keys = unique_keys
@@ -59,18 +62,19 @@ class TaskLoader(SafeDataLoader):
             try:
                 for coordination_uuid, task_uuid in uncached_keys:
                     try:
-                        task = TaskModel.get(coordination_uuid, task_uuid)
+                        task = self._fetch_once(
+                            f"{coordination_uuid}:{task_uuid}",
+                            lambda: TaskModel.get(coordination_uuid, task_uuid),
+                        )
                         normalized = normalize_model(task)
                         key_map[(coordination_uuid, task_uuid)] = normalized
 
                         # Cache the result if enabled
                         if self.cache_enabled:
                             cache_key = f"{coordination_uuid}:{task_uuid}"
-                            self.cache.set(
-                                cache_key, normalized, ttl=Config.get_cache_ttl()
-                            )
+                            self._cache_set(cache_key, normalized)
                     except TaskModel.DoesNotExist:
-                        pass
+                        self._set_negative_cache((coordination_uuid, task_uuid))
 
             except Exception as exc:
                 if self.logger:
@@ -3,15 +3,521 @@ from __future__ import print_function
 
 __author__ = "bibow"
 
+import functools
 import logging
+import math
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
 from functools import lru_cache
-from typing import Any, Dict, Optional
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 from silvaengine_dynamodb_base.cache_utils import (
     CacheConfigResolvers,
     CascadingCachePurger,
 )
 
+from .cache_metrics import (
+    LATENCY_SAMPLES,
+    to_ms,
+    estimate_sampled_size,
+    percentile,
+    record_purge,
+)
+
+# Key fields copied from cached values into invalidation tags
+TAG_FIELDS = (
+    "coordination_uuid",
+    "task_uuid",
+    "schedule_uuid",
+    "session_uuid",
+    "session_agent_uuid",
+    "run_uuid",
+    "async_task_uuid",
+)
+
+# Field whose tag identifies each entity type
+ENTITY_TAG_FIELDS = {
+    "coordination": "coordination_uuid",
+    "task": "task_uuid",
+    "task_schedule": "schedule_uuid",
+    "session": "session_uuid",
+    "session_agent": "session_agent_uuid",
+    "session_run": "run_uuid",
+    "async_task": "async_task_uuid",
+}
+
+
+def make_tag(field: str, value: Any) -> str:
+    return f"{field}:{value}"
+
+
+def make_list_tag(entity_type: str, parent_field: str, value: Any) -> str:
+    """Tag for a cached list of `entity_type` rows under one parent."""
+    return f"{entity_type}@{parent_field}:{value}"
+
+
+def get_value_tags(value: Any) -> Set[str]:
+    if not isinstance(value, dict):
+        return set()
+    return {make_tag(f, value[f]) for f in TAG_FIELDS if value.get(f)}
+
+
+def make_response_list_tag(entity_type: str) -> str:
+    """Tag for a cached GraphQL response that listed `entity_type` rows."""
+    return f"{entity_type}@list"
+
+
+# Tags of the entities read while resolving one cacheable GraphQL response
+_response_tags: ContextVar[Optional[Set[str]]] = ContextVar(
+    "response_tags", default=None
+)
+
+
+def collect_response_tags() -> Any:
+    """Start collecting response tags in this context; pass the token to `reset_response_tags`."""
+    return _response_tags.set(set())
+
+
+def reset_response_tags(token: Any) -> Set[str]:
+    tags = _response_tags.get() or set()
+    _response_tags.reset(token)
+    return tags
+
+
+def record_response_tags(tags: Iterable[str]) -> None:
+    """Add tags to the response being resolved; a no-op outside the response cache."""
+    collected = _response_tags.get()
+    if collected is not None:
+        collected.update(tags)
+
+
+# Versions of the versioned rows read while resolving one cacheable
+# GraphQL response, keyed by (partition_key, uuid)
+_response_versions: ContextVar[Optional[Dict[Tuple[str, str], int]]] = ContextVar(
+    "response_versions", default=None
+)
+
+
+def collect_response_versions() -> Any:
+    """Start collecting response versions in this context; pass the token to `reset_response_versions`."""
+    return _response_versions.set({})
+
+
+def reset_response_versions(token: Any) -> Dict[Tuple[str, str], int]:
+    versions = _response_versions.get() or {}
+    _response_versions.reset(token)
+    return versions
+
+
+def record_response_version(partition_key: str, uuid: str, version: int) -> None:
+    """Record the version a response read; a no-op outside the response cache."""
+    collected = _response_versions.get()
+    if collected is not None:
+        collected[(partition_key, uuid)] = version
+
+
+class SingleFlight(object):
+    """
+    Coalesce concurrent calls for the same key into one.
+
+    The first caller runs the function; callers arriving while it runs wait
+    for its result (or its exception) instead of repeating the work.
+    """
+
+    def __init__(self, timeout: float = 30):
+        self.timeout = timeout
+        self._flights: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._flights
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = {"event": threading.Event(), "value": None, "error": None}
+                self._flights[key] = flight
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            # Fall back to our own call if the leader takes too long
+            if not flight["event"].wait(self.timeout):
+                return fn()
+            if flight["error"] is not None:
+                raise flight["error"]
+            return flight["value"]
+
+        try:
+            flight["value"] = fn()
+            return flight["value"]
+        except Exception as e:
+            flight["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight["event"].set()
+
+
+class LocalCache(object):
+    """
+    Process-level LRU cache with per-entry TTL and tag invalidation.
+
+    Lives for the life of the container, so warm invocations serve hot keys
+    without a network call. Entries are dropped when they expire, when the
+    cache is full (least recently used first) or when one of their tags is
+    invalidated. With `max_bytes`, entries set with a `size` also count
+    against a byte budget, and a value larger than the budget is not kept.
+
+    Entries that record how long they took to load (`delta`) are refreshed
+    early using probabilistic early expiration (XFetch): as an entry nears
+    expiry, a growing share of reads report a miss, so one caller reloads it
+    while the rest keep being served. Concurrent misses for the same key go
+    through `single_flight` and share one load.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        ttl: int,
+        beta: float = 1.0,
+        max_bytes: Optional[int] = None,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.beta = beta
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+        self._flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.early_refreshes = 0
+        self.sets = 0
+        self._latencies: deque = deque(maxlen=LATENCY_SAMPLES)
+
+    def get(self, key: str) -> Any:
+        return self.lookup(key)[0]
+
+    def lookup(self, key: str) -> Tuple[Any, bool]:
+        """
+        Read a key as (value, early_refresh).
+
+        early_refresh is True when XFetch chose this read to reload the entry,
+        which must then come from the source rather than from a slower cache
+        tier holding the same data.
+        """
+        start = time.perf_counter()
+        with self._lock:
+            result = self._lookup(key)
+            self._latencies.append(time.perf_counter() - start)
+            return result
+
+    def _lookup(self, key: str) -> Tuple[Any, bool]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, False
+        expires_at, value, _, delta = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None, False
+        if (
+            delta > 0
+            and not self._flights.in_flight(key)
+            and now - delta * self.beta * math.log(1.0 - random.random())
+            >= expires_at
+        ):
+            self.early_refreshes += 1
+            self.misses += 1
+            return None, True
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value, False
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        tags: Iterable[str] = (),
+        ttl: Optional[int] = None,
+        delta: float = 0,
+        size: int = 0,
+    ) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            tags = frozenset(tags)
+            self._entries[key] = (time.monotonic() + ttl, value, tags, delta)
+            if size:
+                self._sizes[key] = size
+                self.bytes_used += size
+            self.sets += 1
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.bytes_used > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def single_flight(self, key: str, fn: Callable[[], Any]) -> Any:
+        return self._flights.do(key, fn)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._tags.clear()
+            self._sizes.clear()
+            self.bytes_used = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = list(self._latencies)
+            lookups = self.hits + self.misses
+            values = [entry[1] for entry in self._entries.values()]
+            stats = {
+                "name": self.name,
+                "size": len(values),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "sets": self.sets,
+                "p50_ms": to_ms(percentile(samples, 50)),
+                "p99_ms": to_ms(percentile(samples, 99)),
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "early_refreshes": self.early_refreshes,
+                "coalesced": self._flights.coalesced,
+            }
+        # Sized from a sample on demand, outside the lock, so sets never pay for it
+        stats["bytes_stored"] = estimate_sampled_size(values)
+        return stats
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self.bytes_used -= self._sizes.pop(key, 0)
+        tags = entry[2]
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+_local_caches: Dict[str, LocalCache] = {}
+_local_caches_lock = threading.Lock()
+
+
+def get_local_cache(name: str) -> Optional[LocalCache]:
+    """Return the process-level cache for a loader name, or None when disabled."""
+    from ..handlers.config import Config
+
+    if not Config.is_local_cache_enabled():
+        return None
+
+    cache = _local_caches.get(name)
+    if cache is None:
+        with _local_caches_lock:
+            cache = _local_caches.get(name)
+            if cache is None:
+                cache = LocalCache(
+                    name,
+                    max_entries=Config.local_cache_max_entries,
+                    ttl=Config.get_local_cache_ttl(name),
+                    max_bytes=Config.LOCAL_CACHE_MAX_BYTES.get(name),
+                )
+                _local_caches[name] = cache
+    return cache
+
+
+def invalidate_local_cache(
+    entity_type: str, entity_keys: Optional[Dict[str, Any]] = None
+) -> int:
+    """
+    Drop L1 entries for an entity, its cached parent lists and its cascading children.
+
+    Children carry their parent's uuid in their values, so the entity's own tag
+    covers them. Without an identifying key every local cache is cleared.
+    """
+    entity_keys = entity_keys or {}
+    field = ENTITY_TAG_FIELDS.get(entity_type)
+    if not field or not entity_keys.get(field):
+        count = 0
+        for cache in list(_local_caches.values()):
+            count += len(cache)
+            cache.clear()
+        return count
+
+    tags = [make_tag(field, entity_keys[field])]
+    tags.extend(
+        make_list_tag(entity_type, parent_field, value)
+        for parent_field, value in entity_keys.items()
+        if parent_field != field and parent_field in TAG_FIELDS and value
+    )
+    # Cached responses listing this entity type or its cascading children
+    tags.extend(
+        make_response_list_tag(t)
+        for t in [entity_type] + _get_cascade_entity_types(entity_type, 3)
+    )
+    return sum(
+        cache.invalidate_tags(tags) for cache in list(_local_caches.values())
+    )
+
+
+def clear_local_caches() -> None:
+    for cache in list(_local_caches.values()):
+        cache.clear()
+
+
+def get_local_cache_stats() -> List[Dict[str, Any]]:
+    return [cache.stats() for cache in list(_local_caches.values())]
+
+
+NEGATIVE_CACHE_NAME = "negative"
+
+
+def _negative_cache_key(entity_type: str, cache_key: str) -> str:
+    return f"{entity_type}:{cache_key}"
+
+
+def is_negative_cached(entity_type: str, cache_key: str) -> bool:
+    """True when a recent lookup found no entity for this key."""
+    cache = get_local_cache(NEGATIVE_CACHE_NAME)
+    return bool(
+        cache is not None and cache.get(_negative_cache_key(entity_type, cache_key))
+    )
+
+
+def set_negative_cache(entity_type: str, cache_key: str, tags: Iterable[str]) -> None:
+    """
+    Remember that an entity does not exist.
+
+    The entry is tagged with the entity's key fields, so the purge that
+    follows its creation drops the marker. Other containers keep the marker
+    until the short negative TTL expires.
+    """
+    cache = get_local_cache(NEGATIVE_CACHE_NAME)
+    if cache is not None:
+        cache.set(_negative_cache_key(entity_type, cache_key), True, tags=tags)
+
+
+def negative_cache(
+    entity_type: str, key_fields: Sequence[str], model_class: Any
+) -> Callable:
+    """
+    Short-circuit getters for keys that recently raised `model_class.DoesNotExist`.
+
+    Place it under `@retry` so retries of a missing key do not reach DynamoDB.
+    """
+
+    def actual_decorator(original_function):
+        @functools.wraps(original_function)
+        def wrapper_function(*args, **kwargs):
+            values = list(args) + [kwargs[f] for f in key_fields[len(args) :]]
+            cache_key = ":".join(str(v) for v in values)
+            if is_negative_cached(entity_type, cache_key):
+                raise model_class.DoesNotExist()
+
+            try:
+                return original_function(*args, **kwargs)
+            except model_class.DoesNotExist:
+                set_negative_cache(
+                    entity_type,
+                    cache_key,
+                    tags={make_tag(f, v) for f, v in zip(key_fields, values)},
+                )
+                raise
+
+        return wrapper_function
+
+    return actual_decorator
+
+
+_getter_flights = SingleFlight()
+
+
+def single_flight(entity_type: str) -> Callable:
+    """
+    Coalesce concurrent calls of a getter with the same arguments.
+
+    When a hot entry expires, threads that miss at the same moment share one
+    DynamoDB read instead of each issuing their own.
+    """
+
+    def actual_decorator(original_function):
+        @functools.wraps(original_function)
+        def wrapper_function(*args, **kwargs):
+            key = ":".join(
+                [entity_type]
+                + [str(v) for v in args]
+                + [f"{k}={v}" for k, v in sorted(kwargs.items())]
+            )
+            return _getter_flights.do(
+                key, lambda: original_function(*args, **kwargs)
+            )
+
+        return wrapper_function
+
+    return actual_decorator
+
 
 @lru_cache(maxsize=1)
 def _get_cascading_cache_purger() -> CascadingCachePurger:
@@ -26,6 +532,28 @@ def _get_cascading_cache_purger() -> CascadingCachePurger:
     )
 
 
+def _get_cascade_entity_types(entity_type: str, cascade_depth: int) -> List[str]:
+    """Child entity types a purge of `entity_type` cascades into, level by level."""
+    from ..handlers.config import Config
+
+    entity_types, level = [], [entity_type]
+    for _ in range(cascade_depth):
+        level = [
+            child["entity_type"]
+            for parent in level
+            for child in Config.get_entity_children(parent)
+        ]
+        if not level:
+            break
+        entity_types.extend(level)
+    return entity_types
+
+
+def _get_cascade_fan_out(entity_type: str, cascade_depth: int) -> int:
+    """Number of child entity caches a purge of `entity_type` cascades into."""
+    return len(_get_cascade_entity_types(entity_type, cascade_depth))
+
+
 def purge_entity_cascading_cache(
     logger: logging.Logger,
     entity_type: str,
@@ -34,6 +562,14 @@ def purge_entity_cascading_cache(
     cascade_depth: int = 3,
 ) -> Dict[str, Any]:
     """Universal function to purge entity cache with cascading child cache support."""
+    # The in-process L1 goes first so this container never serves the old value
+    invalidated = invalidate_local_cache(entity_type, entity_keys)
+    record_purge(
+        entity_type,
+        fan_out=_get_cascade_fan_out(entity_type, cascade_depth),
+        invalidated=invalidated,
+    )
+
     purger = _get_cascading_cache_purger()
     return purger.purge_entity_cascading_cache(
         logger,
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+LATENCY_SAMPLES = 1024
+# Cache values serialized to estimate sizes; one set in SIZE_SAMPLE_EVERY is sized
+SIZE_SAMPLE_ENTRIES = 64
+SIZE_SAMPLE_EVERY = 16
+
+# Entity type of the cache names that differ from it. Caches holding every
+# entity type map to None and are counted against all purges.
+CACHE_ENTITY_TYPES = {
+    "coordination_models": "coordination",
+    "coordination_versions": "coordination",
+    "session_agents_by_session": "session_agent",
+    "session_runs_by_session": "session_run",
+    "negative": None,
+    "graphql_response": None,
+}
+
+
+def get_cache_entity_type(cache_name: str) -> Optional[str]:
+    return CACHE_ENTITY_TYPES.get(cache_name, cache_name)
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate the stored size of a cache value as its compact JSON length."""
+    try:
+        return len(json.dumps(value, separators=(",", ":"), default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def estimate_sampled_size(values: List[Any]) -> int:
+    """Approximate the total size of values from a random sample of them."""
+    if not values:
+        return 0
+    sample = random.sample(values, min(len(values), SIZE_SAMPLE_ENTRIES))
+    return round(sum(estimate_size(v) for v in sample) * len(values) / len(sample))
+
+
+def percentile(samples: List[float], pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class CacheMetrics(object):
+    """
+    Counters and a bounded latency sample for one cache name and layer.
+
+    Latencies are kept in seconds for the last LATENCY_SAMPLES lookups and
+    reported as p50/p99 milliseconds. bytes_written is extrapolated from one
+    set in SIZE_SAMPLE_EVERY.
+    """
+
+    def __init__(self, cache_name: str, entity_type: str, layer: str):
+        self.cache_name = cache_name
+        self.entity_type = entity_type
+        self.layer = layer
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.sampled_sets = 0
+        self.sampled_bytes = 0
+        self.latencies: deque = deque(maxlen=LATENCY_SAMPLES)
+        self._lock = threading.Lock()
+
+    def record_lookup(self, hit: bool, elapsed: float) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.latencies.append(elapsed)
+
+    def record_set(self, value: Any) -> None:
+        with self._lock:
+            self.sets += 1
+            sampled = self.sets % SIZE_SAMPLE_EVERY == 1
+        if not sampled:
+            return
+        nbytes = estimate_size(value)
+        with self._lock:
+            self.sampled_sets += 1
+            self.sampled_bytes += nbytes
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = list(self.latencies)
+            lookups = self.hits + self.misses
+            return {
+                "cache_name": self.cache_name,
+                "entity_type": self.entity_type,
+                "layer": self.layer,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "sets": self.sets,
+                "bytes_written": (
+                    round(self.sampled_bytes * self.sets / self.sampled_sets)
+                    if self.sampled_sets
+                    else 0
+                ),
+                "p50_ms": to_ms(percentile(samples, 50)),
+                "p99_ms": to_ms(percentile(samples, 99)),
+            }
+
+
+def to_ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+_metrics: Dict[str, CacheMetrics] = {}
+_purges: Dict[str, Dict[str, int]] = {}
+_lock = threading.Lock()
+_last_logged_at = 0.0
+
+
+def get_cache_metrics(cache_name: str, entity_type: str, layer: str) -> CacheMetrics:
+    key = f"{layer}:{cache_name}"
+    metrics = _metrics.get(key)
+    if metrics is None:
+        with _lock:
+            metrics = _metrics.get(key)
+            if metrics is None:
+                metrics = CacheMetrics(cache_name, entity_type, layer)
+                _metrics[key] = metrics
+    return metrics
+
+
+def record_purge(entity_type: str, fan_out: int, invalidated: int) -> None:
+    """Count a cascading purge, the entity types it reaches and the L1 entries it drops."""
+    with _lock:
+        purge = _purges.setdefault(
+            entity_type, {"purges": 0, "cascade_fan_out": 0, "invalidated": 0}
+        )
+        purge["purges"] += 1
+        purge["cascade_fan_out"] += fan_out
+        purge["invalidated"] += invalidated
+
+
+def get_cache_stats() -> List[Dict[str, Any]]:
+    """
+    Merge hybrid cache metrics, L1 cache stats and purge counts.
+
+    Returns one row per cache name and layer ("hybrid" or "local"). Purge
+    counts are attached to every row of the purged entity type; rows of
+    caches that span all entity types carry the totals of every purge.
+    """
+    from .cache import get_local_cache_stats
+
+    rows = [metrics.stats() for metrics in list(_metrics.values())]
+    for local in get_local_cache_stats():
+        rows.append(
+            dict(
+                local,
+                cache_name=local["name"],
+                entity_type=get_cache_entity_type(local["name"]),
+                layer="local",
+            )
+        )
+
+    with _lock:
+        purges = {k: dict(v) for k, v in _purges.items()}
+    all_purges = {
+        field: sum(purge[field] for purge in purges.values())
+        for field in ["purges", "cascade_fan_out", "invalidated"]
+    }
+    for row in rows:
+        row.pop("name", None)
+        purge = (
+            purges.get(row["entity_type"], {})
+            if row["entity_type"] is not None
+            else all_purges
+        )
+        row["purges"] = purge.get("purges", 0)
+        row["cascade_fan_out"] = purge.get("cascade_fan_out", 0)
+        row["purge_invalidated"] = purge.get("invalidated", 0)
+    return sorted(
+        rows,
+        key=lambda row: (row["entity_type"] or "", row["cache_name"], row["layer"]),
+    )
+
+
+def log_cache_stats(logger: logging.Logger, force: bool = False) -> None:
+    """
+    Emit one JSON log line per cache, at most once per `cache_stats_log_interval`.
+
+    Lines carry `"event": "cache_stats"` so they can be filtered and charted
+    from CloudWatch Logs Insights.
+    """
+    global _last_logged_at
+    from ..handlers.config import Config
+
+    interval = Config.cache_stats_log_interval
+    now = time.monotonic()
+    if not force and (interval <= 0 or now - _last_logged_at < interval):
+        return
+    _last_logged_at = now
+
+    for row in get_cache_stats():
+        logger.info(json.dumps(dict(row, event="cache_stats"), default=str))
@@ -6,29 +6,33 @@ __author__ = "bibow"
 
 
 import functools
+import time
 import traceback
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Tuple
 
 import pendulum
 from graphene import ResolveInfo
-from pynamodb.attributes import (
-    ListAttribute,
-    MapAttribute,
-    UnicodeAttribute,
-    UTCDateTimeAttribute,
-)
+from pynamodb.attributes import NumberAttribute, UnicodeAttribute, UTCDateTimeAttribute
 from silvaengine_dynamodb_base import (
     BaseModel,
     delete_decorator,
     insert_update_decorator,
     monitor_decorator,
-    resolve_list_decorator,
 )
-from silvaengine_utility import Debugger, method_cache
+from silvaengine_utility import Debugger
 from tenacity import retry, stop_after_attempt, wait_exponential
 
-from ..handlers.config import Config
 from ..types.coordination import CoordinationListType, CoordinationType
+from .attributes import CompressedJSONAttribute
+from .cache import (
+    get_local_cache,
+    get_value_tags,
+    make_tag,
+    negative_cache,
+    record_response_tags,
+    record_response_version,
+)
+from .pagination import resolve_cursor_list_decorator
 from ..utils.normalization import normalize_to_json
 
 
@@ -42,8 +46,10 @@ class CoordinationModel(BaseModel):
     part_id = UnicodeAttribute()
     coordination_name = UnicodeAttribute()
     coordination_description = UnicodeAttribute()
-    agents = ListAttribute(of=MapAttribute)
+    agents = CompressedJSONAttribute()
     theme_uuid = UnicodeAttribute()
+    # Incremented on every write; cached reads are keyed by it
+    version = NumberAttribute(null=True)
     updated_by = UnicodeAttribute()
     created_at = UTCDateTimeAttribute()
     updated_at = UTCDateTimeAttribute()
@@ -106,15 +112,117 @@ def purge_cache():
     wait=wait_exponential(multiplier=1, max=60),
     stop=stop_after_attempt(5),
 )
-@method_cache(
-    ttl=Config.get_cache_ttl(),
-    cache_name=Config.get_cache_name("models", "coordination"),
-    cache_enabled=False,
+@negative_cache(
+    "coordination", ["partition_key", "coordination_uuid"], CoordinationModel
 )
 def get_coordination(partition_key: str, coordination_uuid: str) -> CoordinationModel:
     return CoordinationModel.get(partition_key, coordination_uuid)
 
 
+def _cache_coordination(coordination: CoordinationModel, delta: float = 0) -> int:
+    """Keep a row in `coordination_models` under its version and remember the version."""
+    version = int(coordination.version or 0)
+    key = f"{coordination.partition_key}:{coordination.coordination_uuid}"
+    tags = {make_tag("coordination_uuid", coordination.coordination_uuid)}
+    models_cache = get_local_cache("coordination_models")
+    if models_cache is not None:
+        models_cache.set(
+            f"{key}:{version}", coordination.serialize(), tags=tags, delta=delta
+        )
+    versions_cache = get_local_cache("coordination_versions")
+    if versions_cache is not None:
+        versions_cache.set(key, version, tags=tags)
+    return version
+
+
+@negative_cache(
+    "coordination", ["partition_key", "coordination_uuid"], CoordinationModel
+)
+def get_coordination_version(partition_key: str, coordination_uuid: str) -> int:
+    """
+    Current version of a coordination, from the `coordination_versions` L1.
+
+    DynamoDB bills a GetItem for the whole item whatever it projects, so a
+    miss reads the full row and also caches it in `coordination_models`.
+    Local writes purge the version at once; a write from another container
+    is seen once the short TTL expires (or the stream purge arrives).
+    Raises CoordinationModel.DoesNotExist, so it also serves as the existence
+    check. Rows written before versioning report 0.
+    """
+    cache = get_local_cache("coordination_versions")
+    version = (
+        cache.get(f"{partition_key}:{coordination_uuid}") if cache is not None else None
+    )
+    if version is None:
+        version = _cache_coordination(
+            CoordinationModel.get(partition_key, coordination_uuid)
+        )
+    return version
+
+
+def get_coordination_versions(
+    keys: Iterable[Tuple[str, str]],
+) -> Dict[Tuple[str, str], int]:
+    """
+    Versions of several (partition_key, coordination_uuid) keys.
+
+    Versions missing from the L1 are read with one BatchGetItem, whose rows
+    are cached like get_coordination_version's. Coordinations that do not
+    exist are left out of the result.
+    """
+    cache = get_local_cache("coordination_versions")
+    versions = {}
+    missing = []
+    for key in dict.fromkeys(keys):
+        version = cache.get(f"{key[0]}:{key[1]}") if cache is not None else None
+        if version is None:
+            missing.append(key)
+        else:
+            versions[key] = version
+    for coordination in CoordinationModel.batch_get(missing):
+        versions[(coordination.partition_key, coordination.coordination_uuid)] = (
+            _cache_coordination(coordination)
+        )
+    return versions
+
+
+def get_cached_coordination(
+    partition_key: str, coordination_uuid: str
+) -> CoordinationModel:
+    """
+    Versioned read-through cache for coordinations.
+
+    Cached rows are keyed by the version from get_coordination_version, so a
+    write is seen as soon as that version is. The agents map stays packed in
+    the cached row and each caller gets its own model instance. Concurrent
+    misses share one read and hot rows are refreshed early before they expire.
+    """
+    cache = get_local_cache("coordination_models")
+    if cache is None:
+        coordination = get_coordination(partition_key, coordination_uuid)
+        record_response_version(
+            partition_key, coordination_uuid, int(coordination.version or 0)
+        )
+        return coordination
+
+    version = get_coordination_version(partition_key, coordination_uuid)
+    record_response_version(partition_key, coordination_uuid, version)
+    cache_key = f"{partition_key}:{coordination_uuid}:{version}"
+
+    def load() -> Dict[str, Any]:
+        start = time.monotonic()
+        coordination = get_coordination(partition_key, coordination_uuid)
+        # A write between the probe and the read is cached under its own version
+        _cache_coordination(coordination, delta=time.monotonic() - start)
+        return coordination.serialize()
+
+    raw_data = cache.get(cache_key)
+    if raw_data is None:
+        # Concurrent misses share one read
+        raw_data = cache.single_flight(cache_key, load)
+    return CoordinationModel.from_raw_data(raw_data)
+
+
 def get_coordination_count(partition_key: str, coordination_uuid: str) -> int:
     return CoordinationModel.count(
         partition_key, CoordinationModel.coordination_uuid == coordination_uuid
@@ -126,6 +234,7 @@ def get_coordination_type(
 ) -> CoordinationType:
     _ = info  # Keep for signature compatibility with decorators
     coordination_dict = coordination.__dict__["attribute_values"].copy()
+    record_response_tags(get_value_tags(coordination_dict))
     # Keep all fields including FKs - nested resolvers will handle lazy loading
     return CoordinationType(**normalize_to_json(coordination_dict))
 
@@ -134,19 +243,18 @@ def resolve_coordination(
     info: ResolveInfo, **kwargs: Dict[str, Any]
 ) -> CoordinationType | None:
     partition_key = info.context.get("partition_key") or info.context.get("endpoint_id")
-    count = get_coordination_count(partition_key, kwargs["coordination_uuid"])
-
-    if count == 0:
+    try:
+        coordination = get_cached_coordination(
+            partition_key, kwargs["coordination_uuid"]
+        )
+    except CoordinationModel.DoesNotExist:
         return None
 
-    return get_coordination_type(
-        info,
-        get_coordination(partition_key, kwargs["coordination_uuid"]),
-    )
+    return get_coordination_type(info, coordination)
 
 
 @monitor_decorator
-@resolve_list_decorator(
+@resolve_cursor_list_decorator(
     attributes_to_get=["endpoint_id", "coordination_uuid"],
     list_type_class=CoordinationListType,
     type_funct=get_coordination_type,
@@ -195,6 +303,7 @@ def insert_update_coordination(info: ResolveInfo, **kwargs: Dict[str, Any]) -> N
             "endpoint_id": info.context.get("endpoint_id"),
             "part_id": info.context.get("part_id"),
             "agents": [],
+            "version": 1,
             "updated_by": kwargs["updated_by"],
             "created_at": pendulum.now("UTC"),
             "updated_at": pendulum.now("UTC"),
@@ -220,6 +329,7 @@ def insert_update_coordination(info: ResolveInfo, **kwargs: Dict[str, Any]) -> N
     actions = [
         CoordinationModel.updated_by.set(kwargs["updated_by"]),
         CoordinationModel.updated_at.set(pendulum.now("UTC")),
+        CoordinationModel.version.add(1),
     ]
     # Map of potential keys in kwargs to CoordinationModel attributes
     field_map = {
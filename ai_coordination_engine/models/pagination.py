@@ -0,0 +1,156 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import base64
+import binascii
+import functools
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import humps
+from graphene import ResolveInfo
+from silvaengine_dynamodb_base import resolve_list_decorator
+
+from .cache import make_response_list_tag, record_response_tags
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 500
+CURSOR_ARGUMENTS = ("after", "first", "with_total")
+
+
+def encode_cursor(last_evaluated_key: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Encode a DynamoDB LastEvaluatedKey into an opaque cursor string."""
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(last_evaluated_key, sort_keys=True, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Decode an opaque cursor string back into a DynamoDB ExclusiveStartKey."""
+    if not cursor:
+        return None
+    try:
+        last_evaluated_key = json.loads(
+            base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        )
+    except (ValueError, binascii.Error) as e:
+        raise ValueError("Invalid pagination cursor.") from e
+
+    if not isinstance(last_evaluated_key, dict):
+        raise ValueError("Invalid pagination cursor.")
+    return last_evaluated_key
+
+
+def get_list_field_name(list_type_class: Any) -> str:
+    """Derive the list field name of a ListType (SessionAgentListType -> session_agent_list)."""
+    return f"{humps.decamelize(list_type_class.__name__[: -len('ListType')])}_list"
+
+
+def fetch_cursor_page(
+    inquiry_funct: Callable,
+    args: List[Any],
+    first: int,
+    after: Optional[str] = None,
+) -> Tuple[List[Any], Optional[str], bool]:
+    """
+    Read one page from a PynamoDB query/scan starting after the given cursor.
+
+    One extra item is requested so `has_next_page` is exact; the returned
+    cursor points at the last item of this page, not at the extra item.
+
+    Returns:
+        Tuple of (items, end_cursor, has_next_page)
+    """
+    results = inquiry_funct(
+        *args,
+        limit=first + 1,
+        last_evaluated_key=decode_cursor(after),
+    )
+
+    items = []
+    end_cursor = None
+    for item in results:
+        items.append(item)
+        if len(items) == first:
+            end_cursor = encode_cursor(results.last_evaluated_key)
+            break
+
+    has_next_page = len(items) == first and next(results, None) is not None
+    return items, (end_cursor if has_next_page else None), has_next_page
+
+
+def count_cursor_total(
+    inquiry_funct: Callable,
+    count_funct: Callable,
+    args: List[Any],
+    attributes_to_get: List[str],
+) -> int:
+    """Count all matching rows; only used when the caller opts in with `with_total`."""
+    if getattr(inquiry_funct, "__name__", None) == "scan":
+        return sum(1 for _ in inquiry_funct(*args, attributes_to_get=attributes_to_get))
+    return count_funct(*args)
+
+
+def resolve_cursor_list_decorator(
+    attributes_to_get: List[str],
+    list_type_class: Any,
+    type_funct: Callable,
+) -> Callable:
+    """
+    Extend `resolve_list_decorator` with opaque cursor pagination.
+
+    The decorated function keeps returning `(inquiry_funct, count_funct, args)`.
+    Requests with `after`/`first` read a single page from the DynamoDB
+    LastEvaluatedKey and only count when `with_total` is set; requests with
+    `page_number`/`limit` are delegated to `resolve_list_decorator` unchanged.
+    """
+
+    def actual_decorator(original_function):
+        paged_function = resolve_list_decorator(
+            attributes_to_get=attributes_to_get,
+            list_type_class=list_type_class,
+            type_funct=type_funct,
+        )(original_function)
+        list_field_name = get_list_field_name(list_type_class)
+        entity_type = list_field_name[: -len("_list")]
+
+        @functools.wraps(original_function)
+        def wrapper_function(info: ResolveInfo, **kwargs: Dict[str, Any]) -> Any:
+            record_response_tags([make_response_list_tag(entity_type)])
+            if kwargs.get("after") is None and kwargs.get("first") is None:
+                return paged_function(
+                    info,
+                    **{k: v for k, v in kwargs.items() if k not in CURSOR_ARGUMENTS},
+                )
+
+            first = min(
+                max(int(kwargs.get("first") or DEFAULT_PAGE_SIZE), 1), MAX_PAGE_SIZE
+            )
+            inquiry_funct, count_funct, args = original_function(info, **kwargs)
+            items, end_cursor, has_next_page = fetch_cursor_page(
+                inquiry_funct, args, first, after=kwargs.get("after")
+            )
+
+            total = None
+            if kwargs.get("with_total"):
+                total = count_cursor_total(
+                    inquiry_funct, count_funct, args, attributes_to_get
+                )
+
+            return list_type_class(
+                **{
+                    list_field_name: [type_funct(info, item) for item in items],
+                    "page_size": first,
+                    "total": total,
+                    "has_next_page": has_next_page,
+                    "end_cursor": end_cursor,
+                }
+            )
+
+        return wrapper_function
+
+    return actual_decorator
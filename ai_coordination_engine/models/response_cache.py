@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import copy
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from graphql import FieldNode, GraphQLError, OperationType, parse, print_ast
+
+from ..handlers.config import Config
+from .cache import (
+    collect_response_tags,
+    collect_response_versions,
+    get_local_cache,
+    reset_response_tags,
+    reset_response_versions,
+)
+from .coordination import get_coordination_versions
+
+RESPONSE_CACHE_NAME = "graphql_response"
+
+
+def get_cacheable_query(
+    query: Optional[str], operation_name: Optional[str] = None
+) -> Optional[str]:
+    """
+    Return the normalized query text when the request may be served from cache.
+
+    Only documents without mutations or subscriptions, whose selected query
+    operation selects nothing but `Config.RESPONSE_CACHE_FIELDS` at the root,
+    are cacheable. Whitespace, comments and formatting are normalized away.
+    """
+    if not query:
+        return None
+    try:
+        document = parse(query)
+    except GraphQLError:
+        return None
+
+    operations = [d for d in document.definitions if hasattr(d, "operation")]
+    if any(op.operation != OperationType.QUERY for op in operations):
+        return None
+    if operation_name:
+        operations = [
+            op for op in operations if op.name and op.name.value == operation_name
+        ]
+    if len(operations) != 1:
+        return None
+
+    for selection in operations[0].selection_set.selections:
+        if (
+            not isinstance(selection, FieldNode)
+            or selection.name.value not in Config.RESPONSE_CACHE_FIELDS
+        ):
+            return None
+    return print_ast(document)
+
+
+def get_response_cache_key(
+    normalized_query: str,
+    variables: Optional[Dict[str, Any]],
+    partition_key: Optional[str],
+    operation_name: Optional[str] = None,
+) -> str:
+    raw = json.dumps(
+        [normalized_query, variables or {}, partition_key, operation_name],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def has_errors(response: Any) -> bool:
+    """True unless the response is recognizably a successful GraphQL result."""
+    if isinstance(response, dict) and "body" in response:
+        if int(response.get("statusCode", 200)) >= 400:
+            return True
+        response = response["body"]
+    if isinstance(response, (str, bytes)):
+        try:
+            response = json.loads(response)
+        except ValueError:
+            return True
+    if not isinstance(response, dict):
+        return True
+    return bool(response.get("errors")) or response.get("data") is None
+
+
+def is_current(versions: Dict[Tuple[str, str], int]) -> bool:
+    """True when every versioned coordination a response read is unchanged."""
+    current = get_coordination_versions(versions.keys())
+    return all(current.get(key) == version for key, version in versions.items())
+
+
+def execute_with_response_cache(
+    params: Dict[str, Any], execute: Callable[[], Any]
+) -> Any:
+    """
+    Serve a read-only GraphQL request from the process-level response cache.
+
+    The key is sha256(normalized query, variables, partition_key, operation
+    name). On a miss the query runs once for all concurrent identical
+    requests, while the model type functions, list resolvers and batch
+    loaders record the keys of every entity they read. The response is stored
+    under those tags. A purge of an entity drops every response that read it.
+    It also drops every response that listed its type or a type it cascades
+    into through `Config.CACHE_RELATIONSHIPS`. Coordinations are versioned
+    rather than purged across containers, so a hit checks the current version
+    of every coordination the response read (from the `coordination_versions`
+    L1, or one BatchGetItem) and is dropped when one moved.
+
+    Mutations and other operations always call `execute` directly. Responses
+    with errors and responses that read no entity are not cached, since no
+    purge could invalidate them.
+    """
+    cache = (
+        get_local_cache(RESPONSE_CACHE_NAME)
+        if Config.is_response_cache_enabled()
+        else None
+    )
+    if cache is None:
+        return execute()
+
+    operation_name = params.get("operation_name") or params.get("operationName")
+    normalized_query = get_cacheable_query(params.get("query"), operation_name)
+    if normalized_query is None:
+        return execute()
+
+    cache_key = get_response_cache_key(
+        normalized_query,
+        params.get("variables"),
+        (params.get("context") or {}).get("partition_key"),
+        operation_name,
+    )
+    cached = cache.get(cache_key)
+    if cached is not None:
+        response, versions = cached
+        if is_current(versions):
+            return copy.deepcopy(response)
+        cache.delete(cache_key)
+
+    def load():
+        start = time.monotonic()
+        token = collect_response_tags()
+        versions_token = collect_response_versions()
+        try:
+            response = execute()
+        finally:
+            versions = reset_response_versions(versions_token)
+            tags = reset_response_tags(token)
+        if tags and not has_errors(response):
+            cache.set(
+                cache_key,
+                (copy.deepcopy(response), versions),
+                tags=tags,
+                delta=time.monotonic() - start,
+            )
+        return response
+
+    return copy.deepcopy(cache.single_flight(cache_key, load))
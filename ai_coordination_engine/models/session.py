@@ -17,20 +17,39 @@ from pynamodb.attributes import (
     UnicodeAttribute,
     UTCDateTimeAttribute,
 )
-from pynamodb.indexes import AllProjection, LocalSecondaryIndex
+from pynamodb.indexes import (
+    AllProjection,
+    GlobalSecondaryIndex,
+    LocalSecondaryIndex,
+)
 from silvaengine_dynamodb_base import (
     BaseModel,
     delete_decorator,
     insert_update_decorator,
     monitor_decorator,
-    resolve_list_decorator,
 )
 from silvaengine_utility import method_cache
 from ..utils.normalization import normalize_to_json
+from ..utils.payload_store import offload_subtask_queries
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from ..handlers.config import Config
 from ..types.session import SessionListType, SessionType
+from .cache import get_value_tags, negative_cache, record_response_tags, single_flight
+from .pagination import resolve_cursor_list_decorator
+from .utils import is_index_active, partition_key_updated_at_index
+
+TERMINAL_SESSION_STATUSES = ["completed", "failed", "timeout"]
+# Status of the stub row an archived session leaves behind in the table
+ARCHIVED_SESSION_STATUS = "archived"
+# Statuses in which a session waits on the engine; only these are indexed in
+# the sparse active-session index
+ACTIVE_SESSION_STATUSES = ["initial", "dispatched", "in_progress"]
+
+
+def get_active_partition_key(status: str, partition_key: str) -> str | None:
+    """The active_partition_key of a session in `status`; None takes it out of the index."""
+    return partition_key if status in ACTIVE_SESSION_STATUSES else None
 
 
 class UserIdIndex(LocalSecondaryIndex):
@@ -63,6 +82,25 @@ class TaskUuidIndex(LocalSecondaryIndex):
     task_uuid = UnicodeAttribute(range_key=True)
 
 
+class ActiveSessionIndex(GlobalSecondaryIndex):
+    """
+    This class represents a sparse global secondary index
+
+    Only sessions in an ACTIVE_SESSION_STATUSES status carry
+    active_partition_key, so the index holds in-flight sessions ordered by
+    their last update.
+    """
+
+    class Meta:
+        billing_mode = "PAY_PER_REQUEST"
+        # All attributes are projected
+        projection = AllProjection()
+        index_name = "active_partition_key-updated_at-index"
+
+    active_partition_key = UnicodeAttribute(hash_key=True)
+    updated_at = UTCDateTimeAttribute(range_key=True)
+
+
 class SessionModel(BaseModel):
     class Meta(BaseModel.Meta):
         table_name = "ace-sessions"
@@ -72,6 +110,7 @@ class SessionModel(BaseModel):
     task_uuid = UnicodeAttribute(null=True)
     user_id = UnicodeAttribute(null=True)
     partition_key = UnicodeAttribute()
+    active_partition_key = UnicodeAttribute(null=True)
     task_query = UnicodeAttribute(null=True)
     input_files = ListAttribute(of=MapAttribute)
     iteration_count = NumberAttribute(default=0)
@@ -83,6 +122,8 @@ class SessionModel(BaseModel):
     updated_at = UTCDateTimeAttribute()
     task_uuid_index = TaskUuidIndex()
     user_id_index = UserIdIndex()
+    partition_key_index = partition_key_updated_at_index()
+    active_session_index = ActiveSessionIndex()
 
 
 def purge_cache():
@@ -140,6 +181,8 @@ def purge_cache():
     wait=wait_exponential(multiplier=1, max=60),
     stop=stop_after_attempt(5),
 )
+@negative_cache("session", ["coordination_uuid", "session_uuid"], SessionModel)
+@single_flight("session")
 @method_cache(
     ttl=Config.get_cache_ttl(),
     cache_name=Config.get_cache_name("models", "session"),
@@ -171,6 +214,7 @@ def get_session_type(info: ResolveInfo, session: SessionModel) -> SessionType:
     """
     _ = info  # Keep for signature compatibility with decorators
     session_dict = session.__dict__["attribute_values"].copy()
+    record_response_tags(get_value_tags(session_dict))
     # Keep all fields including FKs - nested resolvers will handle lazy loading
     return SessionType(**normalize_to_json(session_dict))
 
@@ -180,14 +224,22 @@ def resolve_session(info: ResolveInfo, **kwargs: Dict[str, Any]) -> SessionType
     if count == 0:
         return None
 
-    return get_session_type(
-        info,
-        get_session(kwargs["coordination_uuid"], kwargs["session_uuid"]),
-    )
+    session = get_session(kwargs["coordination_uuid"], kwargs["session_uuid"])
+    if session.status == ARCHIVED_SESSION_STATUS:
+        # Sessions moved to cold storage are rehydrated read-only
+        from ..handlers.session_archive import load_archived_session
+
+        archived_session = load_archived_session(
+            kwargs["coordination_uuid"], kwargs["session_uuid"]
+        )
+        if archived_session is not None:
+            return SessionType(**normalize_to_json(archived_session))
+
+    return get_session_type(info, session)
 
 
 @monitor_decorator
-@resolve_list_decorator(
+@resolve_cursor_list_decorator(
     attributes_to_get=["coordination_uuid", "session_uuid", "task_uuid", "user_id"],
     list_type_class=SessionListType,
     type_funct=get_session_type,
@@ -212,10 +264,30 @@ def resolve_session_list(info: ResolveInfo, **kwargs: Dict[str, Any]) -> Any:
             count_funct = SessionModel.user_id_index.count
             args[1] = SessionModel.user_id_index == user_id
             inquiry_funct = SessionModel.user_id_index.query
+    elif (
+        partition_key
+        and statuses
+        and set(statuses) <= set(ACTIVE_SESSION_STATUSES)
+        and is_index_active(SessionModel.active_session_index)
+    ):
+        args = [partition_key, None]
+        inquiry_funct = SessionModel.active_session_index.query
+        count_funct = SessionModel.active_session_index.count
+    elif partition_key and is_index_active(SessionModel.partition_key_index):
+        args = [partition_key, None]
+        inquiry_funct = SessionModel.partition_key_index.query
+        count_funct = SessionModel.partition_key_index.count
 
     the_filters = None  # We can add filters for the query.
-    if partition_key is not None:
+    if partition_key is not None and inquiry_funct not in (
+        SessionModel.active_session_index.query,
+        SessionModel.partition_key_index.query,
+    ):
         the_filters &= SessionModel.partition_key == partition_key
+    if not coordination_uuid and task_uuid is not None:
+        the_filters &= SessionModel.task_uuid == task_uuid
+    if not coordination_uuid and user_id is not None:
+        the_filters &= SessionModel.user_id == user_id
     if statuses is not None:
         the_filters &= SessionModel.status.is_in(*statuses)
     if the_filters is not None:
@@ -248,7 +320,6 @@ def insert_update_session(info: ResolveInfo, **kwargs: Dict[str, Any]) -> None:
         }
         for key in [
             "status",
-            "logs",
             "task_uuid",
             "user_id",
             "task_query",
@@ -258,11 +329,18 @@ def insert_update_session(info: ResolveInfo, **kwargs: Dict[str, Any]) -> None:
         ]:
             if key in kwargs:
                 cols[key] = kwargs[key]
+        cols["subtask_queries"] = offload_subtask_queries(cols["subtask_queries"])
+        active_partition_key = get_active_partition_key(
+            cols.get("status", SessionModel.status.default), cols["partition_key"]
+        )
+        if active_partition_key:
+            cols["active_partition_key"] = active_partition_key
         SessionModel(
             coordination_uuid,
             session_uuid,
             **cols,
         ).save()
+        _append_logs(info, coordination_uuid, session_uuid, **kwargs)
         return
 
     session = kwargs.get("entity")
@@ -274,7 +352,6 @@ def insert_update_session(info: ResolveInfo, **kwargs: Dict[str, Any]) -> None:
     # Map of kwargs keys to SessionModel attributes
     field_map = {
         "status": SessionModel.status,
-        "logs": SessionModel.logs,
         "task_query": SessionModel.task_query,
         "input_files": SessionModel.input_files,
         "iteration_count": SessionModel.iteration_count,
@@ -284,13 +361,48 @@ def insert_update_session(info: ResolveInfo, **kwargs: Dict[str, Any]) -> None:
     # Add actions dynamically based on the presence of keys in kwargs
     for key, field in field_map.items():
         if key in kwargs:  # Check if the key exists in kwargs
-            actions.append(field.set(None if kwargs[key] == "null" else kwargs[key]))
+            value = None if kwargs[key] == "null" else kwargs[key]
+            if key == "subtask_queries":
+                value = offload_subtask_queries(value)
+            actions.append(field.set(value))
+
+    # Keep the sparse active-session index in step with the status
+    if "status" in kwargs:
+        active_partition_key = get_active_partition_key(
+            kwargs["status"], session.partition_key
+        )
+        if active_partition_key:
+            actions.append(SessionModel.active_partition_key.set(active_partition_key))
+        else:
+            actions.append(SessionModel.active_partition_key.remove())
 
     # Update the session
     session.update(actions=actions)
+    _append_logs(info, session.coordination_uuid, session.session_uuid, **kwargs)
     return
 
 
+def _append_logs(
+    info: ResolveInfo,
+    coordination_uuid: str,
+    session_uuid: str,
+    **kwargs: Dict[str, Any],
+) -> None:
+    """Record `logs` entries in the append-only session event log instead of rewriting SessionModel.logs."""
+    if kwargs.get("logs") in (None, "null"):
+        return
+
+    from .session_event import append_session_log_entries
+
+    append_session_log_entries(
+        info,
+        coordination_uuid,
+        session_uuid,
+        kwargs["logs"],
+        updated_by=kwargs["updated_by"],
+    )
+
+
 @delete_decorator(
     keys={
         "hash_key": "coordination_uuid",
@@ -300,5 +412,9 @@ def insert_update_session(info: ResolveInfo, **kwargs: Dict[str, Any]) -> None:
 )
 @purge_cache()
 def delete_session(info: ResolveInfo, **kwargs: Dict[str, Any]) -> bool:
+    from .session_event import delete_session_events
+
+    # Events first, so a failed delete leaves the session to retry on
+    delete_session_events(kwargs.get("entity").session_uuid)
     kwargs.get("entity").delete()
     return True
@@ -6,29 +6,61 @@ __author__ = "bibow"
 
 import functools
 import traceback
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 import pendulum
 from graphene import ResolveInfo
 from pynamodb.attributes import (
-    MapAttribute,
+    BooleanAttribute,
+    ListAttribute,
     NumberAttribute,
     UnicodeAttribute,
     UTCDateTimeAttribute,
 )
+from pynamodb.exceptions import UpdateError
+from pynamodb.expressions.operand import Path
+from pynamodb.indexes import AllProjection, GlobalSecondaryIndex
 from silvaengine_dynamodb_base import (
     BaseModel,
     delete_decorator,
     insert_update_decorator,
     monitor_decorator,
-    resolve_list_decorator,
 )
 from silvaengine_utility import method_cache
 from ..utils.normalization import normalize_to_json
+from ..utils.payload_store import offload_payload
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from ..handlers.config import Config
 from ..types.session_agent import SessionAgentListType, SessionAgentType
+from .attributes import CompressedJSONAttribute
+from .cache import get_value_tags, negative_cache, record_response_tags, single_flight
+from .pagination import resolve_cursor_list_decorator
+from .utils import is_index_active, partition_key_updated_at_index
+
+READY_STATES = ["initial", "pending"]
+# Most recent state transitions kept on a session agent row
+MAX_STATE_TRANSITIONS = 50
+# Conditional update attempts before a concurrent writer's error is raised
+UPDATE_ATTEMPTS = 3
+
+
+class ReadyIndex(GlobalSecondaryIndex):
+    """
+    This class represents a sparse global secondary index
+
+    Only runnable session agents carry ready_key, so querying a session on
+    this index yields its ready queue in priority order.
+    """
+
+    class Meta:
+        billing_mode = "PAY_PER_REQUEST"
+        # All attributes are projected
+        projection = AllProjection()
+        index_name = "session_uuid-ready_key-index"
+
+    session_uuid = UnicodeAttribute(hash_key=True)
+    ready_key = UnicodeAttribute(range_key=True)
 
 
 class SessionAgentModel(BaseModel):
@@ -38,17 +70,28 @@ class SessionAgentModel(BaseModel):
     session_uuid = UnicodeAttribute(hash_key=True)
     session_agent_uuid = UnicodeAttribute(range_key=True)
     coordination_uuid = UnicodeAttribute()
+    partition_key = UnicodeAttribute(null=True)
     agent_uuid = UnicodeAttribute()
-    agent_action = MapAttribute(null=True)
+    agent_action = CompressedJSONAttribute(null=True)
+    # Denormalized from agent_action so list filters work on the compressed map
+    primary_path = BooleanAttribute(null=True)
+    user_in_the_loop = UnicodeAttribute(null=True)
+    predecessors = ListAttribute(of=UnicodeAttribute, null=True)
     user_input = UnicodeAttribute(null=True)
     agent_input = UnicodeAttribute(null=True)
     agent_output = UnicodeAttribute(null=True)
     in_degree = NumberAttribute(default=0)
     state = UnicodeAttribute(default="initial")
+    ready_key = UnicodeAttribute(null=True)
+    # [{"state": ..., "at": ISO-8601}], appended on every state change plus
+    # "ready" when the agent enters the ready queue and "claimed" when dequeued
+    state_transitions = ListAttribute(null=True)
     notes = UnicodeAttribute(null=True)
     updated_by = UnicodeAttribute()
     created_at = UTCDateTimeAttribute()
     updated_at = UTCDateTimeAttribute()
+    partition_key_index = partition_key_updated_at_index()
+    ready_index = ReadyIndex()
 
 
 def purge_cache():
@@ -106,6 +149,10 @@ def purge_cache():
     wait=wait_exponential(multiplier=1, max=60),
     stop=stop_after_attempt(5),
 )
+@negative_cache(
+    "session_agent", ["session_uuid", "session_agent_uuid"], SessionAgentModel
+)
+@single_flight("session_agent")
 @method_cache(
     ttl=Config.get_cache_ttl(),
     cache_name=Config.get_cache_name("models", "session_agent"),
@@ -140,6 +187,7 @@ def get_session_agent_type(
     """
     _ = info  # Keep for signature compatibility with decorators
     session_agent_dict = session_agent.__dict__["attribute_values"].copy()
+    record_response_tags(get_value_tags(session_agent_dict))
     # Keep all fields including FKs - nested resolvers will handle lazy loading
     return SessionAgentType(**normalize_to_json(session_agent_dict))
 
@@ -160,7 +208,7 @@ def resolve_session_agent(
 
 
 @monitor_decorator
-@resolve_list_decorator(
+@resolve_cursor_list_decorator(
     attributes_to_get=["session_uuid", "session_agent_uuid"],
     list_type_class=SessionAgentListType,
     type_funct=get_session_agent_type,
@@ -175,6 +223,7 @@ def resolve_session_agent_list(info: ResolveInfo, **kwargs: Dict[str, Any]) -> A
     predecessors = kwargs.get("predecessors")
     in_degree = kwargs.get("in_degree")
     states = kwargs.get("states")
+    partition_key = info.context.get("partition_key")
 
     args = []
     inquiry_funct = SessionAgentModel.scan
@@ -182,22 +231,32 @@ def resolve_session_agent_list(info: ResolveInfo, **kwargs: Dict[str, Any]) -> A
     if session_uuid:
         args = [session_uuid, None]
         inquiry_funct = SessionAgentModel.query
+    elif partition_key and is_index_active(SessionAgentModel.partition_key_index):
+        args = [partition_key, None]
+        inquiry_funct = SessionAgentModel.partition_key_index.query
+        count_funct = SessionAgentModel.partition_key_index.count
 
     the_filters = None  # We can add filters for the query.
+    if partition_key and inquiry_funct == SessionAgentModel.scan:
+        the_filters &= SessionAgentModel.partition_key == partition_key
     if coordination_uuid is not None:
         the_filters &= SessionAgentModel.coordination_uuid == coordination_uuid
     if agent_uuid is not None:
         the_filters &= SessionAgentModel.agent_uuid == agent_uuid
+    # Rows written before agent_action was compressed still carry it as a map,
+    # so the map path is kept as a fallback with pre-serialized values.
     if primary_path is not None:
-        the_filters &= SessionAgentModel.agent_action["primary_path"] == primary_path
+        the_filters &= (SessionAgentModel.primary_path == primary_path) | (
+            Path(["agent_action", "primary_path"]) == {"BOOL": primary_path}
+        )
     if user_in_the_loop is not None:
-        the_filters &= (
-            SessionAgentModel.agent_action["user_in_the_loop"] == user_in_the_loop
+        the_filters &= (SessionAgentModel.user_in_the_loop == user_in_the_loop) | (
+            Path(["agent_action", "user_in_the_loop"]) == {"S": user_in_the_loop}
         )
     if predecessor is not None:
-        the_filters &= SessionAgentModel.agent_action["predecessors"].contains(
-            predecessor
-        )
+        the_filters &= SessionAgentModel.predecessors.contains(predecessor) | Path(
+            ["agent_action", "predecessors"]
+        ).contains({"S": predecessor})
     if predecessors is not None:
         the_filters &= SessionAgentModel.agent_uuid.is_in(*predecessors)
     if in_degree is not None:
@@ -228,6 +287,7 @@ def insert_update_session_agent(info: ResolveInfo, **kwargs: Dict[str, Any]) ->
     if kwargs.get("entity") is None:
         cols = {
             "coordination_uuid": kwargs["coordination_uuid"],
+            "partition_key": info.context.get("partition_key"),
             "agent_uuid": kwargs["agent_uuid"],
             "agent_action": {
                 "primary_path": True,
@@ -252,7 +312,25 @@ def insert_update_session_agent(info: ResolveInfo, **kwargs: Dict[str, Any]) ->
                 if key == "agent_action":
                     cols[key] = dict(cols[key], **kwargs[key])
                     continue
+                if key in ["agent_input", "agent_output"]:
+                    cols[key] = offload_payload(kwargs[key])
+                    continue
                 cols[key] = kwargs[key]
+        cols.update(get_agent_action_filter_values(cols["agent_action"]))
+        cols["ready_key"] = get_ready_key(
+            cols.get("in_degree", 0),
+            cols.get("state", "initial"),
+            cols["agent_action"],
+            cols["created_at"],
+            session_agent_uuid,
+        )
+        cols["state_transitions"] = [
+            get_state_transition(cols.get("state", "initial"), cols["created_at"])
+        ]
+        if cols["ready_key"] is not None:
+            cols["state_transitions"].append(
+                get_state_transition("ready", cols["created_at"])
+            )
         SessionAgentModel(
             session_uuid,
             session_agent_uuid,
@@ -260,11 +338,52 @@ def insert_update_session_agent(info: ResolveInfo, **kwargs: Dict[str, Any]) ->
         ).save()
         return
 
-    session_agent = kwargs.get("entity")
+    # The decorator's entity may come from the model cache. Transitions and the
+    # ready key are derived from a consistent read instead, and the update is
+    # conditioned on it, so a concurrent write makes this one re-read.
+    for attempt in range(UPDATE_ATTEMPTS):
+        session_agent = SessionAgentModel.get(
+            session_uuid, session_agent_uuid, consistent_read=True
+        )
+        try:
+            session_agent.update(
+                actions=get_update_actions(session_agent, kwargs),
+                condition=SessionAgentModel.updated_at == session_agent.updated_at,
+            )
+            return
+        except UpdateError as e:
+            if (
+                e.cause_response_code != "ConditionalCheckFailedException"
+                or attempt == UPDATE_ATTEMPTS - 1
+            ):
+                raise
+
+
+@delete_decorator(
+    keys={
+        "hash_key": "session_uuid",
+        "range_key": "session_agent_uuid",
+    },
+    model_funct=get_session_agent,
+)
+@purge_cache()
+def delete_session_agent(info: ResolveInfo, **kwargs: Dict[str, Any]) -> bool:
+    kwargs.get("entity").delete()
+    return True
+
+
+def get_update_actions(
+    session_agent: SessionAgentModel, kwargs: Dict[str, Any]
+) -> List[Any]:
+    """Update actions applying `kwargs` to a freshly read session agent."""
+    now = pendulum.now("UTC")
     actions = [
         SessionAgentModel.updated_by.set(kwargs["updated_by"]),
-        SessionAgentModel.updated_at.set(pendulum.now("UTC")),
+        SessionAgentModel.updated_at.set(now),
     ]
+    state_transitions = []
+    if "state" in kwargs and kwargs["state"] != session_agent.state:
+        state_transitions.append(get_state_transition(kwargs["state"], now))
     # Map of potential keys in kwargs to SessionAgentModel attributes
     field_map = {
         "agent_action": SessionAgentModel.agent_action,
@@ -276,28 +395,181 @@ def insert_update_session_agent(info: ResolveInfo, **kwargs: Dict[str, Any]) ->
         "notes": SessionAgentModel.notes,
     }
 
+    agent_action = dict(session_agent.agent_action or {})
+
     # Check if a key exists in kwargs before adding it to the update actions
     for key, field in field_map.items():
         if key in kwargs:
             value = kwargs[key]
             if key == "agent_action":
-                value = dict(actions.__dict__["attribute_values"], **value)
+                value = agent_action = dict(agent_action, **value)
+                for attr_name, attr_value in get_agent_action_filter_values(
+                    agent_action
+                ).items():
+                    attribute = getattr(SessionAgentModel, attr_name)
+                    actions.append(
+                        attribute.remove()
+                        if attr_value is None
+                        else attribute.set(attr_value)
+                    )
+            elif key in ["agent_input", "agent_output"]:
+                value = offload_payload(value)
 
             actions.append(field.set(value))
 
-    # Update the session_agent entity
-    session_agent.update(actions=actions)
-    return
+    # Keep the sparse ready index in step with in_degree/state
+    ready_key = get_ready_key(
+        kwargs.get("in_degree", session_agent.in_degree),
+        kwargs.get("state", session_agent.state),
+        agent_action,
+        session_agent.created_at,
+        session_agent.session_agent_uuid,
+    )
+    if ready_key is None:
+        actions.append(SessionAgentModel.ready_key.remove())
+    elif ready_key != session_agent.ready_key:
+        actions.append(SessionAgentModel.ready_key.set(ready_key))
+        if session_agent.ready_key is None:
+            state_transitions.append(get_state_transition("ready", now))
+    if state_transitions:
+        transitions = list(session_agent.state_transitions or []) + state_transitions
+        if len(transitions) > MAX_STATE_TRANSITIONS:
+            # Keep the item bounded; the timeline only reads the latest transitions
+            actions.append(
+                SessionAgentModel.state_transitions.set(
+                    transitions[-MAX_STATE_TRANSITIONS:]
+                )
+            )
+        else:
+            actions.append(append_state_transitions(state_transitions))
+
+    return actions
+
+
+def get_agent_action_filter_values(
+    agent_action: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Top-level copies of the agent_action keys that resolve_session_agent_list filters on."""
+    agent_action = agent_action or {}
+    return {
+        "primary_path": agent_action.get("primary_path"),
+        "user_in_the_loop": agent_action.get("user_in_the_loop"),
+        "predecessors": agent_action.get("predecessors") or [],
+    }
 
 
-@delete_decorator(
-    keys={
-        "hash_key": "session_uuid",
-        "range_key": "session_agent_uuid",
-    },
-    model_funct=get_session_agent,
-)
-@purge_cache()
-def delete_session_agent(info: ResolveInfo, **kwargs: Dict[str, Any]) -> bool:
-    kwargs.get("entity").delete()
+def get_ready_key(
+    in_degree: int,
+    state: str,
+    agent_action: Optional[Dict[str, Any]],
+    created_at: Any,
+    session_agent_uuid: str,
+) -> Optional[str]:
+    """
+    Build the ready-queue sort key, or None when the agent is not runnable.
+
+    Primary-path agents sort first, then agents are dequeued in creation order.
+    """
+    if int(in_degree or 0) != 0 or state not in READY_STATES:
+        return None
+    priority = "0" if (agent_action or {}).get("primary_path") else "1"
+    return f"{priority}#{pendulum.instance(created_at).to_iso8601_string()}#{session_agent_uuid}"
+
+
+def get_state_transition(state: str, at: Any) -> Dict[str, str]:
+    return {"state": state, "at": pendulum.instance(at).to_iso8601_string()}
+
+
+def append_state_transitions(state_transitions: List[Dict[str, str]]) -> Any:
+    """Update action appending to state_transitions, which older rows may lack."""
+    return SessionAgentModel.state_transitions.set(
+        (SessionAgentModel.state_transitions | []).append(state_transitions)
+    )
+
+
+def claim_ready_session_agent(
+    info: ResolveInfo, session_agent: SessionAgentModel
+) -> bool:
+    """
+    Take a session agent off the ready queue with a conditional update.
+
+    Returns:
+        True if this worker claimed the agent, False if another worker did
+    """
+    now = pendulum.now("UTC")
+    if session_agent.ready_key is not None:
+        condition = SessionAgentModel.ready_key == session_agent.ready_key
+    else:
+        # Rows that were never enqueued; updated_at changes on any other claim
+        condition = SessionAgentModel.ready_key.does_not_exist() & (
+            SessionAgentModel.updated_at == session_agent.updated_at
+        )
+    try:
+        session_agent.update(
+            actions=[
+                SessionAgentModel.ready_key.remove(),
+                SessionAgentModel.updated_at.set(now),
+                append_state_transitions([get_state_transition("claimed", now)]),
+            ],
+            condition=condition,
+        )
+    except UpdateError as e:
+        if e.cause_response_code == "ConditionalCheckFailedException":
+            return False
+        raise
+
+    from ..models.cache import purge_entity_cascading_cache
+
+    purge_entity_cascading_cache(
+        info.context.get("logger"),
+        entity_type="session_agent",
+        context_keys=None,
+        entity_keys={
+            "session_uuid": session_agent.session_uuid,
+            "session_agent_uuid": session_agent.session_agent_uuid,
+        },
+        cascade_depth=3,
+    )
     return True
+
+
+def dequeue_ready_session_agents(
+    info: ResolveInfo, session_uuid: str, limit: Optional[int] = None
+) -> List[SessionAgentType]:
+    """
+    Claim the runnable session agents of a session in priority order.
+
+    Reads only the sparse ready index, so the cost is proportional to the
+    number of ready agents rather than to the size of the session. Until the
+    index is ACTIVE the session's rows are read and ordered by ready_key.
+    """
+    if is_index_active(SessionAgentModel.ready_index):
+        candidates = SessionAgentModel.ready_index.query(session_uuid, limit=limit)
+    else:
+        candidates = sorted(
+            SessionAgentModel.query(
+                session_uuid,
+                filter_condition=SessionAgentModel.ready_key.exists(),
+                consistent_read=True,
+            ),
+            key=lambda session_agent: session_agent.ready_key,
+        )[:limit]
+
+    ready_session_agents = []
+    for session_agent in candidates:
+        if claim_ready_session_agent(info, session_agent):
+            ready_session_agents.append(get_session_agent_type(info, session_agent))
+    return ready_session_agents
+
+
+def requeue_session_agent(info: ResolveInfo, session_agent: SessionAgentType) -> None:
+    """Put a runnable session agent back on the ready queue (e.g. after a lost claim)."""
+    insert_update_session_agent(
+        info,
+        **{
+            "session_uuid": session_agent.session_uuid,
+            "session_agent_uuid": session_agent.session_agent_uuid,
+            "state": session_agent.state,
+            "updated_by": "procedure_hub",
+        },
+    )
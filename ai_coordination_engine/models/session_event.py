@@ -0,0 +1,201 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import uuid
+from typing import Any, Dict, Iterator, List, Optional
+
+import pendulum
+from graphene import ResolveInfo
+from pynamodb.attributes import UnicodeAttribute, UTCDateTimeAttribute
+from silvaengine_dynamodb_base import BaseModel, monitor_decorator
+from silvaengine_utility.serializer import Serializer
+
+from ..types.session_event import SessionEventListType, SessionEventType
+from ..utils.normalization import normalize_to_json
+from .pagination import resolve_cursor_list_decorator
+
+DEFAULT_EVENT_PAGE_SIZE = 100
+
+
+class SessionEventModel(BaseModel):
+    """
+    Append-only session event log.
+
+    event_id is time ordered, so a query on session_uuid returns the events
+    in the order they were appended. Rows are only ever put, never updated.
+    """
+
+    class Meta(BaseModel.Meta):
+        table_name = "ace-session_events"
+
+    session_uuid = UnicodeAttribute(hash_key=True)
+    event_id = UnicodeAttribute(range_key=True)
+    coordination_uuid = UnicodeAttribute()
+    partition_key = UnicodeAttribute(null=True)
+    event_type = UnicodeAttribute(default="log")
+    run_uuid = UnicodeAttribute(null=True)
+    agent_uuid = UnicodeAttribute(null=True)
+    log = UnicodeAttribute(null=True)
+    updated_by = UnicodeAttribute()
+    created_at = UTCDateTimeAttribute()
+
+
+def new_event_id(created_at: pendulum.DateTime) -> str:
+    """Sortable event id: microsecond timestamp plus a uniquifier for same-tick appends."""
+    timestamp = created_at.format("YYYY-MM-DDTHH:mm:ss.SSSSSS")
+    return f"{timestamp}#{uuid.uuid1().int >> 64}"
+
+
+def append_session_event(
+    info: ResolveInfo,
+    coordination_uuid: str,
+    session_uuid: str,
+    log: Optional[str] = None,
+    event_type: str = "log",
+    run_uuid: Optional[str] = None,
+    agent_uuid: Optional[str] = None,
+    updated_by: str = "ai_coordination_engine",
+) -> SessionEventType:
+    """
+    Append one event to a session's log with a single PutItem.
+
+    Unlike rewriting SessionModel.logs, the cost of an append does not grow
+    with the number of events already recorded for the session.
+    """
+    created_at = pendulum.now("UTC")
+    session_event = SessionEventModel(
+        session_uuid,
+        new_event_id(created_at),
+        coordination_uuid=coordination_uuid,
+        partition_key=info.context.get("partition_key"),
+        event_type=event_type,
+        run_uuid=run_uuid,
+        agent_uuid=agent_uuid,
+        log=log,
+        updated_by=updated_by,
+        created_at=created_at,
+    )
+    session_event.save()
+    return get_session_event_type(info, session_event)
+
+
+def append_session_log_entries(
+    info: ResolveInfo,
+    coordination_uuid: str,
+    session_uuid: str,
+    logs: Any,
+    updated_by: str = "ai_coordination_engine",
+) -> None:
+    """
+    Append legacy-shaped log entries ({"error"}, {"run_uuid", "log"}, {"agent_uuid", "log"}).
+
+    Accepts either a list of entries or its JSON string, which is what callers
+    used to write into SessionModel.logs.
+    """
+    for entry in parse_log_entries(logs):
+        append_session_event(
+            info,
+            coordination_uuid,
+            session_uuid,
+            log=entry.get("error", entry.get("log")),
+            event_type="error" if "error" in entry else "log",
+            run_uuid=entry.get("run_uuid"),
+            agent_uuid=entry.get("agent_uuid"),
+            updated_by=updated_by,
+        )
+
+
+def parse_log_entries(logs: Any) -> List[Dict[str, Any]]:
+    """Legacy log entries from a list, a single entry or their JSON string."""
+    if isinstance(logs, str):
+        logs = Serializer.json_loads(logs) if logs and logs != "null" else []
+    if isinstance(logs, dict):
+        logs = [logs]
+    return list(logs or [])
+
+
+def delete_session_events(session_uuid: str) -> int:
+    """Delete every event of a session; returns the number deleted."""
+    deleted = 0
+    with SessionEventModel.batch_write() as batch:
+        for session_event in SessionEventModel.query(
+            session_uuid, attributes_to_get=["session_uuid", "event_id"]
+        ):
+            batch.delete(session_event)
+            deleted += 1
+    return deleted
+
+
+def iter_session_events(
+    session_uuid: str, page_size: int = DEFAULT_EVENT_PAGE_SIZE
+) -> Iterator[SessionEventModel]:
+    """Stream a session's events in append order, fetching one page at a time."""
+    return SessionEventModel.query(session_uuid, page_size=page_size)
+
+
+def to_log_entry(session_event: Dict[str, Any]) -> Dict[str, Any]:
+    """Render an event in the shape of the legacy SessionModel.logs entries."""
+    entry = {
+        k: session_event.get(k)
+        for k in ["run_uuid", "agent_uuid"]
+        if session_event.get(k) is not None
+    }
+    entry["error" if session_event.get("event_type") == "error" else "log"] = (
+        session_event.get("log")
+    )
+    entry["created_at"] = session_event.get("created_at")
+    return entry
+
+
+def merge_session_logs(
+    legacy_logs: Any, session_events: List[Dict[str, Any]]
+) -> Optional[str]:
+    """
+    Render a session's logs as a JSON string: the inline SessionModel.logs
+    entries written before the event log existed, then the events in append
+    order. None when there are neither.
+    """
+    entries = parse_log_entries(legacy_logs)
+    entries.extend(to_log_entry(session_event) for session_event in session_events)
+    return Serializer.json_dumps(entries) if entries else None
+
+
+def get_session_event_type(
+    info: ResolveInfo, session_event: SessionEventModel
+) -> SessionEventType:
+    _ = info  # Keep for signature compatibility with decorators
+    return SessionEventType(
+        **normalize_to_json(session_event.__dict__["attribute_values"].copy())
+    )
+
+
+@monitor_decorator
+@resolve_cursor_list_decorator(
+    attributes_to_get=["session_uuid", "event_id"],
+    list_type_class=SessionEventListType,
+    type_funct=get_session_event_type,
+)
+def resolve_session_event_list(info: ResolveInfo, **kwargs: Dict[str, Any]) -> Any:
+    session_uuid = kwargs["session_uuid"]
+    event_types: Optional[List[str]] = kwargs.get("event_types")
+    run_uuid = kwargs.get("run_uuid")
+    agent_uuid = kwargs.get("agent_uuid")
+
+    args = [session_uuid, None]
+    inquiry_funct = SessionEventModel.query
+    count_funct = SessionEventModel.count
+
+    the_filters = None  # We can add filters for the query.
+    if event_types is not None:
+        the_filters &= SessionEventModel.event_type.is_in(*event_types)
+    if run_uuid is not None:
+        the_filters &= SessionEventModel.run_uuid == run_uuid
+    if agent_uuid is not None:
+        the_filters &= SessionEventModel.agent_uuid == agent_uuid
+    if the_filters is not None:
+        args.append(the_filters)
+
+    return inquiry_funct, count_funct, args
@@ -6,18 +6,19 @@ __author__ = "bibow"
 
 import functools
 import traceback
-from typing import Any, Dict
+import uuid
+from typing import Any, Dict, Tuple
 
 import pendulum
 from graphene import ResolveInfo
 from pynamodb.attributes import UnicodeAttribute, UTCDateTimeAttribute
 from pynamodb.indexes import AllProjection, LocalSecondaryIndex
+from pynamodb.transactions import TransactWrite
 from silvaengine_dynamodb_base import (
     BaseModel,
     delete_decorator,
     insert_update_decorator,
     monitor_decorator,
-    resolve_list_decorator,
 )
 from silvaengine_utility import method_cache
 from ..utils.normalization import normalize_to_json
@@ -25,6 +26,10 @@ from tenacity import retry, stop_after_attempt, wait_exponential
 
 from ..handlers.config import Config
 from ..types.session_run import SessionRunListType, SessionRunType
+from .cache import get_value_tags, negative_cache, record_response_tags, single_flight
+from .pagination import resolve_cursor_list_decorator
+from .session import SessionModel, get_active_partition_key
+from .utils import is_index_active, partition_key_updated_at_index
 
 
 class ThreadUuidIndex(LocalSecondaryIndex):
@@ -69,11 +74,14 @@ class SessionRunModel(BaseModel):
     partition_key = UnicodeAttribute(null=True)
     async_task_uuid = UnicodeAttribute()
     session_agent_uuid = UnicodeAttribute(null=True)
+    # When the run's async task was seen finished (completed or failed)
+    completed_at = UTCDateTimeAttribute(null=True)
     updated_by = UnicodeAttribute()
     created_at = UTCDateTimeAttribute()
     updated_at = UTCDateTimeAttribute()
     agent_uuid_index = AgentUuidIndex()
     thread_uuid_index = ThreadUuidIndex()
+    partition_key_index = partition_key_updated_at_index()
 
 
 def purge_cache():
@@ -127,6 +135,8 @@ def purge_cache():
     wait=wait_exponential(multiplier=1, max=60),
     stop=stop_after_attempt(5),
 )
+@negative_cache("session_run", ["session_uuid", "run_uuid"], SessionRunModel)
+@single_flight("session_run")
 @method_cache(
     ttl=Config.get_cache_ttl(),
     cache_name=Config.get_cache_name("models", "session_run"),
@@ -158,6 +168,7 @@ def get_session_run_type(
     """
     _ = info  # Keep for signature compatibility with decorators
     session_run_dict = session_run.__dict__["attribute_values"].copy()
+    record_response_tags(get_value_tags(session_run_dict))
     return SessionRunType(**normalize_to_json(session_run_dict))
 
 
@@ -175,7 +186,7 @@ def resolve_session_run(
 
 
 @monitor_decorator
-@resolve_list_decorator(
+@resolve_cursor_list_decorator(
     attributes_to_get=["session_uuid", "run_uuid", "agent_uuid", "thread_uuid"],
     list_type_class=SessionRunListType,
     type_funct=get_session_run_type,
@@ -200,10 +211,21 @@ def resolve_session_run_list(info: ResolveInfo, **kwargs: Dict[str, Any]) -> Any
             inquiry_funct = SessionRunModel.thread_uuid_index.query
             args[1] = SessionRunModel.thread_uuid == thread_uuid
             count_funct = SessionRunModel.thread_uuid_index.count
+    elif partition_key and is_index_active(SessionRunModel.partition_key_index):
+        args = [partition_key, None]
+        inquiry_funct = SessionRunModel.partition_key_index.query
+        count_funct = SessionRunModel.partition_key_index.count
 
     the_filters = None  # We can add filters for the query.
-    if partition_key is not None:
+    if (
+        partition_key is not None
+        and inquiry_funct != SessionRunModel.partition_key_index.query
+    ):
         the_filters &= SessionRunModel.partition_key == partition_key
+    if not session_uuid and agent_uuid is not None:
+        the_filters &= SessionRunModel.agent_uuid == agent_uuid
+    if not session_uuid and thread_uuid is not None:
+        the_filters &= SessionRunModel.thread_uuid == thread_uuid
     if coordination_uuid is not None:
         the_filters &= SessionRunModel.coordination_uuid == coordination_uuid
     if the_filters is not None:
@@ -261,6 +283,7 @@ def insert_update_session_run(info: ResolveInfo, **kwargs: Dict[str, Any]) -> No
         "coordination_uuid": SessionRunModel.coordination_uuid,
         "async_task_uuid": SessionRunModel.async_task_uuid,
         "session_agent_uuid": SessionRunModel.session_agent_uuid,
+        "completed_at": SessionRunModel.completed_at,
     }
 
     # Check if a key exists in kwargs before adding it to the update actions
@@ -283,3 +306,128 @@ def insert_update_session_run(info: ResolveInfo, **kwargs: Dict[str, Any]) -> No
 def delete_session_run(info: ResolveInfo, **kwargs: Dict[str, Any]) -> bool:
     kwargs.get("entity").delete()
     return True
+
+
+def complete_session_run(
+    info: ResolveInfo,
+    session_uuid: str,
+    run_uuid: str,
+    async_task: Dict[str, Any],
+    updated_by: str,
+) -> None:
+    """
+    Stamp `completed_at` on a session run whose async task has finished.
+
+    The task's own `updated_at` is used when it parses, since the run is only
+    seen finished on the next poll.
+    """
+    try:
+        completed_at = pendulum.parse(async_task["updated_at"]).in_tz("UTC")
+    except Exception:
+        completed_at = pendulum.now("UTC")
+
+    insert_update_session_run(
+        info,
+        **{
+            "session_uuid": session_uuid,
+            "run_uuid": run_uuid,
+            "completed_at": completed_at,
+            "updated_by": updated_by,
+        },
+    )
+
+
+def insert_session_with_session_run(
+    info: ResolveInfo, **kwargs: Dict[str, Any]
+) -> Tuple[Dict[str, Any], SessionRunType]:
+    """
+    Upsert a session and create its session run in a single TransactWriteItems call.
+
+    The session write is an update with if_not_exists defaults, so it creates the
+    session when session_uuid is new and otherwise only touches status/updated_*.
+    The result is built from the written values; nothing is read back.
+
+    Args:
+        info: GraphQL resolve info
+        kwargs: coordination_uuid, run_uuid, thread_uuid, agent_uuid, async_task_uuid,
+            updated_by; optional session_uuid, user_id, status, session_agent_uuid
+
+    Returns:
+        Tuple of (session keys dict, SessionRunType)
+    """
+    coordination_uuid = kwargs["coordination_uuid"]
+    session_uuid = kwargs.get("session_uuid") or str(uuid.uuid1().int >> 64)
+    partition_key = info.context.get("partition_key")
+    status = kwargs.get("status", "initial")
+    now = pendulum.now("UTC")
+
+    session_actions = [
+        SessionModel.partition_key.set(SessionModel.partition_key | partition_key),
+        SessionModel.input_files.set(SessionModel.input_files | []),
+        SessionModel.subtask_queries.set(SessionModel.subtask_queries | []),
+        SessionModel.iteration_count.set(SessionModel.iteration_count | 0),
+        SessionModel.created_at.set(SessionModel.created_at | now),
+        SessionModel.status.set(status),
+        SessionModel.updated_by.set(kwargs["updated_by"]),
+        SessionModel.updated_at.set(now),
+    ]
+    if kwargs.get("user_id") is not None:
+        session_actions.append(
+            SessionModel.user_id.set(SessionModel.user_id | kwargs["user_id"])
+        )
+    active_partition_key = get_active_partition_key(status, partition_key)
+    if active_partition_key:
+        session_actions.append(
+            SessionModel.active_partition_key.set(active_partition_key)
+        )
+    else:
+        session_actions.append(SessionModel.active_partition_key.remove())
+
+    run_cols = {
+        "thread_uuid": kwargs["thread_uuid"],
+        "agent_uuid": kwargs["agent_uuid"],
+        "coordination_uuid": coordination_uuid,
+        "partition_key": partition_key,
+        "async_task_uuid": kwargs["async_task_uuid"],
+        "updated_by": kwargs["updated_by"],
+        "created_at": now,
+        "updated_at": now,
+    }
+    if kwargs.get("session_agent_uuid") is not None:
+        run_cols["session_agent_uuid"] = kwargs["session_agent_uuid"]
+
+    with TransactWrite(
+        connection=SessionModel._get_connection().connection
+    ) as transaction:
+        transaction.update(
+            SessionModel(coordination_uuid, session_uuid), actions=session_actions
+        )
+        transaction.save(
+            SessionRunModel(session_uuid, kwargs["run_uuid"], **run_cols)
+        )
+
+    # One cascading purge covers the session and its session run lists
+    from ..models.cache import purge_entity_cascading_cache
+
+    purge_entity_cascading_cache(
+        info.context.get("logger"),
+        entity_type="session",
+        context_keys=None,
+        entity_keys={
+            "coordination_uuid": coordination_uuid,
+            "session_uuid": session_uuid,
+        },
+        cascade_depth=3,
+    )
+
+    session = {
+        "coordination_uuid": coordination_uuid,
+        "session_uuid": session_uuid,
+        "partition_key": partition_key,
+        "status": status,
+    }
+    return session, SessionRunType(
+        **normalize_to_json(
+            dict(run_cols, session_uuid=session_uuid, run_uuid=kwargs["run_uuid"])
+        )
+    )
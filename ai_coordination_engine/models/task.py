@@ -21,7 +21,6 @@ from silvaengine_dynamodb_base import (
     delete_decorator,
     insert_update_decorator,
     monitor_decorator,
-    resolve_list_decorator,
 )
 from silvaengine_utility import method_cache
 from ..utils.normalization import normalize_to_json
@@ -29,7 +28,14 @@ from tenacity import retry, stop_after_attempt, wait_exponential
 
 from ..handlers.config import Config
 from ..types.task import TaskListType, TaskType
-from .utils import get_coordination
+from .attributes import CompressedJSONAttribute
+from .cache import get_value_tags, negative_cache, record_response_tags, single_flight
+from .pagination import resolve_cursor_list_decorator
+from .utils import (
+    get_coordination,
+    is_index_active,
+    partition_key_updated_at_index,
+)
 
 
 class TaskModel(BaseModel):
@@ -43,10 +49,11 @@ class TaskModel(BaseModel):
     task_description = UnicodeAttribute(null=True)
     initial_task_query = UnicodeAttribute()
     subtask_queries = ListAttribute(of=MapAttribute)
-    agent_actions = MapAttribute()
+    agent_actions = CompressedJSONAttribute()
     updated_by = UnicodeAttribute()
     created_at = UTCDateTimeAttribute()
     updated_at = UTCDateTimeAttribute()
+    partition_key_index = partition_key_updated_at_index()
 
 
 def purge_cache():
@@ -104,6 +111,8 @@ def purge_cache():
     wait=wait_exponential(multiplier=1, max=60),
     stop=stop_after_attempt(5),
 )
+@negative_cache("task", ["coordination_uuid", "task_uuid"], TaskModel)
+@single_flight("task")
 @method_cache(
     ttl=Config.get_cache_ttl(),
     cache_name=Config.get_cache_name("models", "task"),
@@ -133,6 +142,7 @@ def get_task_type(info: ResolveInfo, task: TaskModel) -> TaskType:
     """
     _ = info  # Keep for signature compatibility with decorators
     task_dict = task.__dict__["attribute_values"].copy()
+    record_response_tags(get_value_tags(task_dict))
     # Keep all fields including FKs - nested resolvers will handle lazy loading
     return TaskType(**normalize_to_json(task_dict))
 
@@ -148,7 +158,7 @@ def resolve_task(info: ResolveInfo, **kwargs: Dict[str, Any]) -> TaskType | None
 
 
 @monitor_decorator
-@resolve_list_decorator(
+@resolve_cursor_list_decorator(
     attributes_to_get=["coordination_uuid", "task_uuid"],
     list_type_class=TaskListType,
     type_funct=get_task_type,
@@ -165,6 +175,10 @@ def resolve_task_list(info: ResolveInfo, **kwargs: Dict[str, Any]) -> Any:
     if coordination_uuid:
         args = [coordination_uuid, None]
         inquiry_funct = TaskModel.query
+    elif partition_key and is_index_active(TaskModel.partition_key_index):
+        args = [partition_key, None]
+        inquiry_funct = TaskModel.partition_key_index.query
+        count_funct = TaskModel.partition_key_index.count
 
     the_filters = None  # We can add filters for the query.
     if task_name is not None:
@@ -173,7 +187,10 @@ def resolve_task_list(info: ResolveInfo, **kwargs: Dict[str, Any]) -> Any:
         the_filters &= TaskModel.task_description.contains(task_description)
     if initial_task_query is not None:
         the_filters &= TaskModel.initial_task_query.contains(initial_task_query)
-    if partition_key is not None:
+    if (
+        partition_key is not None
+        and inquiry_funct != TaskModel.partition_key_index.query
+    ):
         the_filters &= TaskModel.partition_key == partition_key
     if the_filters is not None:
         args.append(the_filters)
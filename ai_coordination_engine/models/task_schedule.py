@@ -16,7 +16,6 @@ from silvaengine_dynamodb_base import (
     delete_decorator,
     insert_update_decorator,
     monitor_decorator,
-    resolve_list_decorator,
 )
 from silvaengine_utility import method_cache
 from ..utils.normalization import normalize_to_json
@@ -24,6 +23,9 @@ from tenacity import retry, stop_after_attempt, wait_exponential
 
 from ..handlers.config import Config
 from ..types.task_schedule import TaskScheduleListType, TaskScheduleType
+from .cache import get_value_tags, negative_cache, record_response_tags, single_flight
+from .pagination import resolve_cursor_list_decorator
+from .utils import is_index_active, partition_key_updated_at_index
 
 
 class TaskScheduleModel(BaseModel):
@@ -39,6 +41,7 @@ class TaskScheduleModel(BaseModel):
     updated_by = UnicodeAttribute()
     created_at = UTCDateTimeAttribute()
     updated_at = UTCDateTimeAttribute()
+    partition_key_index = partition_key_updated_at_index()
 
 
 def purge_cache():
@@ -94,6 +97,8 @@ def purge_cache():
     wait=wait_exponential(multiplier=1, max=60),
     stop=stop_after_attempt(5),
 )
+@negative_cache("task_schedule", ["task_uuid", "schedule_uuid"], TaskScheduleModel)
+@single_flight("task_schedule")
 @method_cache(
     ttl=Config.get_cache_ttl(),
     cache_name=Config.get_cache_name("models", "task_schedule"),
@@ -128,6 +133,7 @@ def get_task_schedule_type(
     """
     _ = info  # Keep for signature compatibility with decorators
     task_schedule_dict = task_schedule.__dict__["attribute_values"].copy()
+    record_response_tags(get_value_tags(task_schedule_dict))
     # Keep all fields including FKs - nested resolvers will handle lazy loading
     return TaskScheduleType(**normalize_to_json(task_schedule_dict))
 
@@ -145,7 +151,7 @@ def resolve_task_schedule(
 
 
 @monitor_decorator
-@resolve_list_decorator(
+@resolve_cursor_list_decorator(
     attributes_to_get=["task_uuid", "schedule_uuid"],
     list_type_class=TaskScheduleListType,
     type_funct=get_task_schedule_type,
@@ -162,11 +168,18 @@ def resolve_task_schedule_list(info: ResolveInfo, **kwargs: Dict[str, Any]) -> A
     if task_uuid:
         args = [task_uuid, None]
         inquiry_funct = TaskScheduleModel.query
+    elif partition_key and is_index_active(TaskScheduleModel.partition_key_index):
+        args = [partition_key, None]
+        inquiry_funct = TaskScheduleModel.partition_key_index.query
+        count_funct = TaskScheduleModel.partition_key_index.count
 
     the_filters = None  # We can add filters for the query.
     if coordination_uuid is not None:
         the_filters &= TaskScheduleModel.coordination_uuid == coordination_uuid
-    if partition_key is not None:
+    if (
+        partition_key is not None
+        and inquiry_funct != TaskScheduleModel.partition_key_index.query
+    ):
         the_filters &= TaskScheduleModel.partition_key == partition_key
     if statuses is not None:
         the_filters &= TaskScheduleModel.status.is_in(*statuses)
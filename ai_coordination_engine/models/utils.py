@@ -4,7 +4,42 @@ from __future__ import print_function
 __author__ = "bibow"
 
 import logging
-from typing import Any, Dict
+import time
+from typing import Any, Dict, Tuple
+
+from pynamodb.attributes import UnicodeAttribute, UTCDateTimeAttribute
+from pynamodb.indexes import AllProjection, GlobalSecondaryIndex
+
+# How long a non-ACTIVE index status is trusted before describe_table is re-read
+INDEX_STATUS_TTL_SECONDS = 60
+
+# (table_name, index_name) -> (active, monotonic time of the check)
+_index_statuses: Dict[Tuple[str, str], Tuple[bool, float]] = {}
+
+
+def partition_key_updated_at_index() -> GlobalSecondaryIndex:
+    """
+    Build the `partition_key-updated_at-index` for one model.
+
+    PynamoDB binds an index class to the first model it is declared on
+    (`Meta.model`), so every model gets its own subclass.
+    """
+
+    class PartitionKeyUpdatedAtIndex(GlobalSecondaryIndex):
+        """
+        This class represents a global secondary index
+        """
+
+        class Meta:
+            billing_mode = "PAY_PER_REQUEST"
+            # All attributes are projected
+            projection = AllProjection()
+            index_name = "partition_key-updated_at-index"
+
+        partition_key = UnicodeAttribute(hash_key=True)
+        updated_at = UTCDateTimeAttribute(range_key=True)
+
+    return PartitionKeyUpdatedAtIndex()
 
 
 def initialize_tables(logger: logging.Logger) -> None:
@@ -14,6 +49,7 @@ def initialize_tables(logger: logging.Logger) -> None:
     from .coordination import CoordinationModel
     from .session import SessionModel
     from .session_agent import SessionAgentModel
+    from .session_event import SessionEventModel
     from .session_run import SessionRunModel
     from .task import TaskModel
     from .task_schedule import TaskScheduleModel
@@ -22,6 +58,7 @@ def initialize_tables(logger: logging.Logger) -> None:
         CoordinationModel,
         SessionModel,
         SessionAgentModel,
+        SessionEventModel,
         SessionRunModel,
         TaskModel,
         TaskScheduleModel,
@@ -29,6 +66,8 @@ def initialize_tables(logger: logging.Logger) -> None:
 
     for model in models:
         if model.exists():
+            # Indexes on existing tables are created by
+            # migrations/global_secondary_indexes.py; see is_index_active.
             continue
 
         table_name = model.Meta.table_name
@@ -37,6 +76,38 @@ def initialize_tables(logger: logging.Logger) -> None:
         logger.info(f"The {table_name} table has been created.")
 
 
+def is_index_active(index: GlobalSecondaryIndex) -> bool:
+    """
+    Whether `describe_table` reports the index ACTIVE.
+
+    Indexes added to existing tables are backfilled by DynamoDB after the
+    code that reads them is deployed, so callers fall back to their scan
+    path until this returns True. ACTIVE is cached for the life of the
+    process; any other status is re-read after INDEX_STATUS_TTL_SECONDS.
+    """
+    model = index.Meta.model
+    key = (model.Meta.table_name, index.Meta.index_name)
+    active, checked_at = _index_statuses.get(key, (False, None))
+    if active or (
+        checked_at is not None
+        and time.monotonic() - checked_at < INDEX_STATUS_TTL_SECONDS
+    ):
+        return active
+
+    try:
+        description = model.describe_table()
+        active = any(
+            gsi["IndexName"] == index.Meta.index_name
+            and gsi.get("IndexStatus") == "ACTIVE"
+            for gsi in description.get("GlobalSecondaryIndexes", [])
+        )
+    except Exception:
+        # A role without dynamodb:DescribeTable keeps the indexed path
+        active = True
+    _index_statuses[key] = (active, time.monotonic())
+    return active
+
+
 def get_coordination(partition_key: str, coordination_uuid: str) -> Dict[str, Any]:
     """
     Get coordination as a dictionary for embedding purposes.
@@ -51,9 +122,9 @@ def get_coordination(partition_key: str, coordination_uuid: str) -> Dict[str, An
     Returns:
         Dict containing coordination data
     """
-    from .coordination import get_coordination as _get_coordination
+    from .coordination import get_cached_coordination
 
-    coordination = _get_coordination(partition_key, coordination_uuid)
+    coordination = get_cached_coordination(partition_key, coordination_uuid)
     return {
         "partition_key": coordination.partition_key,
         "endpoint_id": coordination.endpoint_id,
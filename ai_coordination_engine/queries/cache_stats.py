@@ -0,0 +1,24 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+from typing import Any, Dict, List
+
+from graphene import ResolveInfo
+
+from ..models.cache_metrics import get_cache_stats
+from ..types.cache_stats import CacheStatsType
+
+
+def resolve_cache_stats(
+    info: ResolveInfo, **kwargs: Dict[str, Any]
+) -> List[CacheStatsType]:
+    # Stats are per container, so they are never cached themselves.
+    rows = get_cache_stats()
+    if kwargs.get("entity_type"):
+        rows = [row for row in rows if row["entity_type"] == kwargs["entity_type"]]
+    if kwargs.get("layer"):
+        rows = [row for row in rows if row["layer"] == kwargs["layer"]]
+    return [CacheStatsType(**row) for row in rows]
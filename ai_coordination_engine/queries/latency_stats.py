@@ -0,0 +1,29 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+from typing import Any, Dict
+
+from graphene import ResolveInfo
+
+from ..handlers.analytics.latency import get_agent_latency_stats
+from ..types.latency_stats import AgentLatencyStatsType, LatencyGroupType
+
+
+def resolve_agent_latency_stats(
+    info: ResolveInfo, **kwargs: Dict[str, Any]
+) -> AgentLatencyStatsType:
+    stats = get_agent_latency_stats(
+        info.context.get("partition_key"),
+        group_by=kwargs.get("group_by"),
+        start=kwargs.get("start_time"),
+        end=kwargs.get("end_time"),
+        histogram=kwargs.get("histogram", False),
+        coordination_uuid=kwargs.get("coordination_uuid"),
+        agent_uuid=kwargs.get("agent_uuid"),
+    )
+    return AgentLatencyStatsType(
+        **dict(stats, groups=[LatencyGroupType(**group) for group in stats["groups"]])
+    )
@@ -0,0 +1,19 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+from typing import Any, Dict
+
+from graphene import ResolveInfo
+
+from ..models import session_event
+from ..types.session_event import SessionEventListType
+
+
+def resolve_session_event_list(
+    info: ResolveInfo, **kwargs: Dict[str, Any]
+) -> SessionEventListType:
+    # Not method-cached: the event log is append-only and read newest-last.
+    return session_event.resolve_session_event_list(info, **kwargs)
@@ -0,0 +1,27 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+from typing import Any, Dict
+
+from graphene import ResolveInfo
+
+from ..handlers.analytics.session_timeline import get_session_timeline
+from ..types.session_timeline import SessionAgentTimelineType, SessionTimelineType
+
+
+def resolve_session_timeline(
+    info: ResolveInfo, **kwargs: Dict[str, Any]
+) -> SessionTimelineType | None:
+    # Timelines of running sessions change with every transition, so they are not cached.
+    timeline = get_session_timeline(kwargs["coordination_uuid"], kwargs["session_uuid"])
+    if timeline is None:
+        return None
+    return SessionTimelineType(
+        **dict(
+            timeline,
+            agents=[SessionAgentTimelineType(**agent) for agent in timeline["agents"]],
+        )
+    )
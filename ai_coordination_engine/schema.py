@@ -7,7 +7,16 @@ __author__ = "bibow"
 import time
 from typing import Any, Dict
 
-from graphene import Boolean, Field, Int, List, ObjectType, ResolveInfo, String
+from graphene import (
+    Boolean,
+    DateTime,
+    Field,
+    Int,
+    List,
+    ObjectType,
+    ResolveInfo,
+    String,
+)
 from silvaengine_utility import JSONCamelCase
 
 from .mutations.coordination import DeleteCoordination, InsertUpdateCoordination
@@ -17,18 +26,26 @@ from .mutations.session_agent import DeleteSessionAgent, InsertUpdateSessionAgen
 from .mutations.session_run import DeleteSessionRun, InsertUpdateSessionRun
 from .mutations.task import DeleteTask, InsertUpdateTask
 from .mutations.task_schedule import DeleteTaskSchedule, InsertUpdateTaskSchedule
+from .queries.cache_stats import resolve_cache_stats
 from .queries.coordination import resolve_coordination, resolve_coordination_list
+from .queries.latency_stats import resolve_agent_latency_stats
 from .queries.operation_hub import resolve_ask_operation_hub
 from .queries.session import resolve_session, resolve_session_list
 from .queries.session_agent import resolve_session_agent, resolve_session_agent_list
+from .queries.session_event import resolve_session_event_list
 from .queries.session_run import resolve_session_run, resolve_session_run_list
+from .queries.session_timeline import resolve_session_timeline
 from .queries.task import resolve_task, resolve_task_list
 from .queries.task_schedule import resolve_task_schedule, resolve_task_schedule_list
+from .types.cache_stats import CacheStatsType
 from .types.coordination import CoordinationListType, CoordinationType
+from .types.latency_stats import AgentLatencyStatsType
 from .types.operation_hub import AskOperationHubType
 from .types.session import SessionListType, SessionType
 from .types.session_agent import SessionAgentListType, SessionAgentType
+from .types.session_event import SessionEventListType, SessionEventType
 from .types.session_run import SessionRunListType, SessionRunType
+from .types.session_timeline import SessionTimelineType
 from .types.task import TaskListType, TaskType
 from .types.task_schedule import TaskScheduleListType, TaskScheduleType
 
@@ -47,7 +64,12 @@ def type_class():
         SessionAgentListType,
         SessionRunType,
         SessionRunListType,
+        SessionEventType,
+        SessionEventListType,
         AskOperationHubType,
+        CacheStatsType,
+        SessionTimelineType,
+        AgentLatencyStatsType,
     ]
 
 
@@ -63,6 +85,9 @@ class Query(ObjectType):
         CoordinationListType,
         page_number=Int(required=False),
         limit=Int(required=False),
+        after=String(required=False),
+        first=Int(required=False),
+        with_total=Boolean(required=False),
         coordination_name=String(required=False),
         coordination_description=String(required=False),
     )
@@ -77,6 +102,9 @@ class Query(ObjectType):
         SessionListType,
         page_number=Int(required=False),
         limit=Int(required=False),
+        after=String(required=False),
+        first=Int(required=False),
+        with_total=Boolean(required=False),
         coordination_uuid=String(required=False),
         task_uuid=String(required=False),
         user_id=String(required=False),
@@ -93,12 +121,44 @@ class Query(ObjectType):
         SessionRunListType,
         page_number=Int(required=False),
         limit=Int(required=False),
+        after=String(required=False),
+        first=Int(required=False),
+        with_total=Boolean(required=False),
         session_uuid=String(required=False),
         coordination_uuid=String(required=False),
         agent_uuid=String(required=False),
         thread_uuid=String(required=False),
     )
 
+    session_timeline = Field(
+        SessionTimelineType,
+        coordination_uuid=String(required=True),
+        session_uuid=String(required=True),
+    )
+
+    agent_latency_stats = Field(
+        AgentLatencyStatsType,
+        group_by=List(String, required=False),
+        start_time=DateTime(required=True),
+        end_time=DateTime(required=True),
+        coordination_uuid=String(required=False),
+        agent_uuid=String(required=False),
+        histogram=Boolean(required=False),
+    )
+
+    session_event_list = Field(
+        SessionEventListType,
+        page_number=Int(required=False),
+        limit=Int(required=False),
+        after=String(required=False),
+        first=Int(required=False),
+        with_total=Boolean(required=False),
+        session_uuid=String(required=True),
+        event_types=List(String, required=False),
+        run_uuid=String(required=False),
+        agent_uuid=String(required=False),
+    )
+
     task = Field(
         TaskType,
         coordination_uuid=String(required=True),
@@ -109,6 +169,9 @@ class Query(ObjectType):
         TaskListType,
         page_number=Int(required=False),
         limit=Int(required=False),
+        after=String(required=False),
+        first=Int(required=False),
+        with_total=Boolean(required=False),
         coordination_uuid=String(required=False),
         task_name=String(required=False),
         task_description=String(required=False),
@@ -125,6 +188,9 @@ class Query(ObjectType):
         SessionAgentListType,
         page_number=Int(required=False),
         limit=Int(required=False),
+        after=String(required=False),
+        first=Int(required=False),
+        with_total=Boolean(required=False),
         session_uuid=String(required=False),
         coordination_uuid=String(required=False),
         task_uuid=String(required=False),
@@ -147,6 +213,9 @@ class Query(ObjectType):
         TaskScheduleListType,
         page_number=Int(required=False),
         limit=Int(required=False),
+        after=String(required=False),
+        first=Int(required=False),
+        with_total=Boolean(required=False),
         task_uuid=String(required=False),
         coordination_uuid=String(required=False),
         statuses=List(String, required=False),
@@ -166,9 +235,20 @@ class Query(ObjectType):
         thread_life_minutes=Int(required=False),
     )
 
+    cache_stats = List(
+        CacheStatsType,
+        entity_type=String(required=False),
+        layer=String(required=False),
+    )
+
     def resolve_ping(self, info: ResolveInfo) -> str:
         return f"Hello at {time.strftime('%X')}!!"
 
+    def resolve_cache_stats(
+        self, info: ResolveInfo, **kwargs: Dict[str, Any]
+    ) -> list:
+        return resolve_cache_stats(info, **kwargs)
+
     def resolve_coordination(
         self, info: ResolveInfo, **kwargs: Dict[str, Any]
     ) -> CoordinationType:
@@ -199,6 +279,21 @@ class Query(ObjectType):
     ) -> SessionRunListType:
         return resolve_session_run_list(info, **kwargs)
 
+    def resolve_session_timeline(
+        self, info: ResolveInfo, **kwargs: Dict[str, Any]
+    ) -> SessionTimelineType:
+        return resolve_session_timeline(info, **kwargs)
+
+    def resolve_agent_latency_stats(
+        self, info: ResolveInfo, **kwargs: Dict[str, Any]
+    ) -> AgentLatencyStatsType:
+        return resolve_agent_latency_stats(info, **kwargs)
+
+    def resolve_session_event_list(
+        self, info: ResolveInfo, **kwargs: Dict[str, Any]
+    ) -> SessionEventListType:
+        return resolve_session_event_list(info, **kwargs)
+
     def resolve_task(self, info: ResolveInfo, **kwargs: Dict[str, Any]) -> TaskType:
         return resolve_task(info, **kwargs)
 
@@ -0,0 +1,34 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+from graphene import Float, Int, ObjectType, String
+
+
+class CacheStatsType(ObjectType):
+    """Per-container metrics for one cache name and layer ("hybrid" or "local")."""
+
+    cache_name = String()
+    entity_type = String()
+    layer = String()
+    hits = Int()
+    misses = Int()
+    hit_ratio = Float()
+    sets = Int()
+    size = Int()
+    max_entries = Int()
+    ttl = Int()
+    bytes_stored = Int()
+    bytes_written = Int()
+    p50_ms = Float()
+    p99_ms = Float()
+    evictions = Int()
+    expirations = Int()
+    invalidations = Int()
+    early_refreshes = Int()
+    coalesced = Int()
+    purges = Int()
+    cascade_fan_out = Int()
+    purge_invalidated = Int()
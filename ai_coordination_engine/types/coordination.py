@@ -7,11 +7,12 @@ from xml.parsers.expat import model
 
 __author__ = "bibow"
 
-from graphene import DateTime, Field, List, ObjectType, String
+from graphene import DateTime, Field, Int, List, ObjectType, String
 from silvaengine_definitions import ThemeSettingLoader, ThemeSettingModel
-from silvaengine_dynamodb_base import ListObjectType
 from silvaengine_utility import JSONCamelCase, Serializer
 
+from .pagination import CursorListObjectType
+
 ThemeSettingType = ThemeSettingModel.generate_graphql_type()
 
 
@@ -25,6 +26,7 @@ class CoordinationType(ObjectType):
     coordination_name = String()
     coordination_description = String()
     agents = List(JSONCamelCase)
+    version = Int()
     updated_by = String()
     created_at = DateTime()
     updated_at = DateTime()
@@ -58,5 +60,5 @@ class CoordinationType(ObjectType):
         )
 
 
-class CoordinationListType(ListObjectType):
+class CoordinationListType(CursorListObjectType):
     coordination_list = List(CoordinationType)
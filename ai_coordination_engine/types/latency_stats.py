@@ -0,0 +1,31 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+from graphene import Boolean, DateTime, Field, Float, Int, List, ObjectType, String
+from silvaengine_utility import JSONCamelCase
+
+
+class LatencyGroupType(ObjectType):
+    """LLM latency (ms) of the completed runs of one group."""
+
+    group = Field(JSONCamelCase)  # {"agent": ..., "coordination": ..., "hour": ...}
+    count = Int()
+    mean_ms = Float()
+    max_ms = Float()
+    p50_ms = Float()
+    p95_ms = Float()
+    p99_ms = Float()
+    histogram = List(Int)  # Counts per histogram_buckets_ms bucket, plus overflow
+
+
+class AgentLatencyStatsType(ObjectType):
+    group_by = List(String)
+    start_time = DateTime()
+    end_time = DateTime()
+    runs = Int()
+    truncated = Boolean()
+    histogram_buckets_ms = List(Float)
+    groups = List(LatencyGroupType)
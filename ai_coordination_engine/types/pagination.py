@@ -0,0 +1,21 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+from graphene import Boolean, String
+from silvaengine_dynamodb_base import ListObjectType
+
+
+class CursorListObjectType(ListObjectType):
+    """
+    List type that carries cursor pagination metadata.
+
+    `has_next_page` and `end_cursor` are populated when the list is requested
+    with `after`/`first`; `total` is only populated when `with_total` is set.
+    Page-number requests keep returning the regular ListObjectType fields.
+    """
+
+    has_next_page = Boolean()
+    end_cursor = String()
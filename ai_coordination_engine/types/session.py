@@ -5,10 +5,10 @@ from __future__ import print_function
 __author__ = "bibow"
 
 from graphene import DateTime, Field, Int, List, ObjectType, String
-from silvaengine_dynamodb_base import ListObjectType
 from silvaengine_utility import JSONCamelCase
 from silvaengine_utility.serializer import Serializer
 from ..utils.normalization import normalize_to_json
+from .pagination import CursorListObjectType
 
 
 class SessionBaseType(ObjectType):
@@ -20,16 +20,25 @@ class SessionBaseType(ObjectType):
     user_id = String()
     endpoint_id = String()
     partition_key = String()
+    active_partition_key = String()
     task_query = String()
     input_files = List(JSONCamelCase)
     iteration_count = Int()
     subtask_queries = List(JSONCamelCase)
     status = String()
     logs = String()
+    archived_at = DateTime()  # Set only on sessions rehydrated from cold storage
     updated_by = String()
     created_at = DateTime()
     updated_at = DateTime()
 
+    # Offloaded subtask queries are only fetched when the field is selected
+    @staticmethod
+    def resolve_subtask_queries(parent, info):
+        from ..utils.payload_store import resolve_subtask_queries
+
+        return resolve_subtask_queries(getattr(parent, "subtask_queries", None))
+
 
 class SessionType(SessionBaseType):
     """
@@ -179,8 +188,36 @@ class SessionType(SessionBaseType):
             lambda runs: [normalize_to_json(run) for run in runs]
         )
 
+    @staticmethod
+    def resolve_logs(parent, info):
+        """
+        Resolve the session logs lazily from the append-only event log.
+
+        Entries in the inline logs string, written before the event log
+        existed, come first, followed by the events.
+
+        Args:
+            parent: Parent SessionType object
+            info: GraphQL resolve info containing context
+
+        Returns:
+            JSON string of log entries or Promise resolving to it
+        """
+        from ..models.batch_loaders import get_loaders
+        from ..models.session_event import merge_session_logs
+
+        legacy_logs = getattr(parent, "logs", None)
+        session_uuid = getattr(parent, "session_uuid", None)
+        if not session_uuid:
+            return legacy_logs
+
+        loaders = get_loaders(info.context)
+        return loaders.session_events_by_session_loader.load(session_uuid).then(
+            lambda events: merge_session_logs(legacy_logs, events)
+        )
+
 
-class SessionListType(ListObjectType):
+class SessionListType(CursorListObjectType):
     session_list = List(SessionType)
 
 
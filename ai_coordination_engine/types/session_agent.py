@@ -4,29 +4,49 @@ from __future__ import print_function
 
 __author__ = "bibow"
 
-from graphene import DateTime, Field, Int, List, ObjectType, String
-from silvaengine_dynamodb_base import ListObjectType
+from graphene import Boolean, DateTime, Field, Int, List, ObjectType, String
 from silvaengine_utility import JSONCamelCase
 from silvaengine_utility.serializer import Serializer
 
+from .pagination import CursorListObjectType
+
 
 class SessionAgentBaseType(ObjectType):
     """Base SessionAgent type with flat fields only (no nested resolvers)."""
     session_agent_uuid = String()
     session_uuid = String()  # FK to Session
     coordination_uuid = String()  # FK to Coordination
+    partition_key = String()
     agent_uuid = String()
     agent_action = Field(JSONCamelCase)
+    primary_path = Boolean()
+    user_in_the_loop = String()
+    predecessors = List(String)
     user_input = String()
     agent_input = String()
     agent_output = String()
     in_degree = Int()
     state = String()
+    ready_key = String()
+    state_transitions = List(JSONCamelCase)
     notes = String()
     updated_by = String()
     created_at = DateTime()
     updated_at = DateTime()
 
+    # Offloaded payloads are only fetched when the field is selected
+    @staticmethod
+    def resolve_agent_input(parent, info):
+        from ..utils.payload_store import resolve_payload
+
+        return resolve_payload(getattr(parent, "agent_input", None))
+
+    @staticmethod
+    def resolve_agent_output(parent, info):
+        from ..utils.payload_store import resolve_payload
+
+        return resolve_payload(getattr(parent, "agent_output", None))
+
 
 class SessionAgentType(SessionAgentBaseType):
     """
@@ -78,7 +98,7 @@ class SessionAgentType(SessionAgentBaseType):
         )
 
 
-class SessionAgentListType(ListObjectType):
+class SessionAgentListType(CursorListObjectType):
     session_agent_list = List(SessionAgentType)
 
 
@@ -0,0 +1,28 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+from graphene import DateTime, List, ObjectType, String
+
+from .pagination import CursorListObjectType
+
+
+class SessionEventType(ObjectType):
+    """One entry of a session's append-only event log."""
+
+    session_uuid = String()  # FK to Session
+    event_id = String()
+    coordination_uuid = String()  # FK to Coordination
+    partition_key = String()
+    event_type = String()
+    run_uuid = String()
+    agent_uuid = String()
+    log = String()
+    updated_by = String()
+    created_at = DateTime()
+
+
+class SessionEventListType(CursorListObjectType):
+    session_event_list = List(SessionEventType)
@@ -5,10 +5,11 @@ from __future__ import print_function
 __author__ = "bibow"
 
 from graphene import DateTime, Field, List, ObjectType, String
-from silvaengine_dynamodb_base import ListObjectType
 from silvaengine_utility import JSONCamelCase
 from silvaengine_utility.serializer import Serializer
 
+from .pagination import CursorListObjectType
+
 
 class SessionRunBaseType(ObjectType):
     """Base SessionRun type with flat fields only (no nested resolvers)."""
@@ -21,6 +22,7 @@ class SessionRunBaseType(ObjectType):
     partition_key = String()
     async_task_uuid = String()
     async_task = Field(JSONCamelCase)
+    completed_at = DateTime()
     updated_by = String()
     created_at = DateTime()
     updated_at = DateTime()
@@ -147,7 +149,7 @@ class SessionRunType(SessionRunBaseType):
         )
 
 
-class SessionRunListType(ListObjectType):
+class SessionRunListType(CursorListObjectType):
     session_run_list = List(SessionRunType)
 
 
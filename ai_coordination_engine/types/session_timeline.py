@@ -0,0 +1,49 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+from graphene import Boolean, DateTime, Float, List, ObjectType, String
+from silvaengine_utility import JSONCamelCase
+
+
+class SessionAgentTimelineType(ObjectType):
+    """Stage timestamps and durations (ms) of one session agent."""
+
+    session_agent_uuid = String()
+    agent_uuid = String()
+    state = String()
+    primary_path = Boolean()
+    predecessors = List(String)
+    run_uuid = String()
+    created_at = DateTime()
+    ready_at = DateTime()
+    started_at = DateTime()
+    llm_started_at = DateTime()
+    llm_completed_at = DateTime()
+    finished_at = DateTime()
+    queue_ms = Float()
+    llm_ms = Float()
+    post_processing_ms = Float()
+    total_ms = Float()
+    on_critical_path = Boolean()
+    state_transitions = List(JSONCamelCase)
+
+
+class SessionTimelineType(ObjectType):
+    """Latency breakdown of a session and the agent chain that bounded it."""
+
+    coordination_uuid = String()
+    session_uuid = String()
+    status = String()
+    created_at = DateTime()
+    updated_at = DateTime()
+    duration_ms = Float()
+    agents = List(SessionAgentTimelineType)
+    critical_path = List(String)  # agent_uuids, first to last
+    critical_path_ms = Float()
+    critical_path_queue_ms = Float()
+    critical_path_llm_ms = Float()
+    critical_path_post_processing_ms = Float()
+    critical_path_overhead_ms = Float()
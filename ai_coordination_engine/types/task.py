@@ -5,10 +5,11 @@ from __future__ import print_function
 __author__ = "bibow"
 
 from graphene import DateTime, Field, List, ObjectType, String
-from silvaengine_dynamodb_base import ListObjectType
 from silvaengine_utility import JSONCamelCase
 from silvaengine_utility.serializer import Serializer
 
+from .pagination import CursorListObjectType
+
 
 class TaskBaseType(ObjectType):
     """Base Task type with flat fields only (no nested resolvers)."""
@@ -80,7 +81,7 @@ class TaskType(TaskBaseType):
         )
 
 
-class TaskListType(ListObjectType):
+class TaskListType(CursorListObjectType):
     task_list = List(TaskType)
 
 
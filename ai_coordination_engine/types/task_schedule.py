@@ -5,9 +5,10 @@ from __future__ import print_function
 __author__ = "bibow"
 
 from graphene import DateTime, Field, List, ObjectType, String
-from silvaengine_dynamodb_base import ListObjectType
 from silvaengine_utility.serializer import Serializer
 
+from .pagination import CursorListObjectType
+
 
 class TaskScheduleBaseType(ObjectType):
     """Base TaskSchedule type with flat fields only (no nested resolvers)."""
@@ -113,7 +114,7 @@ class TaskScheduleType(TaskScheduleBaseType):
         )
 
 
-class TaskScheduleListType(ListObjectType):
+class TaskScheduleListType(CursorListObjectType):
     task_schedule_list = List(TaskScheduleType)
 
 
@@ -0,0 +1,39 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import json
+from typing import Any, Dict
+
+
+def add_response_extensions(response: Any, extensions: Dict[str, Any]) -> Any:
+    """
+    Merge entries into the `extensions` of a GraphQL response.
+
+    Handles a result dict, its JSON string, or an HTTP-style dict whose `body`
+    holds the JSON string. Responses in any other shape are returned unchanged.
+    """
+    if not extensions:
+        return response
+
+    if isinstance(response, dict) and isinstance(response.get("body"), (str, bytes)):
+        return dict(
+            response, body=add_response_extensions(response["body"], extensions)
+        )
+
+    if isinstance(response, (str, bytes)):
+        try:
+            result = json.loads(response)
+        except ValueError:
+            return response
+        if not isinstance(result, dict):
+            return response
+        return json.dumps(add_response_extensions(result, extensions), default=str)
+
+    if isinstance(response, dict) and ("data" in response or "errors" in response):
+        return dict(
+            response, extensions=dict(response.get("extensions") or {}, **extensions)
+        )
+    return response
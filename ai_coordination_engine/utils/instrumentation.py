@@ -0,0 +1,339 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .spans import get_current_span, get_trace_fields
+
+# DynamoDB operations that accept ReturnConsumedCapacity
+CAPACITY_OPERATIONS = {
+    "BatchGetItem",
+    "BatchWriteItem",
+    "DeleteItem",
+    "GetItem",
+    "PutItem",
+    "Query",
+    "Scan",
+    "TransactGetItems",
+    "TransactWriteItems",
+    "UpdateItem",
+}
+
+
+class RequestUsage(object):
+    """
+    Calls made while handling one GraphQL request or listener invocation.
+
+    Calls are grouped by service ("dynamodb" or "graphql"), target (table or
+    function name) and operation, with their count, errors, total time and,
+    for DynamoDB, the consumed capacity units.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = time.perf_counter()
+        self.calls: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        service: str,
+        target: str,
+        operation: str,
+        elapsed: float,
+        capacity_units: float = 0.0,
+        error: bool = False,
+    ) -> None:
+        with self._lock:
+            call = self.calls.setdefault(
+                (service, target, operation),
+                {"calls": 0, "errors": 0, "seconds": 0.0, "capacity_units": 0.0},
+            )
+            call["calls"] += 1
+            call["errors"] += int(error)
+            call["seconds"] += elapsed
+            call["capacity_units"] += capacity_units
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = dict(self.calls)
+        services: Dict[str, Dict[str, Any]] = {}
+        for (service, target, operation), call in sorted(calls.items()):
+            totals = services.setdefault(
+                service,
+                {
+                    "calls": 0,
+                    "errors": 0,
+                    "ms": 0.0,
+                    "capacity_units": 0.0,
+                    "by_operation": [],
+                },
+            )
+            totals["calls"] += call["calls"]
+            totals["errors"] += call["errors"]
+            totals["ms"] += call["seconds"] * 1000
+            totals["capacity_units"] += call["capacity_units"]
+            totals["by_operation"].append(
+                {
+                    "target": target,
+                    "operation": operation,
+                    "calls": call["calls"],
+                    "errors": call["errors"],
+                    "ms": round(call["seconds"] * 1000, 3),
+                    "capacity_units": round(call["capacity_units"], 3),
+                }
+            )
+        for totals in services.values():
+            totals["ms"] = round(totals["ms"], 3)
+            totals["capacity_units"] = round(totals["capacity_units"], 3)
+            if not any(call["capacity_units"] for call in totals["by_operation"]):
+                totals.pop("capacity_units")
+                for call in totals["by_operation"]:
+                    call.pop("capacity_units")
+        return {
+            "name": self.name,
+            "duration_ms": round((time.perf_counter() - self.started_at) * 1000, 3),
+            **services,
+        }
+
+
+_current_usage: ContextVar[Optional[RequestUsage]] = ContextVar(
+    "request_usage", default=None
+)
+
+
+def get_current_usage() -> Optional[RequestUsage]:
+    return _current_usage.get()
+
+
+@contextmanager
+def track_request_usage(
+    logger: logging.Logger, name: str, **fields: Any
+) -> Iterator[Optional[RequestUsage]]:
+    """
+    Collect the calls made inside the block and log them as one JSON line.
+
+    The line carries `"event": "request_usage"` plus `fields`. Yields None,
+    and records nothing, when `Config.REQUEST_USAGE_ENABLED` is off.
+    """
+    from ..handlers.config import Config
+
+    if not Config.REQUEST_USAGE_ENABLED:
+        yield None
+        return
+
+    install_instrumentation()
+    usage = RequestUsage(name)
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+        logger.info(
+            json.dumps(
+                dict(
+                    usage.summary(),
+                    event="request_usage",
+                    **get_trace_fields(),
+                    **fields,
+                ),
+                default=str,
+            )
+        )
+
+
+def track_usage(method: Callable) -> Callable:
+    """Track the calls of an engine method (which has `self.logger`) under its name."""
+
+    @functools.wraps(method)
+    def wrapper(self, **params: Dict[str, Any]) -> Any:
+        with track_request_usage(self.logger, method.__name__):
+            return method(self, **params)
+
+    return wrapper
+
+
+def _get_table_names(operation_kwargs: Dict[str, Any]) -> List[str]:
+    if operation_kwargs.get("TableName"):
+        return [operation_kwargs["TableName"]]
+    if operation_kwargs.get("RequestItems"):
+        return list(operation_kwargs["RequestItems"].keys())
+    tables = []
+    for item in operation_kwargs.get("TransactItems") or []:
+        for request in item.values():
+            if request.get("TableName") and request["TableName"] not in tables:
+                tables.append(request["TableName"])
+    return tables or ["unknown"]
+
+
+def _get_capacity_units(data: Optional[Dict[str, Any]]) -> float:
+    """Total consumed capacity units of a DynamoDB response, over all its tables."""
+    consumed = (data or {}).get("ConsumedCapacity") or []
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    return sum(float(capacity.get("CapacityUnits") or 0) for capacity in consumed)
+
+
+def _record_call(
+    usage: Optional[RequestUsage],
+    span: Any,
+    service: str,
+    target: str,
+    operation: str,
+    started_at: float,
+    elapsed: float,
+    capacity_units: float = 0.0,
+    error: bool = False,
+) -> None:
+    """Record a call in the request usage and as a child span of the current span."""
+    if usage is not None:
+        usage.record(
+            service,
+            target,
+            operation,
+            elapsed,
+            capacity_units=capacity_units,
+            error=error,
+        )
+    if span is not None:
+        attributes = {"target": target}
+        if capacity_units:
+            attributes["capacity_units"] = capacity_units
+        span.child(
+            f"{service}.{operation}",
+            started_at,
+            elapsed,
+            status="error" if error else "ok",
+            **attributes,
+        )
+
+
+def _instrument_dispatch(original: Callable) -> Callable:
+    @functools.wraps(original)
+    def dispatch(self, operation_name: str, operation_kwargs: Dict[str, Any]) -> Any:
+        usage = _current_usage.get()
+        span = get_current_span()
+        if usage is None and span is None:
+            return original(self, operation_name, operation_kwargs)
+
+        if operation_name in CAPACITY_OPERATIONS:
+            operation_kwargs.setdefault("ReturnConsumedCapacity", "TOTAL")
+        # A batch or transaction over several tables is one call
+        target = ",".join(_get_table_names(operation_kwargs))
+        started_at, start = time.time(), time.perf_counter()
+        try:
+            data = original(self, operation_name, operation_kwargs)
+        except Exception:
+            _record_call(
+                usage,
+                span,
+                "dynamodb",
+                target,
+                operation_name,
+                started_at,
+                time.perf_counter() - start,
+                error=True,
+            )
+            raise
+
+        _record_call(
+            usage,
+            span,
+            "dynamodb",
+            target,
+            operation_name,
+            started_at,
+            time.perf_counter() - start,
+            capacity_units=_get_capacity_units(data),
+        )
+        return data
+
+    return dispatch
+
+
+def _instrument_request_graphql(original: Callable) -> Callable:
+    @functools.wraps(original)
+    def request_graphql(*args: Any, **kwargs: Any) -> Any:
+        usage = _current_usage.get()
+        span = get_current_span()
+        if usage is None and span is None:
+            return original(*args, **kwargs)
+
+        target = kwargs.get("function_name") or "unknown"
+        operation = kwargs.get("operation_name") or "unknown"
+        started_at, start = time.time(), time.perf_counter()
+        try:
+            result = original(*args, **kwargs)
+        except Exception:
+            _record_call(
+                usage,
+                span,
+                "graphql",
+                target,
+                operation,
+                started_at,
+                time.perf_counter() - start,
+                error=True,
+            )
+            raise
+        _record_call(
+            usage,
+            span,
+            "graphql",
+            target,
+            operation,
+            started_at,
+            time.perf_counter() - start,
+        )
+        return result
+
+    return request_graphql
+
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def install_instrumentation() -> None:
+    """
+    Wrap PynamoDB `Connection.dispatch` and `Graphql.request_graphql` once per process.
+
+    The wrappers only record while a `track_request_usage` block or a span
+    is active, and otherwise call straight through.
+    """
+    global _installed
+    if _installed:
+        return
+    with _install_lock:
+        if _installed:
+            return
+
+        from pynamodb.connection.base import Connection
+        from silvaengine_utility import Graphql
+
+        Connection.dispatch = _instrument_dispatch(Connection.dispatch)
+
+        # Keep request_graphql a static/class method as defined upstream
+        raw = inspect.getattr_static(Graphql, "request_graphql")
+        if isinstance(raw, staticmethod):
+            Graphql.request_graphql = staticmethod(
+                _instrument_request_graphql(raw.__func__)
+            )
+        elif isinstance(raw, classmethod):
+            Graphql.request_graphql = classmethod(
+                _instrument_request_graphql(raw.__func__)
+            )
+        else:
+            Graphql.request_graphql = _instrument_request_graphql(raw)
+        _installed = True
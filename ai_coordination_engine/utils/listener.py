@@ -29,6 +29,8 @@ def create_listener_info(
         "partition_key": kwargs.get(
             "partition_key", kwargs.get("context", {}).get("partition_key")
         ),
+        # Trace of the invocation that caused this one
+        "trace_context": kwargs.get("trace_context"),
     }
 
     if "metadata" in kwargs and isinstance(kwargs["metadata"], dict):
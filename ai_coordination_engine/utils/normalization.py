@@ -11,10 +11,12 @@ from silvaengine_utility import Serializer
 
 def normalize_to_json(item: Any) -> Any:
     """Convert model objects or plain objects into JSON-serializable data."""
+    from ..models.attributes import decode_packed_values
+
     if isinstance(item, dict):
-        return Serializer.json_normalize(item)
+        return Serializer.json_normalize(decode_packed_values(item))
     if hasattr(item, "attribute_values"):
-        return Serializer.json_normalize(item.attribute_values)
+        return Serializer.json_normalize(decode_packed_values(item.attribute_values))
     if hasattr(item, "__dict__"):
         return Serializer.json_normalize(
             {k: v for k, v in vars(item).items() if not k.startswith("_")}
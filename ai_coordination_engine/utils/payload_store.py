@@ -0,0 +1,221 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import gzip
+import hashlib
+import os
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available
+    zstandard = None
+
+PAYLOAD_POINTER_PREFIX = "ace-payload://"
+PAYLOAD_CACHE_NAME = "payloads"
+
+
+def _get_config():
+    from ..handlers.config import Config
+
+    return Config
+
+
+def is_payload_pointer(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith(PAYLOAD_POINTER_PREFIX)
+
+
+def _compress(data: bytes) -> tuple:
+    if zstandard is not None:
+        return "zst", zstandard.ZstdCompressor(level=3).compress(data)
+    return "gz", gzip.compress(data, compresslevel=6)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zst":
+        if zstandard is None:
+            raise ValueError("The zstandard package is required to read this payload.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "gz":
+        return gzip.decompress(data)
+    raise ValueError(f"Unsupported payload codec: {codec}.")
+
+
+def _object_key(codec: str, digest: str) -> str:
+    prefix = _get_config().payload_key_prefix
+    return f"{prefix}/{digest[:2]}/{digest}.{codec}"
+
+
+def write_object(
+    key: str,
+    body: bytes,
+    bucket_name: Optional[str] = None,
+    local_dir: Optional[str] = None,
+) -> None:
+    """Write an object to S3 when a bucket is given, otherwise under a local directory."""
+    if bucket_name:
+        _get_config().aws_s3.put_object(Bucket=bucket_name, Key=key, Body=body)
+        return
+
+    path = os.path.join(local_dir, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+def read_object(
+    key: str,
+    bucket_name: Optional[str] = None,
+    local_dir: Optional[str] = None,
+) -> Optional[bytes]:
+    """Read an object written by write_object; returns None when it does not exist."""
+    if bucket_name:
+        s3 = _get_config().aws_s3
+        try:
+            return s3.get_object(Bucket=bucket_name, Key=key)["Body"].read()
+        except s3.exceptions.NoSuchKey:
+            return None
+
+    path = os.path.join(local_dir, key)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def list_objects(
+    prefix: str,
+    bucket_name: Optional[str] = None,
+    local_dir: Optional[str] = None,
+) -> Iterator[str]:
+    """Yield the keys written by write_object under a prefix."""
+    if bucket_name:
+        paginator = _get_config().aws_s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+            for obj in page.get("Contents") or []:
+                yield obj["Key"]
+        return
+
+    root = os.path.join(local_dir, prefix)
+    for dir_path, _, file_names in os.walk(root):
+        for file_name in sorted(file_names):
+            if ".tmp." in file_name:
+                continue
+            yield os.path.relpath(os.path.join(dir_path, file_name), local_dir)
+
+
+def offload_payload(value: Any) -> Any:
+    """
+    Move a large string value to the payload store and return its pointer.
+
+    Values at or below `payload_offload_threshold` bytes, non-string values,
+    existing pointers and calls without a configured store are returned unchanged.
+    The pointer embeds the codec and the sha256 of the uncompressed value, so
+    identical payloads are stored once.
+
+    The store is write-once: an object may be shared by any number of rows,
+    so nothing deletes it when a session or agent is removed. Give the
+    `payload_key_prefix` an S3 lifecycle expiration longer than the
+    retention of the rows (and archives) that point into it.
+    """
+    Config = _get_config()
+    if (
+        not isinstance(value, str)
+        or is_payload_pointer(value)
+        or not (Config.payload_bucket_name or Config.payload_local_dir)
+    ):
+        return value
+
+    data = value.encode("utf-8")
+    if len(data) <= Config.payload_offload_threshold:
+        return value
+
+    digest = hashlib.sha256(data).hexdigest()
+    codec, body = _compress(data)
+    key = _object_key(codec, digest)
+    # Content addressed, so an existing local file is already identical
+    if Config.payload_bucket_name or not os.path.exists(
+        os.path.join(Config.payload_local_dir, key)
+    ):
+        write_object(
+            key,
+            body,
+            bucket_name=Config.payload_bucket_name,
+            local_dir=Config.payload_local_dir,
+        )
+    return f"{PAYLOAD_POINTER_PREFIX}{codec}/{digest}"
+
+
+def _load_payload(codec: str, digest: str) -> str:
+    Config = _get_config()
+    body = read_object(
+        _object_key(codec, digest),
+        bucket_name=Config.payload_bucket_name,
+        local_dir=Config.payload_local_dir,
+    )
+    if body is None:
+        raise ValueError(f"Payload {digest} was not found in the payload store.")
+    data = _decompress(codec, body)
+    if hashlib.sha256(data).hexdigest() != digest:
+        raise ValueError(f"Payload {digest} failed its integrity check.")
+    return data.decode("utf-8")
+
+
+def resolve_payload(value: Any) -> Any:
+    """Return the original value behind a payload pointer; other values pass through."""
+    if not is_payload_pointer(value):
+        return value
+
+    codec, digest = value[len(PAYLOAD_POINTER_PREFIX) :].split("/", 1)
+    from ..models.cache import get_local_cache
+
+    # Byte-bounded (Config.LOCAL_CACHE_MAX_BYTES), since payloads are large
+    cache = get_local_cache(PAYLOAD_CACHE_NAME)
+    if cache is None:
+        return _load_payload(codec, digest)
+
+    def load() -> str:
+        payload = _load_payload(codec, digest)
+        cache.set(digest, payload, size=len(payload))
+        return payload
+
+    payload = cache.get(digest)
+    if payload is None:
+        payload = cache.single_flight(digest, load)
+    return payload
+
+
+def offload_subtask_queries(
+    subtask_queries: Optional[List[Dict[str, Any]]],
+) -> Optional[List[Dict[str, Any]]]:
+    """Offload the `subtask_query` text of each entry, keeping the routing keys inline."""
+    if not isinstance(subtask_queries, list):
+        return subtask_queries
+    return [
+        (
+            dict(query, subtask_query=offload_payload(query.get("subtask_query")))
+            if isinstance(query, dict)
+            else query
+        )
+        for query in subtask_queries
+    ]
+
+
+def resolve_subtask_queries(
+    subtask_queries: Optional[List[Dict[str, Any]]],
+) -> Optional[List[Dict[str, Any]]]:
+    if not isinstance(subtask_queries, list):
+        return subtask_queries
+    return [
+        (
+            dict(query, subtask_query=resolve_payload(query.get("subtask_query")))
+            if isinstance(query, dict) and is_payload_pointer(query.get("subtask_query"))
+            else query
+        )
+        for query in subtask_queries
+    ]
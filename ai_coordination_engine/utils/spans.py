@@ -0,0 +1,217 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import functools
+import json
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, Optional
+
+# Invocation parameter carrying {"trace_id", "parent_span_id"} between Lambdas
+TRACE_CONTEXT_PARAMETER = "trace_context"
+
+
+class Span(object):
+    """
+    One timed step of a session's execution.
+
+    Spans share a `trace_id` across every invocation of a session, and each
+    points at the span that caused it through `parent_span_id`. Finished spans
+    are logged as JSON lines with `"event": "span"` when `Config.SPANS_ENABLED`
+    is set. The ids are propagated either way, so other log lines can carry
+    them.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        name: str,
+        trace_id: Optional[str] = None,
+        parent_span_id: Optional[str] = None,
+        **attributes: Any,
+    ):
+        self.logger = logger
+        self.name = name
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_span_id = parent_span_id
+        self.attributes = attributes
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+
+    def finish(self, status: str = "ok") -> None:
+        self.emit(
+            self.name,
+            self.span_id,
+            self.parent_span_id,
+            self.start_time,
+            time.perf_counter() - self._start,
+            status,
+            self.attributes,
+        )
+
+    def child(
+        self,
+        name: str,
+        start_time: float,
+        elapsed: float,
+        status: str = "ok",
+        **attributes: Any,
+    ) -> None:
+        """Log an already finished child span, such as one DynamoDB call."""
+        self.emit(
+            name,
+            uuid.uuid4().hex[:16],
+            self.span_id,
+            start_time,
+            elapsed,
+            status,
+            attributes,
+        )
+
+    def emit(
+        self,
+        name: str,
+        span_id: str,
+        parent_span_id: Optional[str],
+        start_time: float,
+        elapsed: float,
+        status: str,
+        attributes: Dict[str, Any],
+    ) -> None:
+        from ..handlers.config import Config
+
+        if not Config.SPANS_ENABLED:
+            return
+        self.logger.info(
+            json.dumps(
+                {
+                    "event": "span",
+                    "trace_id": self.trace_id,
+                    "span_id": span_id,
+                    "parent_span_id": parent_span_id,
+                    "name": name,
+                    "start_time": datetime.fromtimestamp(
+                        start_time, timezone.utc
+                    ).isoformat(),
+                    "duration_ms": round(elapsed * 1000, 3),
+                    "status": status,
+                    "attributes": attributes,
+                },
+                default=str,
+            )
+        )
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("span", default=None)
+
+
+def get_current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def get_trace_context() -> Optional[Dict[str, str]]:
+    """Trace context to pass to an invocation caused by the current span."""
+    span = _current_span.get()
+    if span is None:
+        return None
+    return {"trace_id": span.trace_id, "parent_span_id": span.span_id}
+
+
+def get_trace_fields() -> Dict[str, str]:
+    """`trace_id`/`span_id` of the current span, for structured log lines."""
+    span = _current_span.get()
+    if span is None:
+        return {}
+    return {"trace_id": span.trace_id, "span_id": span.span_id}
+
+
+@contextmanager
+def start_span(
+    name: str,
+    logger: Optional[logging.Logger] = None,
+    trace_context: Optional[Dict[str, Any]] = None,
+    **attributes: Any,
+) -> Iterator[Span]:
+    """
+    Run the block as a span, child of the current span or of `trace_context`.
+
+    Without either, a new trace starts. Exceptions mark the span "error" and
+    are re-raised.
+    """
+    from .instrumentation import install_instrumentation
+
+    install_instrumentation()
+    parent = _current_span.get()
+    if parent is not None:
+        span = Span(
+            logger or parent.logger,
+            name,
+            trace_id=parent.trace_id,
+            parent_span_id=parent.span_id,
+            **attributes,
+        )
+    else:
+        trace_context = trace_context or {}
+        span = Span(
+            logger or logging.getLogger(__name__),
+            name,
+            trace_id=trace_context.get("trace_id"),
+            parent_span_id=trace_context.get("parent_span_id"),
+            **attributes,
+        )
+
+    token = _current_span.set(span)
+    status = "ok"
+    try:
+        yield span
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        _current_span.reset(token)
+        span.finish(status)
+
+
+def increment_span_attribute(attribute: str) -> None:
+    """Add one to an attribute of the current span, such as its poll count."""
+    span = _current_span.get()
+    if span is not None:
+        span.attributes[attribute] = span.attributes.get(attribute, 0) + 1
+
+
+def span_decorator(name: str) -> Callable:
+    """Run the decorated function as a span named `name`."""
+
+    def actual_decorator(original_function: Callable) -> Callable:
+        @functools.wraps(original_function)
+        def wrapper_function(*args: Any, **kwargs: Any) -> Any:
+            with start_span(name):
+                return original_function(*args, **kwargs)
+
+        return wrapper_function
+
+    return actual_decorator
+
+
+def invocation_span(method: Callable) -> Callable:
+    """Run an engine event method as a span continuing the caller's trace context."""
+
+    @functools.wraps(method)
+    def wrapper(self, **params: Dict[str, Any]) -> Any:
+        with start_span(
+            method.__name__,
+            logger=self.logger,
+            trace_context=params.get(TRACE_CONTEXT_PARAMETER),
+            session_uuid=params.get("session_uuid"),
+        ):
+            return method(self, **params)
+
+    return wrapper
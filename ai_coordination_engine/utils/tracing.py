@@ -0,0 +1,189 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from graphene import Schema
+
+
+class ResolverTrace(object):
+    """
+    Resolver timings and DataLoader batch sizes of one GraphQL request.
+
+    `to_apollo()` renders them in the Apollo tracing format (version 1),
+    with `dataloaders` added for the batch sizes. Offsets and durations are
+    in nanoseconds from the start of the request.
+    """
+
+    def __init__(self, max_resolvers: int):
+        self.max_resolvers = max_resolvers
+        self.start_time = datetime.now(timezone.utc)
+        self.start_ns = time.perf_counter_ns()
+        self.end_time: Optional[datetime] = None
+        self.end_ns: Optional[int] = None
+        self.resolvers: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self.batches: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def record_resolver(self, info: Any, start_ns: int) -> None:
+        end_ns = time.perf_counter_ns()
+        with self._lock:
+            if len(self.resolvers) >= self.max_resolvers:
+                self.dropped += 1
+                return
+            self.resolvers.append(
+                {
+                    "path": info.path.as_list(),
+                    "parentType": str(info.parent_type),
+                    "fieldName": info.field_name,
+                    "returnType": str(info.return_type),
+                    "startOffset": start_ns - self.start_ns,
+                    "duration": end_ns - start_ns,
+                }
+            )
+
+    def record_batch(self, loader_name: str, size: int) -> None:
+        with self._lock:
+            self.batches.setdefault(loader_name, []).append(size)
+
+    def finish(self) -> None:
+        self.end_time = datetime.now(timezone.utc)
+        self.end_ns = time.perf_counter_ns()
+
+    def to_apollo(self) -> Dict[str, Any]:
+        end_ns = self.end_ns or time.perf_counter_ns()
+        end_time = self.end_time or datetime.now(timezone.utc)
+        with self._lock:
+            return {
+                "version": 1,
+                "startTime": self.start_time.isoformat(),
+                "endTime": end_time.isoformat(),
+                "duration": end_ns - self.start_ns,
+                "execution": {
+                    "resolvers": list(self.resolvers),
+                    "dropped": self.dropped,
+                },
+                "dataloaders": [
+                    {
+                        "name": name,
+                        "batches": len(sizes),
+                        "keys": sum(sizes),
+                        "batchSizes": list(sizes),
+                    }
+                    for name, sizes in sorted(self.batches.items())
+                ],
+            }
+
+    def slowest(self, count: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            resolvers = sorted(self.resolvers, key=lambda r: -r["duration"])[:count]
+        return [
+            {
+                "path": ".".join(str(p) for p in r["path"]),
+                "ms": round(r["duration"] / 1e6, 3),
+            }
+            for r in resolvers
+        ]
+
+
+_current_trace: ContextVar[Optional[ResolverTrace]] = ContextVar(
+    "resolver_trace", default=None
+)
+
+
+def get_current_trace() -> Optional[ResolverTrace]:
+    return _current_trace.get()
+
+
+def record_loader_batch(loader_name: str, size: int) -> None:
+    """Count one DataLoader batch in the active trace; a no-op when not tracing."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.record_batch(loader_name, size)
+
+
+@contextmanager
+def trace_request(
+    logger: logging.Logger, **fields: Any
+) -> Iterator[Optional[ResolverTrace]]:
+    """
+    Trace the GraphQL execution inside the block when `Config.TRACING_ENABLED` is set.
+
+    On exit, one JSON line with `"event": "graphql_trace"`, the total time
+    and the slowest resolvers is logged. Yields None when tracing is off.
+    """
+    from ..handlers.config import Config
+
+    if not Config.TRACING_ENABLED:
+        yield None
+        return
+
+    trace = ResolverTrace(Config.tracing_max_resolvers)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.finish()
+        logger.info(
+            json.dumps(
+                dict(
+                    event="graphql_trace",
+                    duration_ms=round((trace.end_ns - trace.start_ns) / 1e6, 3),
+                    resolvers=len(trace.resolvers) + trace.dropped,
+                    slowest=trace.slowest(10),
+                    dataloaders=trace.to_apollo()["dataloaders"],
+                    **fields,
+                ),
+                default=str,
+            )
+        )
+
+
+class TracingMiddleware(object):
+    """
+    Graphene middleware timing every resolver into a ResolverTrace.
+
+    Resolvers that return a Promise (the DataLoader-backed nested fields)
+    are timed until the promise resolves.
+    """
+
+    def __init__(self, trace: ResolverTrace):
+        self.trace = trace
+
+    def resolve(self, next_, root, info, **args):
+        start_ns = time.perf_counter_ns()
+        result = next_(root, info, **args)
+        if hasattr(result, "then") and callable(result.then):
+
+            def on_resolved(value):
+                self.trace.record_resolver(info, start_ns)
+                return value
+
+            return result.then(on_resolved)
+
+        self.trace.record_resolver(info, start_ns)
+        return result
+
+
+class TracingSchema(Schema):
+    """Schema that adds TracingMiddleware to executions run inside `trace_request`."""
+
+    def execute(self, *args, **kwargs):
+        trace = _current_trace.get()
+        if trace is not None:
+            kwargs["middleware"] = list(kwargs.get("middleware") or []) + [
+                TracingMiddleware(trace)
+            ]
+        return super(TracingSchema, self).execute(*args, **kwargs)
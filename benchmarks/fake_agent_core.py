@@ -0,0 +1,127 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import json
+import random
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Union
+
+import pendulum
+
+Response = Union[str, Dict[str, Any], Callable[[str, str], Any]]
+
+
+class FakeAgentCore(object):
+    """
+    Stand-in for the askModel/asyncTask operations of ai_agent_core_engine.
+
+    `request_graphql` replaces `Graphql.request_graphql`. askModel starts an
+    async task that completes `latency` seconds later (plus up to `jitter`
+    seconds of uniform noise); asyncTask reports it "in_progress" until then.
+    The result of an agent's task is its registered response (a string, a
+    dict serialized as JSON, or a callable of (agent_uuid, user_query)),
+    defaulting to a short text answer.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.responses: Dict[str, Response] = {}
+        self.calls = {"askModel": 0, "asyncTask": 0}
+        self._random = random.Random(seed)
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def set_response(self, agent_uuid: str, response: Response) -> None:
+        self.responses[agent_uuid] = response
+
+    def reset_calls(self) -> None:
+        with self._lock:
+            self.calls = {"askModel": 0, "asyncTask": 0}
+
+    def request_graphql(
+        self,
+        context: Optional[Dict[str, Any]] = None,
+        module_name: Optional[str] = None,
+        function_name: Optional[str] = None,
+        class_name: Optional[str] = None,
+        operation_name: Optional[str] = None,
+        variables: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        variables = variables or {}
+        if operation_name == "askModel":
+            return self.ask_model(**variables)
+        if operation_name == "asyncTask":
+            return self.async_task(**variables)
+        raise Exception(f"The fake agent core does not support {operation_name}.")
+
+    def _get_result(self, agent_uuid: str, user_query: str) -> str:
+        response = self.responses.get(agent_uuid)
+        if callable(response):
+            response = response(agent_uuid, user_query)
+        if response is None:
+            response = f"Answer of agent {agent_uuid}."
+        return response if isinstance(response, str) else json.dumps(response)
+
+    def ask_model(self, **variables: Any) -> Dict[str, Any]:
+        with self._lock:
+            self.calls["askModel"] += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.failure_rate
+
+        agent_uuid = variables.get("agentUuid")
+        async_task_uuid = uuid.uuid4().hex
+        task = {
+            "asyncTaskUuid": async_task_uuid,
+            "functionName": "async_execute_ask_model",
+            "agentUuid": agent_uuid,
+            "done_at": time.time() + delay,
+            "failed": failed,
+            "result": self._get_result(agent_uuid, variables.get("userQuery") or ""),
+        }
+        with self._lock:
+            self._tasks[async_task_uuid] = task
+
+        return {
+            "agentUuid": agent_uuid,
+            "threadUuid": variables.get("threadUuid") or uuid.uuid4().hex,
+            "userQuery": variables.get("userQuery"),
+            "currentRunUuid": uuid.uuid4().hex,
+            "asyncTaskUuid": async_task_uuid,
+        }
+
+    def async_task(self, **variables: Any) -> Dict[str, Any]:
+        with self._lock:
+            self.calls["asyncTask"] += 1
+            task = self._tasks.get(variables.get("asyncTaskUuid"))
+        if task is None:
+            raise Exception(f"Async task {variables.get('asyncTaskUuid')} not found.")
+
+        now = time.time()
+        if now < task["done_at"]:
+            status = "in_progress"
+        else:
+            status = "failed" if task["failed"] else "completed"
+        return {
+            "asyncTaskUuid": task["asyncTaskUuid"],
+            "functionName": task["functionName"],
+            "status": status,
+            "result": task["result"] if status == "completed" else None,
+            "notes": "Injected failure." if status == "failed" else None,
+            "updatedAt": pendulum.from_timestamp(
+                min(now, task["done_at"])
+            ).to_iso8601_string(),
+        }
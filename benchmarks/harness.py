@@ -0,0 +1,323 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import importlib
+import json
+import logging
+import math
+import os
+import random
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+from unittest import mock
+
+import pendulum
+
+from .fake_agent_core import FakeAgentCore
+
+REGION_NAME = "us-east-1"
+ENDPOINT_ID = "benchmark"
+PART_ID = "benchmark"
+PARTITION_KEY = f"{ENDPOINT_ID}#{PART_ID}"
+# A partition other than the engine setting's, which invocations must carry
+SECOND_PART_ID = "benchmark-2"
+TERMINAL_STATUSES = ["completed", "failed", "timeout"]
+
+# Handler modules whose poll sleeps are scaled by --sleep-scale; the iteration
+# backoff is scaled through `iteration_backoff_seconds`
+SLEEPING_MODULES = [
+    "ai_coordination_engine.handlers.operation_hub.operation_hub_listener",
+    "ai_coordination_engine.handlers.procedure_hub.procedure_hub_listener",
+    "ai_coordination_engine.handlers.procedure_hub.session_agent",
+]
+
+
+def summarize(latencies: List[float]) -> Dict[str, Any]:
+    """Count, mean and nearest-rank percentiles of latencies given in seconds."""
+    values = sorted(latencies)
+    if not values:
+        return {"count": 0}
+
+    def percentile(p: float) -> float:
+        index = max(math.ceil(p / 100.0 * len(values)) - 1, 0)
+        return round(values[min(index, len(values) - 1)] * 1000, 3)
+
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3),
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+        "max_ms": round(values[-1] * 1000, 3),
+    }
+
+
+class ScaledTime(object):
+    """Stand-in for the `time` module of a handler module, with scaled sleeps."""
+
+    def __init__(self, scale: float):
+        self.scale = scale
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds * self.scale)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(time, name)
+
+
+@contextmanager
+def local_services(agent_core: FakeAgentCore, sleep_scale: float = 1.0) -> Iterator:
+    """
+    Run the engine against moto's DynamoDB and the fake agent core.
+
+    The patches are process-wide and kept for the whole run, so the engine's
+    request instrumentation wraps the fake the same way it wraps the real
+    `Graphql.request_graphql`.
+    """
+    from moto import mock_aws
+    from silvaengine_utility import Graphql
+
+    for key, value in {
+        "AWS_DEFAULT_REGION": REGION_NAME,
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+    }.items():
+        os.environ.setdefault(key, value)
+
+    with ExitStack() as stack:
+        stack.enter_context(mock_aws())
+        stack.enter_context(
+            mock.patch.object(
+                Graphql, "request_graphql", staticmethod(agent_core.request_graphql)
+            )
+        )
+        if sleep_scale != 1.0:
+            for module_name in SLEEPING_MODULES:
+                stack.enter_context(
+                    mock.patch.object(
+                        importlib.import_module(module_name),
+                        "time",
+                        ScaledTime(sleep_scale),
+                    )
+                )
+        yield
+
+
+def build_dag(shape: str, seed: int = 0) -> Dict[str, List[str]]:
+    """Agent name -> predecessor names for a benchmark DAG shape."""
+    if shape == "chain":
+        names = [f"step_{i}" for i in range(5)]
+        return {name: names[i - 1 : i] for i, name in enumerate(names)}
+    if shape == "wide":
+        return {f"worker_{i}": [] for i in range(10)}
+    if shape == "diamond":
+        return {
+            "source": [],
+            "left": ["source"],
+            "right": ["source"],
+            "sink": ["left", "right"],
+        }
+    if shape == "agents_50":
+        # Five layers of ten; each agent waits on one or two of the layer before
+        rand = random.Random(seed)
+        layers = [[f"agent_{l}_{i}" for i in range(10)] for l in range(5)]
+        dag = {name: [] for name in layers[0]}
+        for previous, layer in zip(layers, layers[1:]):
+            for name in layer:
+                dag[name] = rand.sample(previous, rand.randint(1, 2))
+        return dag
+    raise Exception(f"Unknown DAG shape: {shape}.")
+
+
+DAG_SHAPES = ["chain", "wide", "diamond", "agents_50"]
+
+
+class LocalEnvironment(object):
+    """
+    One engine running its async invocations on the embedded runtime, for
+    one cache variant.
+
+    Must be created inside `local_services`. Tables are created on first use
+    and shared by the variants of a run; each variant seeds its own
+    coordinations, so their data never mixes.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        agent_core: FakeAgentCore,
+        cache_enabled: bool = True,
+        max_workers: int = 64,
+        timeout: float = 600,
+        sleep_scale: float = 1.0,
+    ):
+        from ai_coordination_engine.handlers.embedded_runtime import (
+            get_embedded_runtime,
+        )
+        from ai_coordination_engine.main import AICoordinationEngine
+
+        self.logger = logger
+        self.agent_core = agent_core
+        self.timeout = timeout
+        self.setting = {
+            "region_name": REGION_NAME,
+            "aws_access_key_id": os.environ["AWS_ACCESS_KEY_ID"],
+            "aws_secret_access_key": os.environ["AWS_SECRET_ACCESS_KEY"],
+            "endpoint_id": ENDPOINT_ID,
+            "part_id": PART_ID,
+            "initialize_tables": True,
+            "cache_enabled": cache_enabled,
+            "local_cache_enabled": cache_enabled,
+            "response_cache_enabled": cache_enabled,
+            # The results carry the cache stats instead of periodic log lines
+            "cache_stats_log_interval": 0,
+            "embedded_runtime_enabled": True,
+            "embedded_runtime_workers": max_workers,
+            "iteration_backoff_seconds": 10 * sleep_scale,
+        }
+        self.engine = AICoordinationEngine(logger, **self.setting)
+        self.runtime = get_embedded_runtime()
+
+    def close(self) -> None:
+        from ai_coordination_engine.handlers.embedded_runtime import (
+            stop_embedded_runtime,
+        )
+
+        self.runtime.wait_idle(self.timeout)
+        stop_embedded_runtime()
+
+    def create_info(self, field_name: str, part_id: str = PART_ID) -> Any:
+        """A resolve info like the engine's listeners build."""
+        from ai_coordination_engine.utils.listener import create_listener_info
+
+        partition_key = f"{ENDPOINT_ID}#{part_id}"
+        return create_listener_info(
+            self.logger,
+            field_name,
+            self.setting,
+            endpoint_id=ENDPOINT_ID,
+            part_id=part_id,
+            partition_key=partition_key,
+            context={"partition_key": partition_key},
+        )
+
+    def graphql(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.engine.ai_coordination_graphql(query=query, variables=variables)
+        return json.loads(response) if isinstance(response, str) else response
+
+    def seed_coordination(
+        self, name: str, dag: Dict[str, List[str]], part_id: str = PART_ID
+    ) -> Dict[str, Any]:
+        """
+        Write a coordination with one task agent per DAG node plus a decompose
+        orchestrator, and a task whose agent actions follow the DAG.
+
+        The orchestrator's fake response assigns one subtask to every agent.
+        """
+        from ai_coordination_engine.models.coordination import CoordinationModel
+        from ai_coordination_engine.models.task import TaskModel
+
+        partition_key = f"{ENDPOINT_ID}#{part_id}"
+        now = pendulum.now("UTC")
+        coordination_uuid = uuid.uuid4().hex
+        task_uuid = uuid.uuid4().hex
+        orchestrator_uuid = uuid.uuid4().hex
+        agent_uuids = {agent_name: uuid.uuid4().hex for agent_name in dag}
+
+        agents = [
+            {
+                "agent_uuid": agent_uuids[agent_name],
+                "agent_name": agent_name,
+                "agent_description": f"Handles {agent_name}.",
+                "agent_type": "task",
+            }
+            for agent_name in dag
+        ]
+        agents.append(
+            {
+                "agent_uuid": orchestrator_uuid,
+                "agent_name": "orchestrator",
+                "agent_description": "Decomposes the task query.",
+                "agent_type": "decompose",
+            }
+        )
+        CoordinationModel(
+            partition_key,
+            coordination_uuid,
+            endpoint_id=ENDPOINT_ID,
+            part_id=part_id,
+            coordination_name=f"benchmark-{name}",
+            coordination_description=f"Benchmark coordination ({name}).",
+            agents=agents,
+            theme_uuid="benchmark",
+            version=1,
+            updated_by="benchmark",
+            created_at=now,
+            updated_at=now,
+        ).save()
+        TaskModel(
+            coordination_uuid,
+            task_uuid,
+            partition_key=partition_key,
+            task_name=f"benchmark-{name}",
+            task_description=f"Benchmark task ({name}).",
+            initial_task_query=f"Run the {name} benchmark task.",
+            subtask_queries=[],
+            agent_actions={
+                agent_uuids[agent_name]: {
+                    "predecessors": [agent_uuids[p] for p in predecessors],
+                    "primary_path": len(predecessors) == 1,
+                }
+                for agent_name, predecessors in dag.items()
+            },
+            updated_by="benchmark",
+            created_at=now,
+            updated_at=now,
+        ).save()
+
+        self.agent_core.set_response(
+            orchestrator_uuid,
+            {
+                "subtask_queries": [
+                    {
+                        "agent_uuid": agent_uuids[agent_name],
+                        "subtask_query": f"Do the {agent_name} part.",
+                    }
+                    for agent_name in dag
+                ]
+            },
+        )
+        return {
+            "coordination_uuid": coordination_uuid,
+            "task_uuid": task_uuid,
+            "orchestrator_uuid": orchestrator_uuid,
+            "agent_uuids": agent_uuids,
+        }
+
+    def wait_for_sessions(
+        self, sessions: List[Tuple[str, str]], poll_interval: float = 0.05
+    ) -> Dict[str, Any]:
+        """
+        Wait until every (coordination_uuid, session_uuid) reaches a terminal
+        status, reading the table directly so no engine cache is involved.
+
+        Returns the terminal session rows by session_uuid; sessions still
+        running at the timeout are left out.
+        """
+        from ai_coordination_engine.models.session import SessionModel
+
+        finished, deadline = {}, time.monotonic() + self.timeout
+        while len(finished) < len(sessions) and time.monotonic() < deadline:
+            for coordination_uuid, session_uuid in sessions:
+                if session_uuid in finished:
+                    continue
+                session = SessionModel.get(coordination_uuid, session_uuid)
+                if session.status in TERMINAL_STATUSES:
+                    finished[session_uuid] = session
+            time.sleep(poll_interval)
+        return finished
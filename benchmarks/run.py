@@ -0,0 +1,282 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+End-to-end benchmarks of ai_coordination_engine against moto's DynamoDB and a
+fake ai_agent_core (see benchmarks/README.md).
+
+Usage:
+    python -m benchmarks.run run --sleep-scale 0.1 --output results/baseline.json
+    python -m benchmarks.run compare results/baseline.json results/candidate.json
+"""
+
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import time
+from typing import Any, Dict, List, Optional
+
+import pendulum
+
+from .fake_agent_core import FakeAgentCore
+from .harness import DAG_SHAPES, SECOND_PART_ID, LocalEnvironment, local_services
+from .scenarios import (
+    run_ask_operation_hub,
+    run_procedure_task_session,
+    run_session_list,
+)
+
+SCENARIOS = ["ask_operation_hub", "ask_operation_hub.second_partition"]
+SCENARIOS += [f"procedure.{shape}" for shape in DAG_SHAPES]
+SCENARIOS.append("session_list")
+VARIANTS = {"cache_on": True, "cache_off": False}
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Metrics compared between runs, and whether a higher value is better
+COMPARED_METRICS = {
+    "latency.p50_ms": False,
+    "latency.p95_ms": False,
+    "request_latency.p50_ms": False,
+    "completion_latency.p50_ms": False,
+    "completion_latency.p95_ms": False,
+    "critical_path_mean.critical_path_overhead_ms": False,
+    "throughput_per_s": True,
+    "errors": False,
+    "error_rate": False,
+}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                stderr=subprocess.DEVNULL,
+            )
+            .decode()
+            .strip()
+        )
+    except Exception:
+        return None
+
+
+def run_variant(
+    logger: logging.Logger,
+    agent_core: FakeAgentCore,
+    cache_enabled: bool,
+    args: argparse.Namespace,
+) -> Dict[str, Any]:
+    env = LocalEnvironment(
+        logger,
+        agent_core,
+        cache_enabled=cache_enabled,
+        max_workers=args.workers,
+        timeout=args.timeout,
+        sleep_scale=args.sleep_scale,
+    )
+    results, coordination_uuids = {}, []
+    try:
+        for scenario in args.scenarios:
+            logger.warning(f"Running {scenario} (cache_enabled={cache_enabled}).")
+            start = time.perf_counter()
+            if scenario == "ask_operation_hub":
+                result = run_ask_operation_hub(env, args.requests, args.concurrency)
+            elif scenario == "ask_operation_hub.second_partition":
+                result = run_ask_operation_hub(
+                    env, args.requests, args.concurrency, part_id=SECOND_PART_ID
+                )
+            elif scenario.startswith("procedure."):
+                result = run_procedure_task_session(
+                    env,
+                    scenario.split(".", 1)[1],
+                    args.sessions,
+                    args.concurrency,
+                    seed=args.seed,
+                )
+            else:
+                result = run_session_list(
+                    env,
+                    coordination_uuids or ["none"],
+                    args.requests,
+                    args.concurrency,
+                    limit=args.list_limit,
+                )
+            # sessionList reads the engine setting's partition only
+            if result.get("coordination_uuid") and scenario != (
+                "ask_operation_hub.second_partition"
+            ):
+                coordination_uuids.append(result["coordination_uuid"])
+            result["elapsed_s"] = round(time.perf_counter() - start, 3)
+            results[scenario] = result
+    finally:
+        env.close()
+
+    if cache_enabled:
+        from ai_coordination_engine.models.cache import get_local_cache_stats
+
+        results["cache_stats"] = get_local_cache_stats()
+    return results
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    logger = logging.getLogger("ace-benchmark")
+    agent_core = FakeAgentCore(
+        latency=args.llm_latency,
+        jitter=args.llm_jitter,
+        failure_rate=args.llm_failure_rate,
+        seed=args.seed,
+    )
+
+    report = {
+        "created_at": pendulum.now("UTC").to_iso8601_string(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("command", "func", "output", "verbose")
+        },
+        "variants": {},
+    }
+    with local_services(agent_core, sleep_scale=args.sleep_scale):
+        for variant in args.variants:
+            report["variants"][variant] = run_variant(
+                logger, agent_core, VARIANTS[variant], args
+            )
+
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"{pendulum.now('UTC').format('YYYYMMDD-HHmmss')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(json.dumps(report, indent=2, default=str))
+    logger.warning(f"Results written to {output}.")
+
+    # A scenario whose every request failed measured nothing; fail the run
+    failed = [
+        f"{variant}/{scenario}"
+        for variant, scenarios in report["variants"].items()
+        for scenario, result in scenarios.items()
+        if isinstance(result, dict) and result.get("error_rate") == 1
+    ]
+    if failed:
+        raise SystemExit(
+            f"Every request failed in {', '.join(failed)}; see error_samples in {output}."
+        )
+    return report
+
+
+def _get_metric(result: Dict[str, Any], path: str) -> Optional[float]:
+    value: Any = result
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value if isinstance(value, (int, float)) else None
+
+
+def compare(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Print the compared metrics of two result files side by side."""
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    rows = []
+    for variant, scenarios in candidate["variants"].items():
+        for scenario, result in scenarios.items():
+            base = baseline["variants"].get(variant, {}).get(scenario)
+            if not isinstance(result, dict) or not isinstance(base, dict):
+                continue
+            for metric, higher_is_better in COMPARED_METRICS.items():
+                old, new = _get_metric(base, metric), _get_metric(result, metric)
+                if old is None or new is None:
+                    continue
+                change = round((new - old) / old * 100, 1) if old else None
+                rows.append(
+                    {
+                        "variant": variant,
+                        "scenario": scenario,
+                        "metric": metric,
+                        "baseline": old,
+                        "candidate": new,
+                        "change_pct": change,
+                        "better": (
+                            None if new == old else (new > old) == higher_is_better
+                        ),
+                    }
+                )
+
+    for row in rows:
+        marker = {True: "+", False: "-", None: " "}[row["better"]]
+        change = "n/a" if row["change_pct"] is None else f"{row['change_pct']:+.1f}%"
+        print(
+            f"{marker} {row['variant']:<10} {row['scenario']:<20} "
+            f"{row['metric']:<45} {row['baseline']:>12} -> {row['candidate']:>12} "
+            f"({change})"
+        )
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> Any:
+    parser = argparse.ArgumentParser(
+        description="End-to-end benchmarks of ai_coordination_engine."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS
+    )
+    run_parser.add_argument(
+        "--variants", nargs="+", choices=list(VARIANTS), default=list(VARIANTS)
+    )
+    run_parser.add_argument(
+        "--requests",
+        type=int,
+        default=50,
+        help="ask_operation_hub and sessionList requests per variant",
+    )
+    run_parser.add_argument(
+        "--sessions", type=int, default=3, help="Procedure sessions per DAG shape"
+    )
+    run_parser.add_argument("--concurrency", type=int, default=4)
+    run_parser.add_argument(
+        "--llm-latency", type=float, default=0.2, help="Seconds per fake model call"
+    )
+    run_parser.add_argument("--llm-jitter", type=float, default=0.05)
+    run_parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    run_parser.add_argument(
+        "--sleep-scale",
+        type=float,
+        default=1.0,
+        help="Multiplier of the handlers' poll and backoff sleeps",
+    )
+    run_parser.add_argument("--list-limit", type=int, default=20)
+    run_parser.add_argument("--workers", type=int, default=64)
+    run_parser.add_argument("--timeout", type=float, default=600)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--output", default=None)
+    run_parser.add_argument("--verbose", action="store_true")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+__author__ = "bibow"
+
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pendulum
+
+from .harness import ENDPOINT_ID, PART_ID, LocalEnvironment, build_dag, summarize
+
+SESSION_LIST_QUERY = """
+query sessionList($coordinationUuid: String, $limit: Int) {
+    sessionList(coordinationUuid: $coordinationUuid, limit: $limit) {
+        sessionList {
+            sessionUuid
+            status
+            iterationCount
+            updatedAt
+            coordination {
+                coordinationUuid
+                coordinationName
+                agents
+            }
+            task {
+                taskUuid
+                taskName
+                agentActions
+            }
+            sessionAgents
+            sessionRuns
+        }
+    }
+}
+"""
+
+
+def _run_concurrently(
+    request: Callable[[int], Any], count: int, concurrency: int
+) -> Tuple[List[float], List[Any], List[str], float]:
+    """Run request(0..count-1) on `concurrency` threads; (latencies, results, errors, wall seconds)."""
+
+    def timed(i: int) -> Tuple[float, Any, Any]:
+        start = time.perf_counter()
+        try:
+            result = request(i)
+            return time.perf_counter() - start, result, None
+        except Exception as e:
+            return time.perf_counter() - start, None, f"{type(e).__name__}: {e}"
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+        outcomes = list(executor.map(timed, range(count)))
+    wall = time.perf_counter() - start
+
+    latencies = [latency for latency, _, error in outcomes if error is None]
+    results = [result for _, result, error in outcomes if error is None]
+    errors = [error for _, _, error in outcomes if error is not None]
+    return latencies, results, errors, wall
+
+
+def _error_rate(errors: List[str], count: int) -> Optional[float]:
+    return round(len(errors) / count, 3) if count else None
+
+
+class _Counters(object):
+    """Fake agent core calls and engine invocations made during one scenario."""
+
+    def __init__(self, env: LocalEnvironment):
+        self.env = env
+        self.calls = dict(env.agent_core.calls)
+        stats = env.runtime.stats()
+        self.invocations = Counter(stats["submitted"])
+        self.failures = Counter(stats["failed"])
+
+    def delta(self) -> Dict[str, Any]:
+        stats = self.env.runtime.stats()
+        return {
+            "agent_core_calls": {
+                name: count - self.calls.get(name, 0)
+                for name, count in self.env.agent_core.calls.items()
+            },
+            "invocations": dict(Counter(stats["submitted"]) - self.invocations),
+            "invocation_failures": dict(Counter(stats["failed"]) - self.failures),
+        }
+
+
+def run_ask_operation_hub(
+    env: LocalEnvironment, requests: int, concurrency: int, part_id: str = PART_ID
+) -> Dict[str, Any]:
+    """
+    `ask_operation_hub` calls against a single-agent coordination in `part_id`.
+
+    `latency` is the synchronous call (askModel plus the session/run
+    transaction); `drain_s` is how long the async_insert_update_session
+    invocations took to finish after the last call returned. A call whose
+    run the async invocation did not complete in the caller's partition
+    counts as an error.
+    """
+    from ai_coordination_engine.handlers.operation_hub.operation_hub import (
+        ask_operation_hub,
+    )
+    from ai_coordination_engine.models.session_run import SessionRunModel
+
+    seeded = env.seed_coordination("operation_hub", {"assistant": []}, part_id)
+    counters = _Counters(env)
+
+    def request(i: int) -> Any:
+        return ask_operation_hub(
+            env.create_info("ask_operation_hub", part_id),
+            coordination_uuid=seeded["coordination_uuid"],
+            agent_uuid=seeded["agent_uuids"]["assistant"],
+            user_query=f"Benchmark question {i}.",
+            user_id="benchmark",
+        )
+
+    latencies, results, errors, wall = _run_concurrently(request, requests, concurrency)
+    drain_start = time.perf_counter()
+    drained = env.runtime.wait_idle(env.timeout)
+    drain_s = round(time.perf_counter() - drain_start, 3)
+
+    for result in results:
+        session_run = SessionRunModel.get(result.session_uuid, result.run_uuid)
+        if session_run.partition_key != f"{ENDPOINT_ID}#{part_id}" or (
+            session_run.completed_at is None
+        ):
+            errors.append(
+                f"Run {result.run_uuid} was not completed in partition {part_id}."
+            )
+
+    return dict(
+        {
+            "coordination_uuid": seeded["coordination_uuid"],
+            "requests": requests,
+            "concurrency": concurrency,
+            "errors": len(errors),
+            "error_rate": _error_rate(errors, requests),
+            "error_samples": errors[:10],
+            "latency": summarize(latencies),
+            "throughput_per_s": round(len(latencies) / wall, 3) if wall else None,
+            "drain_s": drain_s,
+            "drained": drained,
+        },
+        **counters.delta(),
+    )
+
+
+def run_procedure_task_session(
+    env: LocalEnvironment, shape: str, sessions: int, concurrency: int, seed: int = 0
+) -> Dict[str, Any]:
+    """
+    `execute_procedure_task_session` runs of one DAG shape, through the
+    orchestrator, until every session is completed or failed.
+
+    `completion_latency` runs from the call to the session's final write.
+    The critical path breakdown comes from the session timelines.
+    """
+    from ai_coordination_engine.handlers.analytics.session_timeline import (
+        get_session_timeline,
+    )
+    from ai_coordination_engine.handlers.procedure_hub.procedure_hub import (
+        execute_procedure_task_session,
+    )
+
+    dag = build_dag(shape, seed)
+    seeded = env.seed_coordination(shape, dag)
+    coordination_uuid = seeded["coordination_uuid"]
+    counters = _Counters(env)
+
+    def request(i: int) -> Tuple[Any, str]:
+        started_at = pendulum.now("UTC")
+        procedure_task_session = execute_procedure_task_session(
+            env.create_info("execute_procedure_task_session"),
+            coordination_uuid=coordination_uuid,
+            task_uuid=seeded["task_uuid"],
+            user_id="benchmark",
+        )
+        return started_at, procedure_task_session.session_uuid
+
+    start = time.perf_counter()
+    latencies, results, errors, _ = _run_concurrently(request, sessions, concurrency)
+    finished = env.wait_for_sessions(
+        [(coordination_uuid, session_uuid) for _, session_uuid in results]
+    )
+    wall = time.perf_counter() - start
+    env.runtime.wait_idle(env.timeout)
+
+    completion_latencies = [
+        (finished[session_uuid].updated_at - started_at).total_seconds()
+        for started_at, session_uuid in results
+        if session_uuid in finished
+    ]
+    timelines = [
+        get_session_timeline(coordination_uuid, session_uuid)
+        for session_uuid, session in finished.items()
+        if session.status == "completed"
+    ]
+    timelines = [timeline for timeline in timelines if timeline]
+    critical_path = {
+        key: (
+            round(sum(timeline[key] or 0 for timeline in timelines) / len(timelines), 3)
+            if timelines
+            else None
+        )
+        for key in [
+            "critical_path_ms",
+            "critical_path_queue_ms",
+            "critical_path_llm_ms",
+            "critical_path_post_processing_ms",
+            "critical_path_overhead_ms",
+        ]
+    }
+
+    return dict(
+        {
+            "coordination_uuid": coordination_uuid,
+            "shape": shape,
+            "agents": len(dag),
+            "sessions": sessions,
+            "concurrency": concurrency,
+            "errors": len(errors),
+            "error_rate": _error_rate(errors, sessions),
+            "error_samples": errors[:10],
+            "request_latency": summarize(latencies),
+            "completion_latency": summarize(completion_latencies),
+            "throughput_per_s": round(len(finished) / wall, 3) if wall else None,
+            "statuses": dict(Counter(session.status for session in finished.values())),
+            "unfinished": len(results) - len(finished),
+            "iterations_mean": (
+                round(
+                    sum(int(s.iteration_count or 0) for s in finished.values())
+                    / len(finished),
+                    3,
+                )
+                if finished
+                else None
+            ),
+            "critical_path_mean": critical_path,
+        },
+        **counters.delta(),
+    )
+
+
+def run_session_list(
+    env: LocalEnvironment,
+    coordination_uuids: List[str],
+    requests: int,
+    concurrency: int,
+    limit: int = 20,
+) -> Dict[str, Any]:
+    """
+    `sessionList` with nested coordination, task, session agents and runs,
+    through the engine's GraphQL entry point, over the sessions the other
+    scenarios of the variant created.
+    """
+    counters = _Counters(env)
+
+    def request(i: int) -> Dict[str, Any]:
+        response = env.graphql(
+            SESSION_LIST_QUERY,
+            {
+                "coordinationUuid": coordination_uuids[i % len(coordination_uuids)],
+                "limit": limit,
+            },
+        )
+        if isinstance(response, dict) and response.get("errors"):
+            raise Exception(json.dumps(response["errors"])[:500])
+        return response
+
+    latencies, results, errors, wall = _run_concurrently(request, requests, concurrency)
+    response_bytes = [len(json.dumps(result, default=str)) for result in results]
+
+    return dict(
+        {
+            "requests": requests,
+            "concurrency": concurrency,
+            "limit": limit,
+            "errors": len(errors),
+            "error_rate": _error_rate(errors, requests),
+            "error_samples": errors[:10],
+            "latency": summarize(latencies),
+            "throughput_per_s": round(len(latencies) / wall, 3) if wall else None,
+            "response_bytes_mean": (
+                round(sum(response_bytes) / len(response_bytes))
+                if response_bytes
+                else None
+            ),
+        },
+        **counters.delta(),
+    )